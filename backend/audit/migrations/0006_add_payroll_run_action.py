@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0005_add_bulk_task_update_action'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.CharField(choices=[('CREATE_PRODUCT', 'Create Product'), ('UPDATE_PRODUCT', 'Update Product'), ('DELETE_PRODUCT', 'Delete Product'), ('CREATE_WORKER', 'Create Worker'), ('UPDATE_WORKER', 'Update Worker'), ('DELETE_WORKER', 'Delete Worker'), ('CREATE_PURCHASE', 'Create Purchase'), ('UPDATE_PURCHASE', 'Update Purchase'), ('CREATE_TASK', 'Create Task'), ('CREATE_TASK_BULK', 'Bulk Create Tasks'), ('UPDATE_TASK', 'Update Task'), ('UPDATE_TASK_BULK', 'Bulk Update Tasks'), ('CREATE_DAILY_SALARY', 'Create Daily Salary'), ('CREATE_SALARY_PAYMENT', 'Create Salary Payment'), ('CREATE_PAYROLL_RUN', 'Create Payroll Run'), ('SELL_STOCK', 'Sell Stock'), ('SELL_STOCK_BULK', 'Bulk Sell Stock'), ('ARCHIVE_STOCK', 'Archive Stock Ledger'), ('LOGIN', 'User Login'), ('LOGOUT', 'User Logout'), ('OTHER', 'Other Action')], max_length=50),
+        ),
+    ]
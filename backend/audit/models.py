@@ -12,13 +12,19 @@ class AuditLog(models.Model):
         ('CREATE_WORKER', 'Create Worker'),
         ('UPDATE_WORKER', 'Update Worker'),
         ('DELETE_WORKER', 'Delete Worker'),
+        ('CREATE_WORKER_BULK', 'Bulk Create Workers'),
         ('CREATE_PURCHASE', 'Create Purchase'),
         ('UPDATE_PURCHASE', 'Update Purchase'),
         ('CREATE_TASK', 'Create Task'),
+        ('CREATE_TASK_BULK', 'Bulk Create Tasks'),
         ('UPDATE_TASK', 'Update Task'),
+        ('UPDATE_TASK_BULK', 'Bulk Update Tasks'),
         ('CREATE_DAILY_SALARY', 'Create Daily Salary'),
         ('CREATE_SALARY_PAYMENT', 'Create Salary Payment'),
+        ('CREATE_PAYROLL_RUN', 'Create Payroll Run'),
         ('SELL_STOCK', 'Sell Stock'),
+        ('SELL_STOCK_BULK', 'Bulk Sell Stock'),
+        ('ARCHIVE_STOCK', 'Archive Stock Ledger'),
         ('LOGIN', 'User Login'),
         ('LOGOUT', 'User Logout'),
         ('OTHER', 'Other Action'),
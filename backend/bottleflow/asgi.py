@@ -2,6 +2,8 @@
 ASGI config for bottleflow project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn bottleflow.asgi:application``) to
+enable the live /api/events/stream/ endpoint.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
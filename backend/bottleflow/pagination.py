@@ -0,0 +1,18 @@
+"""
+Page-number pagination for list endpoints that predate it.
+
+Opt-in like the stock ledger's cursor pagination, so existing clients that
+expect a plain array keep receiving one.
+"""
+from rest_framework.pagination import PageNumberPagination
+
+class OptInPageNumberPagination(PageNumberPagination):
+    """PAGE_SIZE rows per page, overridable with ?page_size= up to max_page_size"""
+    
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    
+    @classmethod
+    def is_requested(cls, request):
+        params = request.query_params
+        return cls.page_query_param in params or cls.page_size_query_param in params
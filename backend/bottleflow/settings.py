@@ -41,6 +41,8 @@ INSTALLED_APPS = [
     'stock',
     'salaries',
     'audit',
+    'events',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -79,6 +81,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Seconds a writer waits for SQLite's database lock before failing
+            'timeout': 20,
+        },
     }
 }
 
@@ -183,6 +189,28 @@ CORS_ALLOW_CREDENTIALS = True
 # Custom user model
 AUTH_USER_MODEL = 'authentication.User'
 
+# Stock snapshots: how often take_stock_snapshots records a point-in-time run
+STOCK_SNAPSHOT_INTERVAL = timedelta(hours=config('STOCK_SNAPSHOT_INTERVAL_HOURS', default=24, cast=int))
+
+# Stock ledger archival: movements older than this many days move to the archive table
+STOCK_ARCHIVE_HORIZON_DAYS = config('STOCK_ARCHIVE_HORIZON_DAYS', default=365, cast=int)
+
+# Default inventory valuation method for /api/stock/valuation/: 'fifo' or 'average'
+STOCK_VALUATION_METHOD = config('STOCK_VALUATION_METHOD', default='fifo')
+
+# Read /api/tasks/statistics/ from the TaskDailyStats rollup instead of scanning the tasks table
+TASK_STATS_FROM_ROLLUP = config('TASK_STATS_FROM_ROLLUP', default=True, cast=bool)
+
+# Seconds /api/salaries/summary/ is cached for; 0 disables the cache. Writes invalidate it only in
+# processes sharing the cache, so with the default per-process cache this bounds how stale others get
+SALARY_SUMMARY_CACHE_SECONDS = config('SALARY_SUMMARY_CACHE_SECONDS', default=10, cast=int)
+
+# Live change events (/api/events/stream/, ASGI only)
+EVENTS_POLL_INTERVAL = config('EVENTS_POLL_INTERVAL', default=1.0, cast=float)  # Seconds between checks for events from other processes
+EVENTS_RETENTION = timedelta(hours=config('EVENTS_RETENTION_HOURS', default=1, cast=int))  # How far back reconnecting clients can resume
+EVENTS_KEEPALIVE_SECONDS = 15
+EVENTS_MAX_STREAM_SECONDS = 300
+
 # Frontend URL for email links
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
@@ -212,6 +240,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'notifications.outbox': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -229,6 +262,10 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@bottleflow.co
 # Email timeout settings
 EMAIL_TIMEOUT = 30
 
+# Email outbox (delivered by `python manage.py run_email_worker`)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_SECONDS = config('EMAIL_OUTBOX_RETRY_SECONDS', default=30, cast=int)  # Doubles after every failed attempt
+
 # Print email configuration status on startup
 if EMAIL_BACKEND == 'django.core.mail.backends.console.EmailBackend':
     print("📧 Email Backend: Console (emails will be printed to console)")
@@ -16,6 +16,8 @@ urlpatterns = [
     path('api/stock/', include('stock.urls')),
     path('api/salaries/', include('salaries.urls')),
     path('api/audit/', include('audit.urls')),
+    path('api/events/', include('events.urls')),
+    path('api/notifications/', include('notifications.urls')),
 ]
 
 if settings.DEBUG:
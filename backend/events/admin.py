@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import ChangeEvent
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(admin.ModelAdmin):
+    """Admin configuration for ChangeEvent model"""
+    
+    list_display = ['id', 'topic', 'created_at']
+    list_filter = ['topic']
+    ordering = ['-id']
+    readonly_fields = ['id', 'topic', 'payload', 'created_at']
@@ -0,0 +1,145 @@
+"""
+Change-event bus behind the live /api/events/stream/ endpoint.
+
+Writers record a ChangeEvent row when their transaction commits, so every
+process running the API sees every change. Each ASGI process runs a single
+asyncio poller that reads new rows and fans them out to the in-memory queues
+of its connected clients: idle connections cost a queue, not a thread, and
+events written by the same process wake the poller immediately instead of
+waiting for the next poll.
+"""
+import asyncio
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import ChangeEvent
+
+FETCH_BATCH_SIZE = 500
+
+
+def get_poll_interval():
+    return getattr(settings, 'EVENTS_POLL_INTERVAL', 1.0)
+
+
+def get_retention():
+    return getattr(settings, 'EVENTS_RETENTION', timedelta(hours=1))
+
+
+def publish(topic, build_payload):
+    """
+    Record a change event once the current transaction commits.
+
+    `build_payload` is called at commit time so the event carries the committed
+    state; returning None skips the event.
+    """
+    def write():
+        payload = build_payload()
+        if payload is not None:
+            ChangeEvent.objects.create(topic=topic, payload=payload)
+            broker.notify()
+
+    transaction.on_commit(write)
+
+
+def publish_many(topic, build_payloads):
+    """Record several change events of one topic with a single insert once the transaction commits"""
+    def write():
+        payloads = build_payloads()
+        if payloads:
+            ChangeEvent.objects.bulk_create([ChangeEvent(topic=topic, payload=payload) for payload in payloads])
+            broker.notify()
+
+    transaction.on_commit(write)
+
+
+def fetch_events(after_id, topics=None, limit=FETCH_BATCH_SIZE):
+    """Events with an id greater than `after_id`, oldest first"""
+    events = ChangeEvent.objects.filter(id__gt=after_id)
+    if topics is not None:
+        events = events.filter(topic__in=topics)
+    return list(events.order_by('id').values_list('id', 'topic', 'payload')[:limit])
+
+
+def latest_event_id():
+    return ChangeEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def prune_events():
+    """Delete events older than the retention window clients can resume from"""
+    return ChangeEvent.objects.filter(created_at__lt=timezone.now() - get_retention()).delete()[0]
+
+
+class Subscriber:
+    """One connected client: the topics it wants and a bounded queue of pending events"""
+
+    def __init__(self, topics, max_pending=1000):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def deliver(self, event):
+        if self.overflowed or (self.topics is not None and event[1] not in self.topics):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind is cut off; it resumes from the table on reconnect
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """Per-process fan-out of change events from one polling task to all subscribers"""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.loop = None
+        self.wakeup = None
+        self.poller = None
+        self.last_id = 0
+
+    def notify(self):
+        """Wake the poller; safe to call from any thread"""
+        loop, wakeup = self.loop, self.wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def subscribe(self, topics=None):
+        subscriber = Subscriber(topics)
+        self.subscribers.add(subscriber)
+        if self.poller is None or self.poller.done():
+            self.loop = asyncio.get_running_loop()
+            self.wakeup = asyncio.Event()
+            self.last_id = await sync_to_async(latest_event_id)()
+            self.poller = asyncio.create_task(self._poll())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def _poll(self):
+        last_pruned = timezone.now()
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=get_poll_interval())
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            events = await sync_to_async(fetch_events)(self.last_id)
+            while events:
+                for event in events:
+                    for subscriber in list(self.subscribers):
+                        subscriber.deliver(event)
+                self.last_id = events[-1][0]
+                events = await sync_to_async(fetch_events)(self.last_id) if len(events) == FETCH_BATCH_SIZE else []
+
+            if timezone.now() - last_pruned > get_retention() / 6:
+                await sync_to_async(prune_events)()
+                last_pruned = timezone.now()
+
+
+broker = EventBroker()
@@ -0,0 +1,24 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+class ChangeEvent(models.Model):
+    """A committed change to stock, tasks or salary payments, pushed to live clients"""
+    
+    TOPIC_CHOICES = [
+        ('stock', 'Stock'),
+        ('tasks', 'Tasks'),
+        ('salaries', 'Salaries'),
+    ]
+    
+    # Sequential so it doubles as the SSE event id clients resume from
+    id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=20, choices=TOPIC_CHOICES)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"#{self.id} {self.topic} @ {self.created_at}"
+    
+    class Meta:
+        db_table = 'change_events'
+        ordering = ['id']
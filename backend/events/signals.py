@@ -0,0 +1,65 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from salaries.models import SalaryPayment
+from salaries.signals import salary_payments_bulk_created
+from stock.models import StockBalance
+from stock.signals import stock_changed
+from tasks.models import Task
+from tasks.signals import tasks_bulk_saved
+from .bus import publish, publish_many
+
+@receiver(stock_changed)
+def publish_stock_change(sender, product_id, **kwargs):
+    """Push the product's committed stock levels"""
+    def payload():
+        balance = StockBalance.objects.filter(product_id=product_id).first() or StockBalance(product_id=product_id)
+        return {'product_id': product_id, **balance.as_stock()}
+    publish('stock', payload)
+
+def task_payload(task, action):
+    return {
+        'action': action,
+        'task_id': task.id,
+        'worker_id': task.worker_id,
+        'product_id': task.product_id,
+        'task_type': task.task_type,
+        'status': task.status,
+        'assigned_quantity': task.assigned_quantity,
+        'washed_quantity': task.washed_quantity,
+        'net_pay': task.net_pay,
+        'date': task.date,
+    }
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, **kwargs):
+    publish('tasks', lambda: task_payload(instance, 'created' if created else 'updated'))
+
+@receiver(tasks_bulk_saved)
+def publish_tasks_bulk_saved(sender, tasks, created, **kwargs):
+    publish_many('tasks', lambda: [task_payload(task, 'created' if created else 'updated') for task in tasks])
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, **kwargs):
+    publish('tasks', lambda: {'action': 'deleted', 'task_id': instance.id, 'worker_id': instance.worker_id})
+
+def salary_payment_payload(payment, action):
+    return {
+        'action': action,
+        'payment_id': payment.id,
+        'worker_id': payment.worker_id,
+        'amount': payment.amount,
+        'date': payment.date,
+    }
+
+@receiver(post_save, sender=SalaryPayment)
+def publish_salary_payment_saved(sender, instance, created, **kwargs):
+    publish('salaries', lambda: salary_payment_payload(instance, 'created' if created else 'updated'))
+
+@receiver(salary_payments_bulk_created)
+def publish_salary_payments_bulk_created(sender, payments, **kwargs):
+    publish_many('salaries', lambda: [salary_payment_payload(payment, 'created') for payment in payments])
+
+@receiver(post_delete, sender=SalaryPayment)
+def publish_salary_payment_deleted(sender, instance, **kwargs):
+    publish('salaries', lambda: salary_payment_payload(instance, 'deleted'))
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .bus import broker, fetch_events
+from .models import ChangeEvent
+
+TOPICS = [topic for topic, _ in ChangeEvent.TOPIC_CHOICES]
+
+def authenticate(request):
+    """
+    Resolve the user from a Bearer token, or from ?token= since browser
+    EventSource connections cannot set headers. Returns None if invalid.
+    """
+    authentication = JWTAuthentication()
+    try:
+        raw_token = request.GET.get('token')
+        if raw_token:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        result = authentication.authenticate(request)
+    except (InvalidToken, TokenError):
+        return None
+    return result[0] if result else None
+
+def format_event(event_id, topic, payload):
+    return f"id: {event_id}\nevent: {topic}\ndata: {json.dumps(payload)}\n\n"
+
+async def stream_events(subscriber, topics, last_event_id):
+    """Replay missed events, then relay live ones with keep-alives until the stream's lifetime ends"""
+    keepalive = getattr(settings, 'EVENTS_KEEPALIVE_SECONDS', 15)
+    # Streams end after a while so connections dropped without notice are released;
+    # EventSource reconnects with Last-Event-ID and misses nothing
+    deadline = time.monotonic() + getattr(settings, 'EVENTS_MAX_STREAM_SECONDS', 300)
+    
+    try:
+        yield 'retry: 3000\n\n'
+        
+        if last_event_id is not None:
+            while True:
+                missed = await sync_to_async(fetch_events)(last_event_id, topics)
+                if not missed:
+                    break
+                for event_id, topic, payload in missed:
+                    yield format_event(event_id, topic, payload)
+                last_event_id = missed[-1][0]
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=min(keepalive, remaining))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if event is None:
+                break  # Fell too far behind; the client resumes from Last-Event-ID
+            event_id, topic, payload = event
+            if last_event_id is not None and event_id <= last_event_id:
+                continue  # Already sent during the replay
+            yield format_event(event_id, topic, payload)
+    finally:
+        broker.unsubscribe(subscriber)
+
+async def event_stream(request):
+    """
+    Server-Sent Events stream of stock, task and salary payment changes.
+    
+    Requires the ASGI application. Optional ?topics=stock,tasks,salaries filter;
+    reconnecting clients send Last-Event-ID (or ?last_event_id=) to resume.
+    """
+    user = await sync_to_async(authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid.'}, status=401)
+    
+    topics = None
+    topics_param = request.GET.get('topics')
+    if topics_param:
+        topics = [value.strip() for value in topics_param.split(',') if value.strip()]
+        invalid_topics = [value for value in topics if value not in TOPICS]
+        if invalid_topics:
+            return JsonResponse({'error': f'Invalid topic(s): {", ".join(invalid_topics)}. Choose from: {", ".join(TOPICS)}'}, status=400)
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            return JsonResponse({'error': 'Invalid Last-Event-ID.'}, status=400)
+    
+    # Subscribe before replaying so nothing committed in between is lost
+    subscriber = await broker.subscribe(topics)
+    response = StreamingHttpResponse(
+        stream_events(subscriber, topics, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
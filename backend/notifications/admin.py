@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import EmailOutbox
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """Admin configuration for EmailOutbox model"""
+    
+    list_display = ['subject', 'category', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'category']
+    search_fields = ['subject', 'last_error']
+    ordering = ['-created_at']
+    exclude = ['body']
+    readonly_fields = [
+        'id', 'category', 'subject', 'from_email', 'recipients', 'attempts', 'claim', 'claimed_at',
+        'last_error', 'sent_at', 'created_at', 'updated_at'
+    ]
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from notifications.outbox import deliver_batch
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox in batches over one SMTP connection, retrying failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Messages sent per SMTP connection')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Deliver what is due now and exit (e.g. from cron)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('📧 Email outbox worker started'))
+
+        while True:
+            close_old_connections()
+            sent, failed = deliver_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'📧 {sent} sent, {failed} failed')
+            # Keep draining while batches come back full
+            if sent + failed >= options['batch_size']:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
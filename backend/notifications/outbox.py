@@ -0,0 +1,153 @@
+"""
+Email outbox.
+
+Requests queue emails with enqueue_email() instead of talking to SMTP, so a
+slow mail server never holds a request. run_email_worker delivers due
+messages in batches over one reused connection, retrying failures with
+exponential backoff and recording each message's delivery state.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def get_max_attempts():
+    return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+
+
+def get_retry_seconds():
+    return getattr(settings, 'EMAIL_OUTBOX_RETRY_SECONDS', 30)
+
+
+def get_claim_timeout():
+    # Longer than a batch can take to send, so only crashed workers' claims expire
+    return timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_CLAIM_SECONDS', 600))
+
+
+def enqueue_email(subject, body, recipients, from_email=None, category=''):
+    """Queue an email for run_email_worker and return its EmailOutbox row"""
+    return EmailOutbox.objects.create(
+        category=category,
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+        next_attempt_at=timezone.now()
+    )
+
+
+def enqueue_emails(emails, category=''):
+    """Queue several (subject, body, recipients, from_email) emails with one insert"""
+    now = timezone.now()
+    return EmailOutbox.objects.bulk_create([
+        EmailOutbox(
+            category=category,
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(recipients),
+            next_attempt_at=now
+        )
+        for subject, body, recipients, from_email in emails
+    ])
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt after `attempts` failures: base, 2x, 4x, ..."""
+    return timedelta(seconds=get_retry_seconds() * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to `batch_size` due messages for this worker.
+    
+    Claims are a conditional UPDATE, so concurrent workers never send the same
+    message; messages claimed by a worker that died are released again.
+    """
+    now = timezone.now()
+    EmailOutbox.objects.filter(status='sending', claimed_at__lt=now - get_claim_timeout()).update(
+        status='queued', claim=None, claimed_at=None
+    )
+    
+    due = EmailOutbox.objects.filter(status='queued', next_attempt_at__lte=now).order_by('next_attempt_at')
+    ids = list(due.values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    claim = uuid.uuid4()
+    EmailOutbox.objects.filter(id__in=ids, status='queued').update(status='sending', claim=claim, claimed_at=now)
+    return list(EmailOutbox.objects.filter(claim=claim, status='sending').order_by('next_attempt_at'))
+
+
+def deliver_batch(batch_size=50):
+    """
+    Send one batch of due messages over a single connection.
+    
+    Returns (sent, failed) counts for the batch; failed messages are requeued with
+    backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, then marked failed and their body cleared.
+    """
+    messages = claim_batch(batch_size)
+    if not messages:
+        return 0, 0
+    
+    connection = get_connection(fail_silently=False)
+    sent, failed = 0, 0
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing can be sent this round; every message counts the attempt
+        for message in messages:
+            _record_failure(message, e)
+        return 0, len(messages)
+    
+    try:
+        for message in messages:
+            try:
+                connection.send_messages([EmailMessage(
+                    message.subject,
+                    message.body,
+                    message.from_email,
+                    message.recipients,
+                    connection=connection
+                )])
+            except Exception as e:
+                _record_failure(message, e)
+                failed += 1
+            else:
+                message.status = 'sent'
+                message.attempts += 1
+                message.sent_at = timezone.now()
+                message.body = ''
+                message.last_error = ''
+                message.claim = None
+                message.save(update_fields=['status', 'attempts', 'sent_at', 'body', 'last_error', 'claim', 'updated_at'])
+                sent += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    
+    logger.info(f"Email outbox batch: {sent} sent, {failed} failed")
+    return sent, failed
+
+
+def _record_failure(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    message.claim = None
+    if message.attempts >= get_max_attempts():
+        message.status = 'failed'
+        # Never sent, but the body may hold credentials, so it is not kept either
+        message.body = ''
+        logger.error(f"Giving up on email {message.id} to {message.recipients} after {message.attempts} attempts: {error}")
+    else:
+        message.status = 'queued'
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+        logger.warning(f"Email {message.id} to {message.recipients} failed (attempt {message.attempts}), retrying: {error}")
+    message.save(update_fields=['status', 'attempts', 'body', 'last_error', 'claim', 'next_attempt_at', 'updated_at'])
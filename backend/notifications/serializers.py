@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import EmailOutbox
+
+class EmailOutboxSerializer(serializers.ModelSerializer):
+    """Serializer for an outbox email's delivery state (the body is never exposed)"""
+    
+    class Meta:
+        model = EmailOutbox
+        fields = [
+            'id', 'category', 'subject', 'recipients', 'status', 'attempts',
+            'next_attempt_at', 'last_error', 'sent_at', 'created_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,39 @@
+from smtplib import SMTPException
+from unittest import mock
+from django.core import mail
+from django.test import TestCase, override_settings
+from workers.email_service import manager_credentials_email
+from .models import EmailOutbox
+from .outbox import deliver_batch, enqueue_email
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_SECONDS=0)
+class EmailOutboxTests(TestCase):
+    """Outbox bodies hold onboarding passwords, so none is kept once delivery has finished either way"""
+
+    def setUp(self):
+        subject, body, from_email = manager_credentials_email('Jane Doe', 'jane.doe', 'S3cret-Passw0rd')
+        self.email = enqueue_email(subject, body, ['jane@example.com'], from_email, category='manager_credentials')
+
+    def test_sent_email_body_cleared(self):
+        self.assertEqual(deliver_batch(), (1, 0))
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, 'sent')
+        self.assertEqual(self.email.body, '')
+        self.assertIn('S3cret-Passw0rd', mail.outbox[0].body)
+
+    def test_failed_email_body_cleared(self):
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException('Relay denied')):
+            self.assertEqual(deliver_batch(), (0, 1))
+            self.email.refresh_from_db()
+            # Still due for a retry, so the body is kept
+            self.assertEqual(self.email.status, 'queued')
+            self.assertIn('S3cret-Passw0rd', self.email.body)
+
+            self.assertEqual(deliver_batch(), (0, 1))
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, 'failed')
+        self.assertEqual(self.email.attempts, 2)
+        self.assertEqual(self.email.last_error, 'Relay denied')
+        self.assertNotIn('S3cret-Passw0rd', self.email.body)
+        self.assertFalse(EmailOutbox.objects.filter(body__contains='S3cret-Passw0rd').exists())
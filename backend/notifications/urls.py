@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('emails/', views.email_list, name='email_list'),
+    path('emails/<uuid:email_id>/', views.email_detail, name='email_detail'),
+]
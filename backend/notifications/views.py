@@ -0,0 +1,47 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from bottleflow.pagination import OptInPageNumberPagination
+from .models import EmailOutbox
+from .serializers import EmailOutboxSerializer
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def email_list(request):
+    """List outbox emails and their delivery state (Admin only)"""
+    
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    emails = EmailOutbox.objects.all()
+    
+    # Filter by delivery status / category if specified
+    email_status = request.query_params.get('status')
+    if email_status:
+        if email_status not in dict(EmailOutbox.STATUS_CHOICES):
+            return Response({'error': f'Invalid status. Choose from: {", ".join(dict(EmailOutbox.STATUS_CHOICES))}'}, status=status.HTTP_400_BAD_REQUEST)
+        emails = emails.filter(status=email_status)
+    category = request.query_params.get('category')
+    if category:
+        emails = emails.filter(category=category)
+    
+    if OptInPageNumberPagination.is_requested(request):
+        paginator = OptInPageNumberPagination()
+        page = paginator.paginate_queryset(emails.order_by('-created_at', 'id'), request)
+        return paginator.get_paginated_response(EmailOutboxSerializer(page, many=True).data)
+    
+    serializer = EmailOutboxSerializer(emails, many=True)
+    return Response(serializer.data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def email_detail(request, email_id):
+    """Get one outbox email's delivery state (Admin only)"""
+    
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    email = get_object_or_404(EmailOutbox, id=email_id)
+    return Response(EmailOutboxSerializer(email).data)
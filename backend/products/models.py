@@ -16,30 +16,10 @@ class Product(models.Model):
     
     @property
     def current_stock(self):
-        """Calculate current stock from stock movements"""
-        from stock.models import StockMovement
-        movements = StockMovement.objects.filter(product=self)
-        
-        raw_stock = 0
-        washed_stock = 0
-        
-        for movement in movements:
-            if movement.type == 'purchase':
-                raw_stock += movement.quantity
-            elif movement.type == 'sell_raw':
-                raw_stock -= movement.quantity
-            elif movement.type == 'sell_washed':
-                washed_stock -= movement.quantity
-            elif movement.type == 'assign_wash':
-                raw_stock -= movement.quantity
-            elif movement.type == 'complete_wash':
-                washed_stock += movement.quantity
-        
-        return {
-            'raw': max(0, raw_stock),
-            'washed': max(0, washed_stock),
-            'total': max(0, raw_stock) + max(0, washed_stock)
-        }
+        """Current stock read from the materialized StockBalance row"""
+        from stock.models import StockBalance
+        balance = StockBalance.objects.filter(product=self).first() or StockBalance(product=self)
+        return balance.as_stock()
     
     class Meta:
         db_table = 'products'
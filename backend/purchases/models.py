@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from products.models import Product
 import uuid
 
@@ -38,25 +38,51 @@ class PurchaseItem(models.Model):
     quantity = models.PositiveIntegerField()
     cost = models.DecimalField(max_digits=10, decimal_places=2)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the posted quantity so save() only sends the ledger the difference
+        posted = dict(zip(field_names, values)).get('quantity', models.DEFERRED)
+        if posted is not models.DEFERRED:
+            instance._posted_quantity = posted
+        return instance
+    
     def save(self, *args, **kwargs):
-        # Create stock movement when purchase item is created
-        super().save(*args, **kwargs)
-        
-        # Import here to avoid circular imports
-        from stock.models import StockMovement
+        # Create or update the stock movement for this purchase item
+        with transaction.atomic():
+            if self._state.adding:
+                previous_quantity = None
+            elif hasattr(self, '_posted_quantity'):
+                previous_quantity = self._posted_quantity
+            else:
+                previous_quantity = PurchaseItem.objects.filter(pk=self.pk).values_list('quantity', flat=True).first()
+            
+            # Import here to avoid circular imports
+            from stock.models import ArchivedStockMovement, StockMovement
+            
+            if previous_quantity is not None and previous_quantity != self.quantity:
+                ArchivedStockMovement.check_source('purchase_item', self.id, 'purchase item')
+            
+            super().save(*args, **kwargs)
+            
+            if previous_quantity != self.quantity:
+                StockMovement.record(
+                    self.product_id,
+                    'purchase',
+                    self.quantity,
+                    source_type='purchase_item',
+                    source_id=self.id,
+                    previous_quantity=previous_quantity,
+                    # Cost may still be a plain number when assigned directly
+                    unit_cost=self._meta.get_field('cost').to_python(self.cost) / self.quantity if self.quantity else None
+                )
+            self._posted_quantity = self.quantity
+    
+    def delete(self, *args, **kwargs):
+        from stock.models import ArchivedStockMovement
         
-        # Create stock movement for this purchase
-        stock_movement, created = StockMovement.objects.get_or_create(
-            product=self.product,
-            type='purchase',
-            quantity=self.quantity,
-            reference_id=str(self.id),
-            defaults={'created_at': self.purchase.created_at}
-        )
-        if created:
-            print(f"DEBUG: Created StockMovement for product {self.product.name}, quantity {self.quantity}, type 'purchase'")
-        else:
-            print(f"DEBUG: StockMovement already exists for product {self.product.name}, reference_id {self.id}")
+        ArchivedStockMovement.check_source('purchase_item', self.id, 'purchase item')
+        return super().delete(*args, **kwargs)
     
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
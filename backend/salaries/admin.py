@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SalaryPayment
+from .models import PayrollRun, SalaryPayment, WorkerBalance, WorkerDailyEarnings
 
 @admin.register(SalaryPayment)
 class SalaryPaymentAdmin(admin.ModelAdmin):
@@ -10,3 +10,32 @@ class SalaryPaymentAdmin(admin.ModelAdmin):
     search_fields = ['worker__name', 'notes']
     ordering = ['-date', '-created_at']
     readonly_fields = ['id', 'created_at']
+
+@admin.register(PayrollRun)
+class PayrollRunAdmin(admin.ModelAdmin):
+    """Admin configuration for PayrollRun model"""
+    
+    list_display = ['date', 'worker_count', 'total_amount', 'payment_method', 'role', 'created_by', 'created_at']
+    list_filter = ['date', 'payment_method', 'role']
+    search_fields = ['idempotency_key', 'notes']
+    ordering = ['-created_at']
+    readonly_fields = ['id', 'idempotency_key', 'worker_count', 'total_amount', 'created_by', 'created_at']
+
+@admin.register(WorkerDailyEarnings)
+class WorkerDailyEarningsAdmin(admin.ModelAdmin):
+    """Admin configuration for WorkerDailyEarnings model (maintained automatically)"""
+    
+    list_display = ['worker', 'date', 'completed_count', 'washed_quantity', 'salary', 'deduction', 'net_pay']
+    list_filter = ['date', 'worker']
+    search_fields = ['worker__name']
+    ordering = ['-date']
+    readonly_fields = ['id', 'worker', 'date', 'completed_count', 'washed_quantity', 'salary', 'deduction', 'net_pay', 'updated_at']
+
+@admin.register(WorkerBalance)
+class WorkerBalanceAdmin(admin.ModelAdmin):
+    """Admin configuration for WorkerBalance model (maintained automatically)"""
+    
+    list_display = ['worker', 'total_earned', 'total_paid', 'pending', 'updated_at']
+    search_fields = ['worker__name']
+    ordering = ['-pending']
+    readonly_fields = ['worker', 'total_earned', 'total_paid', 'pending', 'updated_at']
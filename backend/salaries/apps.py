@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SalariesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'salaries'
+
+    def ready(self):
+        # Connect the receivers that keep the cached salary summary current
+        from . import signals  # noqa: F401
@@ -0,0 +1,88 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from workers.models import Worker
+from salaries.models import SalaryPayment, WorkerBalance, WorkerDailyEarnings
+from salaries.pending import pending_salaries_queryset
+
+class _Rollback(Exception):
+    """Raised to discard the synthetic benchmark data"""
+
+def legacy_pending_salaries():
+    """Three queries per active worker, as pending_salaries worked before the annotated queryset"""
+    rows = []
+    for worker in Worker.objects.filter(is_active=True):
+        total_earned = WorkerDailyEarnings.objects.filter(worker=worker).aggregate(total=Sum('net_pay'))['total'] or 0
+        total_paid = SalaryPayment.objects.filter(worker=worker).aggregate(total=Sum('amount'))['total'] or 0
+        last_payment = SalaryPayment.objects.filter(worker=worker).order_by('-date').first()
+        rows.append((worker.id, max(0, total_earned - total_paid), last_payment.date if last_payment else None))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows
+
+class Command(BaseCommand):
+    help = 'Show that pending salaries take a constant number of queries as the number of workers grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[10, 100, 1000, 10_000],
+                            help='Synthetic worker counts to measure')
+        parser.add_argument('--days', type=int, default=20, help='Days of earnings per synthetic worker')
+        parser.add_argument('--legacy-max', type=int, default=1000,
+                            help='Only time the per-worker loop up to this many workers')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🚀 Pending salaries benchmark'))
+        self.stdout.write('=' * 40)
+
+        for worker_count in options['workers']:
+            try:
+                with transaction.atomic():
+                    self._seed(worker_count, options['days'])
+                    self._report(f'{worker_count} workers, annotated queryset', lambda: list(pending_salaries_queryset()))
+                    if worker_count <= options['legacy_max']:
+                        self._report(f'{worker_count} workers, legacy loop', legacy_pending_salaries)
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+        self.stdout.write('🧹 Synthetic data rolled back')
+
+    def _seed(self, worker_count, days):
+        run = random.randint(0, 10**9)
+        workers = Worker.objects.bulk_create([
+            Worker(name=f'Benchmark worker {index}', phone_number='0700000000', id_number=f'bench-{run}-{index}')
+            for index in range(worker_count)
+        ])
+        today = date.today()
+        WorkerDailyEarnings.objects.bulk_create([
+            WorkerDailyEarnings(
+                worker=worker,
+                date=today - timedelta(days=day),
+                completed_count=3,
+                washed_quantity=150,
+                salary=Decimal('300.00'),
+                net_pay=Decimal('300.00')
+            )
+            for worker in workers
+            for day in range(days)
+        ], batch_size=5000)
+        payments = SalaryPayment.objects.bulk_create([
+            SalaryPayment(worker=worker, amount=Decimal(random.randint(0, 300 * days)), date=today - timedelta(days=random.randint(0, days)))
+            for worker in workers
+        ], batch_size=5000)
+        earned = Decimal(300 * days)
+        WorkerBalance.objects.bulk_create([
+            WorkerBalance(worker=payment.worker, total_earned=earned, total_paid=payment.amount, pending=max(Decimal(0), earned - payment.amount))
+            for payment in payments
+        ], batch_size=5000)
+
+    def _report(self, label, func):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        self.stdout.write(f'⏱️  {label}: {len(context.captured_queries)} queries, {elapsed * 1000:.1f} ms')
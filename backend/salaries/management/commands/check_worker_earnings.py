@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from salaries.models import WorkerDailyEarnings
+
+class Command(BaseCommand):
+    help = 'Compare the WorkerDailyEarnings rollup with completed tasks without writing'
+
+    def handle(self, *args, **options):
+        mismatches = WorkerDailyEarnings.rebuild(dry_run=True)
+
+        for (worker_id, date), stored, expected in mismatches:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {worker_id} on {date}: stored {stored} != tasks {expected} (completed, washed, salary, deduction, net_pay)')
+            )
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'❌ {len(mismatches)} worker-day(s) out of sync; run rebuild_worker_earnings'))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS('✅ Worker daily earnings match the completed tasks'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from salaries.models import WorkerBalance
+
+class Command(BaseCommand):
+    help = 'Rebuild the WorkerBalance ledger from completed tasks and salary payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare the stored balances with a full recompute, do not write')
+
+    def handle(self, *args, **options):
+        verify = options['verify']
+        mismatches = WorkerBalance.rebuild(dry_run=verify)
+
+        for worker_id, stored, expected in mismatches:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {worker_id}: stored {stored} != recomputed {expected} (earned, paid, pending)')
+            )
+
+        if verify:
+            if mismatches:
+                self.stdout.write(self.style.ERROR(f'❌ {len(mismatches)} worker balance(s) out of sync; run rebuild_worker_balances'))
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS('✅ Worker balances match completed tasks and payments'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt worker balances ({len(mismatches)} corrected)'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from salaries.models import WorkerDailyEarnings
+
+class Command(BaseCommand):
+    help = 'Rebuild the WorkerDailyEarnings rollup from completed tasks'
+
+    def handle(self, *args, **options):
+        mismatches = WorkerDailyEarnings.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt worker daily earnings ({len(mismatches)} worker-day(s) corrected)'))
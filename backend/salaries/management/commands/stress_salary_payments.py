@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from rest_framework import serializers
+from workers.models import Worker
+from tasks.models import Task
+from salaries.models import SalaryPayment, WorkerBalance
+from salaries.serializers import SalaryPaymentCreateSerializer
+
+class Command(BaseCommand):
+    help = 'Fire concurrent salary payments at one worker and check that nothing is overpaid'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--earned', type=Decimal, default=Decimal('1000'), help='Net pay the worker earns before the run')
+        parser.add_argument('--payments', type=int, default=500, help='Number of payment attempts')
+        parser.add_argument('--amount', type=Decimal, default=Decimal('7'), help='Amount per payment')
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent worker threads')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic worker, task and payments')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🚀 Concurrent salary payment stress test'))
+        self.stdout.write('=' * 40)
+
+        earned = options['earned']
+        worker = Worker.objects.create(name='Stress test worker', phone_number='0700000000', id_number=f'stress-{time.time_ns()}')
+        Task.objects.create(worker=worker, task_type='daily_salary', salary=earned, date=date.today())
+
+        results = {'paid': 0, 'rejected': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def pay(_):
+            outcome = 'paid'
+            try:
+                serializer = SalaryPaymentCreateSerializer(data={
+                    'worker': worker.id,
+                    'amount': str(options['amount']),
+                    'date': date.today().isoformat(),
+                })
+                if serializer.is_valid():
+                    serializer.save()
+                else:
+                    outcome = 'rejected'
+            except serializers.ValidationError:
+                outcome = 'rejected'
+            except Exception as e:
+                outcome = 'errors'
+                self.stderr.write(f'❌ {e}')
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            list(executor.map(pay, range(options['payments'])))
+        elapsed = time.perf_counter() - start
+
+        total_paid = SalaryPayment.objects.filter(worker=worker).aggregate(total=Sum('amount'))['total'] or 0
+        balance = WorkerBalance.objects.get(worker=worker)
+        overpaid = max(0, total_paid - earned)
+
+        self.stdout.write(f'⏱️  {options["payments"]} attempts on {options["threads"]} threads in {elapsed:.2f}s '
+                          f'({options["payments"] / elapsed:.0f} payments/s)')
+        self.stdout.write(f'💰 paid {results["paid"]}, rejected {results["rejected"]}, errors {results["errors"]}')
+        self.stdout.write(f'💰 paid ${total_paid} of ${earned} earned, ledger: paid ${balance.total_paid}, pending ${balance.pending}')
+
+        if overpaid or balance.total_paid != total_paid or balance.pending != earned - total_paid:
+            self.stdout.write(self.style.ERROR(f'❌ Overpaid by ${overpaid} or the balance ledger drifted'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Zero overpayments'))
+
+        if not options['keep']:
+            worker.delete()
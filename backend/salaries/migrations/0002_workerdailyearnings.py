@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def populate_earnings(apps, schema_editor):
+    """Seed WorkerDailyEarnings from the existing completed tasks"""
+    Task = apps.get_model('tasks', 'Task')
+    WorkerDailyEarnings = apps.get_model('salaries', 'WorkerDailyEarnings')
+
+    rows = Task.objects.filter(status='Completed').order_by().values('worker_id', 'date').annotate(
+        completed_count=models.Count('id'),
+        total_washed=models.Sum('washed_quantity'),
+        total_salary=models.Sum('salary'),
+        total_deduction=models.Sum('deduction'),
+        total_net_pay=models.Sum('net_pay'),
+    )
+    WorkerDailyEarnings.objects.bulk_create([
+        WorkerDailyEarnings(
+            worker_id=row['worker_id'],
+            date=row['date'],
+            completed_count=row['completed_count'],
+            washed_quantity=row['total_washed'],
+            salary=row['total_salary'],
+            deduction=row['total_deduction'],
+            net_pay=row['total_net_pay'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workers', '0003_workerhistory'),
+        ('salaries', '0001_initial'),
+        ('tasks', '0002_taskdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerDailyEarnings',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('completed_count', models.IntegerField(default=0)),
+                ('washed_quantity', models.IntegerField(default=0)),
+                ('salary', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('deduction', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_earnings', to='workers.worker')),
+            ],
+            options={
+                'db_table': 'worker_daily_earnings',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='worker_earnings_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workerdailyearnings',
+            constraint=models.UniqueConstraint(fields=('worker', 'date'), name='unique_worker_daily_earnings'),
+        ),
+        migrations.RunPython(populate_earnings, migrations.RunPython.noop),
+    ]
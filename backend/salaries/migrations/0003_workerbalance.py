@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+from decimal import Decimal
+
+
+def populate_balances(apps, schema_editor):
+    """Seed a WorkerBalance for every worker from completed tasks and payments"""
+    Worker = apps.get_model('workers', 'Worker')
+    Task = apps.get_model('tasks', 'Task')
+    SalaryPayment = apps.get_model('salaries', 'SalaryPayment')
+    WorkerBalance = apps.get_model('salaries', 'WorkerBalance')
+
+    earned = dict(
+        Task.objects.filter(status='Completed').order_by().values('worker_id')
+        .annotate(total=models.Sum('net_pay')).values_list('worker_id', 'total')
+    )
+    paid = dict(
+        SalaryPayment.objects.order_by().values('worker_id')
+        .annotate(total=models.Sum('amount')).values_list('worker_id', 'total')
+    )
+    balances = []
+    for worker_id in Worker.objects.values_list('id', flat=True):
+        total_earned = earned.get(worker_id) or Decimal(0)
+        total_paid = paid.get(worker_id) or Decimal(0)
+        balances.append(WorkerBalance(
+            worker_id=worker_id,
+            total_earned=total_earned,
+            total_paid=total_paid,
+            pending=max(Decimal(0), total_earned - total_paid),
+        ))
+    WorkerBalance.objects.bulk_create(balances, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workers', '0003_workerhistory'),
+        ('salaries', '0002_workerdailyearnings'),
+        ('tasks', '0002_taskdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerBalance',
+            fields=[
+                ('worker', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='workers.worker')),
+                ('total_earned', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'worker_balances',
+            },
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
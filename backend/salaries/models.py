@@ -1,6 +1,12 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
 from workers.models import Worker
+from tasks.models import Task, TaskRollup
+from .summary import invalidate_salary_summary
 import uuid
+from decimal import Decimal
 
 class SalaryPayment(models.Model):
     """Track salary payments made to workers"""
@@ -11,11 +17,244 @@ class SalaryPayment(models.Model):
     date = models.DateField()
     payment_method = models.CharField(max_length=50, default='Cash')
     notes = models.TextField(blank=True, null=True)
+    payroll_run = models.ForeignKey('PayrollRun', on_delete=models.SET_NULL, null=True, blank=True, related_name='payments')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            posted = self._get_posted_payment()
+            super().save(*args, **kwargs)
+            WorkerBalance.apply_payments(added=[self.balance_entry()], removed=[posted] if posted else [])
+            self._posted_payment = self.balance_entry()
+            # Payment dates count towards monthly totals even when the balance is unchanged
+            invalidate_salary_summary()
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            posted = self._get_posted_payment()
+            result = super().delete(*args, **kwargs)
+            if posted:
+                WorkerBalance.apply_payments(removed=[posted])
+            invalidate_salary_summary()
+        return result
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this payment already counts towards WorkerBalance
+        loaded = dict(zip(field_names, values))
+        if 'worker_id' in loaded and 'amount' in loaded:
+            instance._posted_payment = (loaded['worker_id'], loaded['amount'])
+        return instance
+    
+    def balance_entry(self):
+        """(worker_id, amount) this payment counts towards the worker's balance"""
+        return self.worker_id, self._meta.get_field('amount').to_python(self.amount)
+    
+    def _get_posted_payment(self):
+        """(worker_id, amount) already counted for this payment, or None for a new payment"""
+        if self._state.adding:
+            return None
+        if hasattr(self, '_posted_payment'):
+            return self._posted_payment
+        return SalaryPayment.objects.filter(pk=self.pk).values_list('worker_id', 'amount').first()
+    
     def __str__(self):
         return f"{self.worker.name} - ${self.amount} - {self.date}"
     
     class Meta:
         db_table = 'salary_payments'
         ordering = ['-date', '-created_at']
+
+class PayrollRun(models.Model):
+    """One batch of salary payments covering every matching worker's pending balance"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    idempotency_key = models.CharField(max_length=100, unique=True)  # Retries with the same key return this run
+    date = models.DateField()
+    payment_method = models.CharField(max_length=50, default='Cash')
+    role = models.CharField(max_length=50, blank=True, null=True)  # Only pay workers with this role
+    max_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)  # Cap per worker
+    notes = models.TextField(blank=True, null=True)
+    worker_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='payroll_runs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Payroll {self.date} - {self.worker_count} workers - ${self.total_amount}"
+    
+    class Meta:
+        db_table = 'payroll_runs'
+        ordering = ['-created_at']
+
+class WorkerDailyEarnings(TaskRollup):
+    """
+    Completed tasks, bottles washed and pay per worker and day.
+    
+    Updated in the same transaction as every task write, so payroll questions
+    read a few rows per worker instead of scanning tasks.
+    """
+    
+    key_fields = ('worker_id', 'date')
+    count_field = 'completed_count'
+    value_fields = ('washed_quantity', 'salary', 'deduction', 'net_pay')
+    task_conditions = {'status': 'Completed'}
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    worker = models.ForeignKey(Worker, on_delete=models.CASCADE, related_name='daily_earnings')
+    date = models.DateField()
+    completed_count = models.IntegerField(default=0)
+    washed_quantity = models.IntegerField(default=0)  # Bottles washed
+    salary = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Gross pay
+    deduction = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    net_pay = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.worker_id} - {self.date} - ${self.net_pay}"
+    
+    class Meta:
+        db_table = 'worker_daily_earnings'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['worker', 'date'], name='unique_worker_daily_earnings'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='worker_earnings_date_idx'),
+        ]
+
+class WorkerBalance(models.Model):
+    """
+    Running totals of what a worker has earned and been paid, and what is pending.
+    
+    Updated in the same transaction as every task and salary payment write, so
+    Worker.pending_salary is a single-row read. Workers with no row have earned
+    and been paid nothing.
+    """
+    
+    worker = models.OneToOneField(Worker, on_delete=models.CASCADE, primary_key=True, related_name='balance')
+    total_earned = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Net pay of completed tasks
+    total_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Never below zero
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.worker_id} - pending ${self.pending}"
+    
+    class Meta:
+        db_table = 'worker_balances'
+    
+    def refresh_pending(self):
+        self.pending = max(Decimal(0), self.total_earned - self.total_paid)
+    
+    @classmethod
+    def lock(cls, worker_id):
+        """Lock and return the worker's balance row for the rest of the current transaction"""
+        return cls.lock_many([worker_id])[worker_id]
+    
+    @classmethod
+    def lock_many(cls, worker_ids):
+        """
+        Lock the balance rows of several workers, creating missing ones, as {worker_id: balance}.
+        
+        Like StockBalance.lock_many: SELECT ... FOR UPDATE in primary key order where the
+        backend has row locks, otherwise an UPDATE that takes the SQLite write lock up front.
+        """
+        worker_ids = sorted(set(worker_ids))
+        balances = cls.objects.filter(worker_id__in=worker_ids)
+        
+        if connection.features.has_select_for_update:
+            cls.objects.bulk_create([cls(worker_id=worker_id) for worker_id in worker_ids], ignore_conflicts=True)
+            balances = balances.select_for_update().order_by('worker_id')
+        elif balances.update(updated_at=timezone.now()) < len(worker_ids):
+            cls.objects.bulk_create([cls(worker_id=worker_id) for worker_id in worker_ids], ignore_conflicts=True)
+        
+        return {balance.worker_id: balance for balance in balances}
+    
+    @classmethod
+    def apply_tasks(cls, added=(), removed=()):
+        """Add and remove the net pay of Task.rollup_entry() contributions that count as earned"""
+        earned = {}
+        for sign, entries in ((1, added), (-1, removed)):
+            for entry in entries:
+                if all(entry[field] == value for field, value in WorkerDailyEarnings.task_conditions.items()):
+                    earned[entry['worker_id']] = earned.get(entry['worker_id'], 0) + sign * entry['net_pay']
+        cls._apply(earned=earned)
+    
+    @classmethod
+    def apply_payments(cls, added=(), removed=()):
+        """Add and remove SalaryPayment.balance_entry() (worker_id, amount) pairs"""
+        paid = {}
+        for sign, entries in ((1, added), (-1, removed)):
+            for worker_id, amount in entries:
+                paid[worker_id] = paid.get(worker_id, 0) + sign * amount
+        cls._apply(paid=paid)
+    
+    @classmethod
+    def _apply(cls, earned=None, paid=None):
+        """Add {worker_id: amount} changes to the locked earned and paid totals with a constant number of queries"""
+        earned = {worker_id: amount for worker_id, amount in (earned or {}).items() if amount}
+        paid = {worker_id: amount for worker_id, amount in (paid or {}).items() if amount}
+        worker_ids = earned.keys() | paid.keys()
+        if not worker_ids:
+            return
+        
+        rows = cls.lock_many(worker_ids)
+        now = timezone.now()
+        for worker_id in worker_ids:
+            row = rows[worker_id]
+            row.total_earned += earned.get(worker_id, 0)
+            row.total_paid += paid.get(worker_id, 0)
+            row.refresh_pending()
+            row.updated_at = now
+        cls.objects.bulk_update(rows.values(), ['total_earned', 'total_paid', 'pending', 'updated_at'])
+        invalidate_salary_summary()
+    
+    @classmethod
+    def compute_expected(cls):
+        """Recompute every worker's balance from tasks and payments as {worker_id: (earned, paid, pending)}"""
+        earned = dict(
+            Task.objects.filter(**WorkerDailyEarnings.task_conditions).order_by().values('worker_id')
+            .annotate(total=Sum('net_pay')).values_list('worker_id', 'total')
+        )
+        paid = dict(
+            SalaryPayment.objects.order_by().values('worker_id')
+            .annotate(total=Sum('amount')).values_list('worker_id', 'total')
+        )
+        expected = {}
+        for worker_id in Worker.objects.values_list('id', flat=True):
+            total_earned = earned.get(worker_id) or Decimal(0)
+            total_paid = paid.get(worker_id) or Decimal(0)
+            expected[worker_id] = (total_earned, total_paid, max(Decimal(0), total_earned - total_paid))
+        return expected
+    
+    @classmethod
+    def rebuild(cls, dry_run=False):
+        """
+        Rebuild every worker's balance from tasks and payments.
+        
+        Returns a list of (worker_id, stored, expected) tuples for every worker that differed;
+        a missing row is stored as zeros.
+        """
+        with transaction.atomic():
+            stored = {
+                row.worker_id: (row.total_earned, row.total_paid, row.pending)
+                for row in cls.objects.select_for_update()
+            }
+            expected = cls.compute_expected()
+            zero = (Decimal(0),) * 3
+            mismatches = [
+                (worker_id, stored.get(worker_id, zero), totals)
+                for worker_id, totals in expected.items()
+                if stored.get(worker_id, zero) != totals
+            ]
+            if mismatches and not dry_run:
+                invalidate_salary_summary()
+                cls.objects.all().delete()
+                cls.objects.bulk_create([
+                    cls(worker_id=worker_id, total_earned=earned, total_paid=paid, pending=pending)
+                    for worker_id, (earned, paid, pending) in expected.items()
+                ], batch_size=1000)
+        
+        return mismatches
@@ -0,0 +1,84 @@
+"""
+Payroll run engine.
+
+Pays every matching worker's pending balance in one transaction: the balances
+are snapshotted (and locked) with one query, the payments are written with one
+bulk insert and the ledger and audit trail are updated once for the whole run.
+"""
+from django.db import IntegrityError, transaction
+from audit.utils import log_audit
+from .models import PayrollRun, SalaryPayment, WorkerBalance
+from .signals import salary_payments_bulk_created
+
+
+def run_payroll(user, idempotency_key, date, payment_method='Cash', role=None, max_amount=None,
+                worker_ids=None, notes=None):
+    """
+    Pay the pending salary of every active worker that matches, as one PayrollRun.
+    
+    Args:
+        user: The user running payroll
+        idempotency_key: Client-chosen key; repeating it returns the original run
+        date: Payment date
+        payment_method: Payment method recorded on every payment
+        role: Optional worker role to restrict to
+        max_amount: Optional cap on each worker's payment
+        worker_ids: Optional workers to restrict to
+        notes: Optional notes recorded on the run and every payment
+    
+    Returns:
+        (run, created) - created is False when the key was already used
+    """
+    existing = PayrollRun.objects.filter(idempotency_key=idempotency_key).first()
+    if existing:
+        return existing, False
+    
+    with transaction.atomic():
+        try:
+            # Claim the key first, so a concurrent retry fails here instead of paying twice
+            with transaction.atomic():
+                run = PayrollRun.objects.create(
+                    idempotency_key=idempotency_key,
+                    date=date,
+                    payment_method=payment_method,
+                    role=role,
+                    max_amount=max_amount,
+                    notes=notes,
+                    created_by=user
+                )
+        except IntegrityError:
+            return PayrollRun.objects.get(idempotency_key=idempotency_key), False
+        
+        balances = WorkerBalance.objects.select_for_update().filter(worker__is_active=True, pending__gt=0)
+        if role:
+            balances = balances.filter(worker__role=role)
+        if worker_ids is not None:
+            balances = balances.filter(worker_id__in=worker_ids)
+        
+        payments = SalaryPayment.objects.bulk_create([
+            SalaryPayment(
+                worker_id=balance.worker_id,
+                amount=min(balance.pending, max_amount) if max_amount else balance.pending,
+                date=date,
+                payment_method=payment_method,
+                notes=notes or f'Payroll run {date}',
+                payroll_run=run
+            )
+            for balance in balances
+        ], batch_size=1000)
+        
+        # bulk_create skips SalaryPayment.save, so post the whole run to the ledger at once
+        WorkerBalance.apply_payments(added=[payment.balance_entry() for payment in payments])
+        salary_payments_bulk_created.send(sender=SalaryPayment, payments=payments)
+        
+        run.worker_count = len(payments)
+        run.total_amount = sum(payment.amount for payment in payments)
+        run.save(update_fields=['worker_count', 'total_amount'])
+        
+        log_audit(
+            user=user,
+            action='CREATE_PAYROLL_RUN',
+            details=f'Payroll run for {date}: paid ${run.total_amount} to {run.worker_count} workers'
+        )
+    
+    return run, True
@@ -0,0 +1,71 @@
+"""
+Pending salary engine.
+
+Annotates workers with what they earned, what they were paid and their pending
+balance from WorkerBalance, plus their last payment date, so the whole list is
+filtered, ordered and paginated by the database in one query.
+"""
+from decimal import Decimal
+from django.db.models import DecimalField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from workers.models import Worker
+from .models import SalaryPayment
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+ORDERING_FIELDS = {
+    'pending_salary': 'pending_salary',
+    'total_earned': 'total_earned',
+    'total_paid': 'total_paid',
+    'last_payment_date': 'last_payment_date',
+    'worker_name': 'name',
+}
+
+PENDING_COLUMNS = (
+    'worker_id', 'worker_name', 'worker_role',
+    'pending_salary', 'total_earned', 'total_paid', 'last_payment_date'
+)
+
+
+def _balance(field):
+    """WorkerBalance column for the worker, 0 for workers without a balance row"""
+    return Coalesce(F(f'balance__{field}'), Value(Decimal(0)), output_field=MONEY)
+
+
+def pending_salaries_queryset(include_zero=False, role=None, search=None, ordering=None):
+    """
+    Active workers annotated with total_earned, total_paid, pending_salary and
+    last_payment_date, as values() rows shaped for PendingSalarySerializer.
+
+    Args:
+        include_zero: Also return workers with nothing pending
+        role: Optional worker role to restrict to
+        search: Optional case-insensitive fragment of the worker name
+        ordering: Optional key from ORDERING_FIELDS, prefixed with '-' for descending;
+            defaults to the highest pending salary first
+    """
+    workers = Worker.objects.filter(is_active=True)
+    if role:
+        workers = workers.filter(role=role)
+    if search:
+        workers = workers.filter(name__icontains=search)
+
+    last_payment = SalaryPayment.objects.filter(worker=OuterRef('pk')).order_by('-date').values('date')[:1]
+    workers = workers.annotate(
+        total_earned=_balance('total_earned'),
+        total_paid=_balance('total_paid'),
+        pending_salary=_balance('pending'),
+        last_payment_date=Subquery(last_payment),
+        worker_id=F('id'),
+        worker_name=F('name'),
+        worker_role=F('role'),
+    )
+    if not include_zero:
+        workers = workers.filter(pending_salary__gt=0)
+
+    ordering = ordering or '-pending_salary'
+    descending = ordering.startswith('-')
+    field = ORDERING_FIELDS[ordering.lstrip('-')]
+    # Workers never paid sort last either way; name and id keep pages stable on ties
+    order = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+    return workers.order_by(order, 'name', 'id').values(*PENDING_COLUMNS)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import SalaryPayment
+from django.db import transaction
+from .models import PayrollRun, SalaryPayment, WorkerBalance, WorkerDailyEarnings
 from workers.models import Worker
 
 class SalaryPaymentSerializer(serializers.ModelSerializer):
@@ -9,8 +10,8 @@ class SalaryPaymentSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = SalaryPayment
-        fields = ['id', 'worker', 'worker_name', 'amount', 'date', 'payment_method', 'notes', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'worker', 'worker_name', 'amount', 'date', 'payment_method', 'notes', 'payroll_run', 'created_at']
+        read_only_fields = ['id', 'payroll_run', 'created_at']
 
 class SalaryPaymentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating salary payments"""
@@ -36,6 +37,64 @@ class SalaryPaymentCreateSerializer(serializers.ModelSerializer):
             )
         
         return attrs
+    
+    def create(self, validated_data):
+        # Re-check the pending salary under the balance lock so concurrent payments cannot overpay
+        with transaction.atomic():
+            pending_salary = WorkerBalance.lock(validated_data['worker'].id).pending
+            if validated_data['amount'] > pending_salary:
+                raise serializers.ValidationError(
+                    f"Payment amount (${validated_data['amount']}) exceeds pending salary (${pending_salary})"
+                )
+            return super().create(validated_data)
+
+class PayrollRunCreateSerializer(serializers.Serializer):
+    """Serializer for starting a payroll run"""
+    
+    idempotency_key = serializers.CharField(max_length=100)
+    date = serializers.DateField(required=False)
+    payment_method = serializers.CharField(max_length=50, default='Cash')
+    role = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    max_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    worker_ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    notes = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_max_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Maximum amount must be greater than 0")
+        return value
+
+class PayrollRunSerializer(serializers.ModelSerializer):
+    """Serializer for PayrollRun model"""
+    
+    created_by_name = serializers.CharField(source='created_by.username', read_only=True, default=None)
+    
+    class Meta:
+        model = PayrollRun
+        fields = [
+            'id', 'idempotency_key', 'date', 'payment_method', 'role', 'max_amount', 'notes',
+            'worker_count', 'total_amount', 'created_by', 'created_by_name', 'created_at'
+        ]
+        read_only_fields = fields
+
+class WorkerDailyEarningsSerializer(serializers.ModelSerializer):
+    """Serializer for one worker's earnings on one day"""
+    
+    class Meta:
+        model = WorkerDailyEarnings
+        fields = ['date', 'completed_count', 'washed_quantity', 'salary', 'deduction', 'net_pay']
+
+class EarningsReportSerializer(serializers.Serializer):
+    """Serializer for one row of the payroll earnings report"""
+    
+    worker_id = serializers.UUIDField(required=False)
+    worker_name = serializers.CharField(required=False)
+    date = serializers.DateField(required=False)
+    completed_count = serializers.IntegerField()
+    washed_quantity = serializers.IntegerField()
+    salary = serializers.DecimalField(max_digits=14, decimal_places=2)
+    deduction = serializers.DecimalField(max_digits=14, decimal_places=2)
+    net_pay = serializers.DecimalField(max_digits=14, decimal_places=2)
 
 class PendingSalarySerializer(serializers.Serializer):
     """Serializer for pending salary information"""
@@ -51,6 +110,8 @@ class PendingSalarySerializer(serializers.Serializer):
 class SalarySummarySerializer(serializers.Serializer):
     """Serializer for salary summary statistics"""
     
+    year = serializers.IntegerField()
+    month = serializers.IntegerField()
     total_pending = serializers.DecimalField(max_digits=12, decimal_places=2)
     total_paid_this_month = serializers.DecimalField(max_digits=12, decimal_places=2)
     total_paid_all_time = serializers.DecimalField(max_digits=12, decimal_places=2)
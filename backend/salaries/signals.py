@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from workers.models import Worker
+from .summary import invalidate_salary_summary
+
+# Sent with the list of payments whenever salary payments are written with
+# bulk_create, which skips post_save
+salary_payments_bulk_created = Signal()
+
+@receiver([post_save, post_delete], sender=Worker)
+def invalidate_summary_on_worker_change(sender, **kwargs):
+    """Pending totals only count active workers, so (de)activations change the summary"""
+    invalidate_salary_summary()
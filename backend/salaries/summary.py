@@ -0,0 +1,72 @@
+"""
+Salary summary engine.
+
+Computes the dashboard's salary summary with two aggregate queries (pending
+balances and payments) and keeps it in the cache under a version that every
+balance or payment write replaces on commit. Only processes sharing that cache
+see the new version: with the default per-process LocMemCache, other server
+processes keep serving their copy until SALARY_SUMMARY_CACHE_SECONDS pass, so
+the timeout is short unless a shared backend such as Redis is configured.
+"""
+import uuid
+from datetime import date
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+VERSION_KEY = 'salaries:summary:version'
+
+
+def get_cache_seconds():
+    return getattr(settings, 'SALARY_SUMMARY_CACHE_SECONDS', 10)
+
+
+def compute_salary_summary(year, month):
+    """Pending totals over active workers and payment totals for one month and all time"""
+    # Import here to avoid circular imports (the models invalidate the cache)
+    from .models import SalaryPayment, WorkerBalance
+    
+    pending = WorkerBalance.objects.filter(worker__is_active=True).aggregate(
+        total=Sum('pending'),
+        workers=Count('worker', filter=Q(pending__gt=0))
+    )
+    
+    month_start = date(year, month, 1)
+    month_end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    in_month = Q(date__gte=month_start, date__lt=month_end)
+    payments = SalaryPayment.objects.aggregate(
+        total_paid_all_time=Sum('amount'),
+        total_paid_this_month=Sum('amount', filter=in_month),
+        payments_this_month=Count('id', filter=in_month)
+    )
+    
+    return {
+        'year': year,
+        'month': month,
+        'total_pending': pending['total'] or 0,
+        'total_paid_this_month': payments['total_paid_this_month'] or 0,
+        'total_paid_all_time': payments['total_paid_all_time'] or 0,
+        'workers_with_pending': pending['workers'],
+        'payments_this_month': payments['payments_this_month']
+    }
+
+
+def get_salary_summary(year, month):
+    """compute_salary_summary(), served from the cache while no balance or payment has changed"""
+    timeout = get_cache_seconds()
+    if not timeout:
+        return compute_salary_summary(year, month)
+    
+    version = cache.get_or_set(VERSION_KEY, lambda: uuid.uuid4().hex, timeout=None)
+    key = f'salaries:summary:{version}:{year}-{month:02d}'
+    summary = cache.get(key)
+    if summary is None:
+        summary = compute_salary_summary(year, month)
+        cache.set(key, summary, timeout)
+    return summary
+
+
+def invalidate_salary_summary():
+    """Retire every cached summary once the current transaction commits"""
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None))
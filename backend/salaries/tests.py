@@ -0,0 +1,342 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Max, Sum
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from authentication.models import User
+from events.models import ChangeEvent
+from products.models import Product
+from tasks.models import Task
+from workers.models import Worker
+from .models import SalaryPayment, WorkerBalance, WorkerDailyEarnings
+from .serializers import SalaryPaymentCreateSerializer
+from .payroll import run_payroll
+
+
+class PayrollRunEventTests(TestCase):
+    """Payroll payments are bulk inserted, so the run itself must publish them to the event stream"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='payroller', password='unused-password', role='admin')
+        self.workers = [
+            Worker.objects.create(name=f'Washer {index}', phone_number='0700000000', id_number=f'PAY-{index:04d}')
+            for index in range(3)
+        ]
+        for worker in self.workers:
+            Task.objects.create(worker=worker, task_type='daily_salary', salary=Decimal('150.00'), date=date.today())
+
+    def test_payroll_run_publishes_salary_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            run, created = run_payroll(self.admin, 'payroll-events', date.today())
+
+        self.assertTrue(created)
+        payments = {str(payment.id): payment for payment in SalaryPayment.objects.filter(payroll_run=run)}
+        events = ChangeEvent.objects.filter(topic='salaries')
+        self.assertEqual(len(payments), 3)
+        self.assertEqual(events.count(), 3)
+        for payload in events.values_list('payload', flat=True):
+            payment = payments[payload['payment_id']]
+            self.assertEqual(payload['action'], 'created')
+            self.assertEqual(Decimal(str(payload['amount'])), payment.amount)
+
+    def test_replayed_run_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            run_payroll(self.admin, 'payroll-replay', date.today())
+        with self.captureOnCommitCallbacks(execute=True):
+            run, created = run_payroll(self.admin, 'payroll-replay', date.today())
+
+        self.assertFalse(created)
+        self.assertEqual(ChangeEvent.objects.filter(topic='salaries').count(), 3)
+
+
+class WorkerDailyEarningsTests(TestCase):
+    """WorkerDailyEarnings always equals a recompute from completed tasks"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='earnings', password='unused-password', role='admin'))
+        self.product = Product.objects.create(name='Bottle', purchase_price=Decimal('5.00'), wash_price=Decimal('2.00'))
+        self.workers = [
+            Worker.objects.create(name=f'Washer {index}', phone_number='0700000000', id_number=f'EARN-{index:04d}')
+            for index in range(2)
+        ]
+
+    def wash(self, worker, assigned, washed=0, day=0):
+        return Task.objects.create(
+            worker=worker, product=self.product, assigned_quantity=assigned, washed_quantity=washed,
+            salary=Decimal('60.00'), deduction=Decimal('10.00'), date=date.today() - timedelta(days=day)
+        )
+
+    def assertEarningsMatchTasks(self):
+        self.assertEqual(WorkerDailyEarnings.rebuild(dry_run=True), [])
+
+    def test_tasks_reaching_and_leaving_completed(self):
+        task = self.wash(self.workers[0], 20)
+        self.wash(self.workers[0], 10, washed=10)
+        self.wash(self.workers[1], 10, washed=10, day=1)
+        Task.objects.create(worker=self.workers[1], task_type='daily_salary', salary=Decimal('300.00'), date=date.today())
+        self.assertEarningsMatchTasks()
+        self.assertEqual(WorkerDailyEarnings.objects.get(worker=self.workers[0]).completed_count, 1)
+
+        task.washed_quantity = 20
+        task.save()
+        task.salary = Decimal('75.00')
+        task.save()
+        self.assertEarningsMatchTasks()
+        row = WorkerDailyEarnings.objects.get(worker=self.workers[0])
+        self.assertEqual((row.completed_count, row.washed_quantity, row.net_pay), (2, 30, Decimal('115.00')))
+
+        # Lowering the washed quantity takes the task out of Completed again
+        task.washed_quantity = 5
+        task.save()
+        self.assertEarningsMatchTasks()
+        Task.objects.filter(worker=self.workers[1], task_type='washing').get().delete()
+        self.assertEarningsMatchTasks()
+        self.assertEqual(WorkerDailyEarnings.objects.filter(worker=self.workers[1]).count(), 1)
+
+    def test_bulk_progress(self):
+        tasks = [self.wash(worker, 10) for worker in self.workers for _ in range(2)]
+        response = self.client.put('/api/tasks/bulk/progress/', {'tasks': [
+            {'id': str(task.id), 'washed_quantity': 10, 'deduction': '15.00'} for task in tasks[1:]
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEarningsMatchTasks()
+        self.assertEqual(
+            sorted(WorkerDailyEarnings.objects.values_list('completed_count', flat=True)), [1, 2]
+        )
+
+
+class PendingSalaryTests(TestCase):
+    """GET /api/salaries/pending/ is one query however many workers it lists, with each worker's own totals"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='pending', password='unused-password', role='admin'))
+        self.count = 0
+
+    def add_workers(self, count):
+        for _ in range(count):
+            index = self.count = self.count + 1
+            worker = Worker.objects.create(name=f'Washer {index:03d}', phone_number='0700000000', id_number=f'PEND-{index:04d}')
+            for day in range(index % 3 + 1):
+                Task.objects.create(worker=worker, task_type='daily_salary', salary=Decimal(100 + index), date=date.today() - timedelta(days=day))
+            if index % 2:
+                SalaryPayment.objects.create(worker=worker, amount=Decimal(50 + index), date=date.today() - timedelta(days=index))
+
+    def get_pending(self, params=None):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/salaries/pending/', params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_query_count_is_constant(self):
+        self.add_workers(1)
+        self.assertEqual(len(self.get_pending()), 1)
+        self.add_workers(20)
+        self.assertEqual(len(self.get_pending()), 21)
+        # Page count query plus the page itself
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/salaries/pending/', {'page_size': 5, 'page': 2})
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_totals_match_each_worker(self):
+        self.add_workers(6)
+        # A fully paid worker only appears with include_zero
+        paid_up = Worker.objects.create(name='Paid Up', phone_number='0700000000', id_number='PEND-PAID')
+        Task.objects.create(worker=paid_up, task_type='daily_salary', salary=Decimal('80.00'), date=date.today())
+        SalaryPayment.objects.create(worker=paid_up, amount=Decimal('80.00'), date=date.today())
+
+        rows = self.get_pending({'include_zero': 'true'})
+        self.assertEqual(len(rows), 7)
+        for row in rows:
+            worker = Worker.objects.get(pk=row['worker_id'])
+            earned = worker.tasks.filter(status='Completed').aggregate(total=Sum('net_pay'))['total'] or 0
+            paid = worker.salary_payments.aggregate(total=Sum('amount'), last=Max('date'))
+            self.assertEqual(Decimal(row['total_earned']), earned, worker.name)
+            self.assertEqual(Decimal(row['total_paid']), paid['total'] or 0, worker.name)
+            self.assertEqual(Decimal(row['pending_salary']), max(earned - (paid['total'] or 0), 0), worker.name)
+            self.assertEqual(row['last_payment_date'], paid['last'] and paid['last'].isoformat())
+
+        pending = [Decimal(row['pending_salary']) for row in self.get_pending()]
+        self.assertEqual(len(pending), 6)
+        self.assertEqual(pending, sorted(pending, reverse=True))
+
+
+class WorkerBalanceTests(TestCase):
+    """WorkerBalance always equals a recompute from completed tasks and payments"""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Bottle', purchase_price=Decimal('5.00'), wash_price=Decimal('2.00'))
+        self.workers = [
+            Worker.objects.create(name=f'Washer {index}', phone_number='0700000000', id_number=f'BAL-{index:04d}')
+            for index in range(2)
+        ]
+
+    def assertBalance(self, worker, earned, paid):
+        self.assertEqual(WorkerBalance.rebuild(dry_run=True), [])
+        balance = WorkerBalance.objects.get(worker=worker)
+        self.assertEqual((balance.total_earned, balance.total_paid), (Decimal(earned), Decimal(paid)))
+        self.assertEqual(Worker.objects.get(pk=worker.pk).pending_salary, max(Decimal(earned) - Decimal(paid), 0))
+
+    def test_task_writes(self):
+        worker = self.workers[0]
+        task = Task.objects.create(
+            worker=worker, product=self.product, assigned_quantity=10, salary=Decimal('90.00'),
+            deduction=Decimal('10.00'), date=date.today()
+        )
+        Task.objects.create(worker=worker, task_type='daily_salary', salary=Decimal('300.00'), date=date.today())
+        self.assertBalance(worker, '300.00', '0')
+
+        task.washed_quantity = 10
+        task.save()
+        self.assertBalance(worker, '380.00', '0')
+        task.deduction = Decimal('30.00')
+        task.save()
+        self.assertBalance(worker, '360.00', '0')
+        task.washed_quantity = 4
+        task.save()
+        self.assertBalance(worker, '300.00', '0')
+        Task.objects.get(task_type='daily_salary').delete()
+        self.assertBalance(worker, '0', '0')
+
+    def test_payment_writes(self):
+        first, second = self.workers
+        for worker in self.workers:
+            Task.objects.create(worker=worker, task_type='daily_salary', salary=Decimal('500.00'), date=date.today())
+        payment = SalaryPayment.objects.create(worker=first, amount=Decimal('200.00'), date=date.today())
+        self.assertBalance(first, '500.00', '200.00')
+
+        payment.amount = Decimal('250.00')
+        payment.save()
+        self.assertBalance(first, '500.00', '250.00')
+
+        # Moving a payment to another worker takes it off the first
+        payment = SalaryPayment.objects.get(pk=payment.pk)
+        payment.worker = second
+        payment.save()
+        self.assertBalance(first, '500.00', '0')
+        self.assertBalance(second, '500.00', '250.00')
+
+        payment.delete()
+        self.assertBalance(second, '500.00', '0')
+
+    def test_rebuild_repairs_drift(self):
+        Task.objects.create(worker=self.workers[0], task_type='daily_salary', salary=Decimal('120.00'), date=date.today())
+        WorkerBalance.objects.filter(worker=self.workers[0]).update(total_earned=Decimal('7.00'), pending=Decimal('7.00'))
+
+        mismatches = WorkerBalance.rebuild()
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual(mismatches[0][0], self.workers[0].id)
+        self.assertBalance(self.workers[0], '120.00', '0')
+
+
+class PayrollRunIdempotencyTests(TestCase):
+    """POST /api/salaries/runs/ with a key that was already used returns the original run and pays nothing"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='idempotent', password='unused-password', role='admin'))
+        for index in range(3):
+            worker = Worker.objects.create(name=f'Washer {index}', phone_number='0700000000', id_number=f'IDEM-{index:04d}')
+            Task.objects.create(worker=worker, task_type='daily_salary', salary=Decimal('200.00'), date=date.today())
+
+    def test_repeated_key_returns_same_run(self):
+        response = self.client.post('/api/salaries/runs/', {'idempotency_key': 'payday-1'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        run_id = response.data['run']['id']
+        self.assertEqual(SalaryPayment.objects.count(), 3)
+
+        # New earnings since the first run must not be paid by a retry
+        Task.objects.create(worker=Worker.objects.first(), task_type='daily_salary', salary=Decimal('50.00'), date=date.today())
+        response = self.client.post('/api/salaries/runs/', {}, format='json', HTTP_IDEMPOTENCY_KEY='payday-1')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['run']['id'], run_id)
+        self.assertEqual(len(response.data['payments']), 3)
+        self.assertEqual(SalaryPayment.objects.count(), 3)
+        self.assertEqual(WorkerBalance.rebuild(dry_run=True), [])
+
+        response = self.client.post('/api/salaries/runs/', {'idempotency_key': 'payday-2'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNotEqual(response.data['run']['id'], run_id)
+        self.assertEqual(SalaryPayment.objects.count(), 4)
+
+
+class SalaryPaymentTests(TestCase):
+    """Payments re-check the pending salary under the worker's balance lock, so they never exceed it"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='payer', password='unused-password', role='admin'))
+        self.worker = Worker.objects.create(name='Washer', phone_number='0700000000', id_number='PAYLOCK-0001')
+        Task.objects.create(worker=self.worker, task_type='daily_salary', salary=Decimal('100.00'), date=date.today())
+
+    def pay(self, amount):
+        return self.client.post('/api/salaries/payments/', {
+            'worker': str(self.worker.id), 'amount': amount, 'date': date.today().isoformat()
+        }, format='json')
+
+    def test_payment_limited_to_pending_salary(self):
+        self.assertEqual(self.pay('60.00').status_code, 201)
+        response = self.pay('40.01')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.pay('40.00').status_code, 201)
+        self.assertEqual(self.worker.balance.pending, 0)
+        self.assertEqual(WorkerBalance.rebuild(dry_run=True), [])
+
+    def test_pending_salary_rechecked_when_saving(self):
+        # Validated against the pending salary, then a concurrent payment takes most of it
+        serializer = SalaryPaymentCreateSerializer(data={'worker': self.worker.id, 'amount': '70.00', 'date': date.today()})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        SalaryPayment.objects.create(worker=self.worker, amount=Decimal('50.00'), date=date.today())
+
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.assertEqual(SalaryPayment.objects.count(), 1)
+        self.assertEqual(WorkerBalance.objects.get(worker=self.worker).total_paid, Decimal('50.00'))
+
+
+class SalarySummaryCacheTests(TestCase):
+    """The cached salary summary is replaced whenever a payment, balance or worker changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='summary', password='unused-password', role='admin'))
+        self.today = date.today()
+        self.worker = Worker.objects.create(name='Folder', phone_number='0700000000', id_number='SUMMARY-0001')
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(worker=self.worker, task_type='daily_salary', salary=Decimal('100.00'), date=self.today)
+
+    def summary(self):
+        response = self.client.get('/api/salaries/summary/', {'year': self.today.year, 'month': self.today.month})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_summary_served_from_cache(self):
+        first = self.summary()
+        self.assertEqual(Decimal(first['total_pending']), Decimal('100.00'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.summary(), first)
+
+    def test_writes_invalidate_summary(self):
+        self.summary()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SalaryPayment.objects.create(worker=self.worker, amount=Decimal('30.00'), date=self.today)
+        summary = self.summary()
+        self.assertEqual(Decimal(summary['total_pending']), Decimal('70.00'))
+        self.assertEqual(Decimal(summary['total_paid_this_month']), Decimal('30.00'))
+        self.assertEqual(summary['payments_this_month'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(worker=self.worker, task_type='daily_salary', salary=Decimal('20.00'), date=self.today)
+        self.assertEqual(Decimal(self.summary()['total_pending']), Decimal('90.00'))
+
+        self.worker.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.worker.save()
+        summary = self.summary()
+        self.assertEqual(Decimal(summary['total_pending']), 0)
+        self.assertEqual(summary['workers_with_pending'], 0)
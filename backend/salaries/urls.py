@@ -4,6 +4,10 @@ from . import views
 urlpatterns = [
     path('pending/', views.pending_salaries, name='pending_salaries'),
     path('payments/', views.salary_payments, name='salary_payments'),
+    path('runs/', views.payroll_runs, name='payroll_runs'),
+    path('runs/<uuid:run_id>/', views.payroll_run_detail, name='payroll_run_detail'),
+    path('runs/<uuid:run_id>/report/', views.payroll_run_report, name='payroll_run_report'),
+    path('earnings/', views.earnings_report, name='earnings_report'),
     path('worker/<uuid:worker_id>/', views.worker_salary_history, name='worker_salary_history'),
     path('summary/', views.salary_summary, name='salary_summary'),
 ]
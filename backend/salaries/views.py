@@ -2,17 +2,24 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.db.models import Sum, Count
 from django.utils import timezone
-from datetime import datetime
+from datetime import datetime, timedelta
+import csv
+from bottleflow.pagination import OptInPageNumberPagination
 from workers.models import Worker
-from tasks.models import Task
-from .models import SalaryPayment
+from .models import PayrollRun, SalaryPayment, WorkerDailyEarnings
 from .serializers import (
     SalaryPaymentSerializer, SalaryPaymentCreateSerializer,
-    PendingSalarySerializer, SalarySummarySerializer
+    PendingSalarySerializer, SalarySummarySerializer,
+    WorkerDailyEarningsSerializer, EarningsReportSerializer,
+    PayrollRunSerializer, PayrollRunCreateSerializer
 )
+from .pending import pending_salaries_queryset, ORDERING_FIELDS as PENDING_ORDERING_FIELDS
+from .payroll import run_payroll
+from .summary import get_salary_summary
 from audit.utils import log_audit
 
 @api_view(['GET'])
@@ -20,42 +27,24 @@ from audit.utils import log_audit
 def pending_salaries(request):
     """Get list of all workers with their pending salaries"""
     
-    workers = Worker.objects.filter(is_active=True)
-    pending_data = []
+    # Sort by pending salary (highest first) unless specified, e.g. ordering=worker_name
+    ordering = request.query_params.get('ordering')
+    if ordering and ordering.lstrip('-') not in PENDING_ORDERING_FIELDS:
+        return Response({'error': f'Invalid ordering. Choose from: {", ".join(PENDING_ORDERING_FIELDS)}'}, status=status.HTTP_400_BAD_REQUEST)
     
-    for worker in workers:
-        # Calculate total earned from completed tasks
-        total_earned = Task.objects.filter(
-            worker=worker,
-            status='Completed'
-        ).aggregate(total=Sum('net_pay'))['total'] or 0
-        
-        # Calculate total paid
-        total_paid = SalaryPayment.objects.filter(
-            worker=worker
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        pending_salary = max(0, total_earned - total_paid)
-        
-        # Get last payment date
-        last_payment = SalaryPayment.objects.filter(worker=worker).order_by('-date').first()
-        last_payment_date = last_payment.date if last_payment else None
-        
-        if pending_salary > 0 or request.query_params.get('include_zero') == 'true':
-            pending_data.append({
-                'worker_id': worker.id,
-                'worker_name': worker.name,
-                'worker_role': worker.role,
-                'pending_salary': pending_salary,
-                'total_earned': total_earned,
-                'total_paid': total_paid,
-                'last_payment_date': last_payment_date
-            })
-    
-    # Sort by pending salary (highest first)
-    pending_data.sort(key=lambda x: x['pending_salary'], reverse=True)
-    
-    serializer = PendingSalarySerializer(pending_data, many=True)
+    pending = pending_salaries_queryset(
+        include_zero=request.query_params.get('include_zero') == 'true',
+        role=request.query_params.get('role'),
+        search=request.query_params.get('search'),
+        ordering=ordering
+    )
+    
+    if OptInPageNumberPagination.is_requested(request):
+        paginator = OptInPageNumberPagination()
+        page = paginator.paginate_queryset(pending, request)
+        return paginator.get_paginated_response(PendingSalarySerializer(page, many=True).data)
+    
+    serializer = PendingSalarySerializer(pending, many=True)
     return Response(serializer.data)
 
 @api_view(['GET', 'POST'])
@@ -99,17 +88,96 @@ def salary_payments(request):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def payroll_runs(request):
+    """List payroll runs or pay every worker's pending salary in one run"""
+    
+    if request.method == 'GET':
+        runs = PayrollRun.objects.select_related('created_by')
+        serializer = PayrollRunSerializer(runs, many=True)
+        return Response(serializer.data)
+    
+    # The idempotency key may also come from the Idempotency-Key header
+    data = request.data.copy()
+    if not data.get('idempotency_key') and request.headers.get('Idempotency-Key'):
+        data['idempotency_key'] = request.headers['Idempotency-Key']
+    
+    serializer = PayrollRunCreateSerializer(data=data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    options = serializer.validated_data
+    run, created = run_payroll(
+        user=request.user,
+        idempotency_key=options['idempotency_key'],
+        date=options.get('date') or timezone.now().date(),
+        payment_method=options['payment_method'],
+        role=options.get('role') or None,
+        max_amount=options.get('max_amount'),
+        worker_ids=options.get('worker_ids'),
+        notes=options.get('notes') or None
+    )
+    
+    # A repeated key returns the original run instead of paying again
+    return Response(payroll_run_data(run), status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payroll_run_detail(request, run_id):
+    """Get a payroll run with its payments"""
+    
+    run = get_object_or_404(PayrollRun.objects.select_related('created_by'), id=run_id)
+    return Response(payroll_run_data(run))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payroll_run_report(request, run_id):
+    """Download a payroll run's payments as CSV"""
+    
+    run = get_object_or_404(PayrollRun, id=run_id)
+    payments = run.payments.order_by('worker__name').values_list(
+        'worker_id', 'worker__name', 'worker__role', 'worker__id_number', 'amount', 'payment_method', 'date'
+    )
+    
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="payroll_run_{run.date}_{str(run.id)[:8]}.csv"'
+    writer = csv.writer(response)
+    writer.writerow(['worker_id', 'worker_name', 'role', 'id_number', 'amount', 'payment_method', 'date'])
+    writer.writerows(payments)
+    writer.writerow([])
+    writer.writerow(['total', '', '', '', run.total_amount, '', ''])
+    return response
+
+def payroll_run_data(run):
+    """Response body for a payroll run: the run and its payments"""
+    payments = run.payments.select_related('worker').order_by('worker__name')
+    return {
+        'run': PayrollRunSerializer(run).data,
+        'payments': SalaryPaymentSerializer(payments, many=True).data
+    }
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def worker_salary_history(request, worker_id):
     """Get salary payment history for a specific worker"""
     
-    worker = get_object_or_404(Worker, id=worker_id)
+    worker = get_object_or_404(Worker.objects.select_related('balance'), id=worker_id)
     payments = SalaryPayment.objects.filter(worker=worker)
     
+    # Daily earnings over a date range (last 30 days by default)
+    dates, error = parse_date_range(request)
+    if error:
+        return error
+    end_date = dates.get('end_date') or timezone.now().date()
+    start_date = dates.get('start_date') or end_date - timedelta(days=30)
+    daily_earnings = WorkerDailyEarnings.objects.filter(
+        worker=worker, date__gte=start_date, date__lte=end_date
+    ).order_by('-date')
+    
     # Get worker's task summary
-    tasks_summary = Task.objects.filter(worker=worker, status='Completed').aggregate(
-        total_tasks=Count('id'),
+    tasks_summary = WorkerDailyEarnings.objects.filter(worker=worker).aggregate(
+        total_tasks=Sum('completed_count'),
         total_earned=Sum('net_pay')
     )
     
@@ -134,50 +202,83 @@ def worker_salary_history(request, worker_id):
             'total_amount_paid': payments_summary['total_paid'] or 0,
             'pending_salary': worker.pending_salary
         },
+        'daily_earnings': WorkerDailyEarningsSerializer(daily_earnings, many=True).data,
         'payments': serializer.data
     })
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def salary_summary(request):
-    """Get salary summary statistics"""
+def earnings_report(request):
+    """Payroll report: completed work and pay per worker or per day over a date range"""
     
-    from django.db.models import Count
+    dates, error = parse_date_range(request)
+    if error:
+        return error
     
-    # Get current month and year
-    now = timezone.now()
-    current_month = now.month
-    current_year = now.year
-    
-    # Calculate total pending salaries
-    workers = Worker.objects.filter(is_active=True)
-    total_pending = sum(worker.pending_salary for worker in workers)
-    workers_with_pending = sum(1 for worker in workers if worker.pending_salary > 0)
-    
-    # Calculate payments this month
-    payments_this_month = SalaryPayment.objects.filter(
-        date__month=current_month,
-        date__year=current_year
-    )
+    earnings = WorkerDailyEarnings.objects.all()
+    if 'start_date' in dates:
+        earnings = earnings.filter(date__gte=dates['start_date'])
+    if 'end_date' in dates:
+        earnings = earnings.filter(date__lte=dates['end_date'])
     
-    total_paid_this_month = payments_this_month.aggregate(
-        total=Sum('amount')
-    )['total'] or 0
+    # Filter by worker if specified
+    worker_id = request.query_params.get('worker_id')
+    if worker_id:
+        earnings = earnings.filter(worker_id=worker_id)
     
-    payments_count_this_month = payments_this_month.count()
+    group_by = request.query_params.get('group_by', 'worker')
+    if group_by == 'worker':
+        group_fields, ordering = ('worker_id', 'worker__name'), 'worker__name'
+    elif group_by == 'day':
+        group_fields, ordering = ('date',), '-date'
+    else:
+        return Response({'error': 'Invalid group_by. Choose from: worker, day'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Calculate total paid all time
-    total_paid_all_time = SalaryPayment.objects.aggregate(
-        total=Sum('amount')
-    )['total'] or 0
+    rows = list(earnings.order_by().values(*group_fields).annotate(
+        completed_count=Sum('completed_count'),
+        washed_quantity=Sum('washed_quantity'),
+        salary=Sum('salary'),
+        deduction=Sum('deduction'),
+        net_pay=Sum('net_pay')
+    ).order_by(ordering))
+    for row in rows:
+        if 'worker__name' in row:
+            row['worker_name'] = row.pop('worker__name')
     
-    summary_data = {
-        'total_pending': total_pending,
-        'total_paid_this_month': total_paid_this_month,
-        'total_paid_all_time': total_paid_all_time,
-        'workers_with_pending': workers_with_pending,
-        'payments_this_month': payments_count_this_month
-    }
+    serializer = EarningsReportSerializer(rows, many=True)
+    return Response({
+        'start_date': dates.get('start_date'),
+        'end_date': dates.get('end_date'),
+        'group_by': group_by,
+        'results': serializer.data
+    })
+
+def parse_date_range(request):
+    """Read optional start_date / end_date (YYYY-MM-DD) into ({name: date}, error response)"""
+    dates = {}
+    for param in ('start_date', 'end_date'):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                dates[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return None, Response({'error': f'Invalid {param} format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+    return dates, None
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def salary_summary(request):
+    """Get salary summary statistics"""
+    
+    # Monthly figures for ?year=&month= (current month by default)
+    now = timezone.now()
+    try:
+        year = int(request.query_params.get('year', now.year))
+        month = int(request.query_params.get('month', now.month))
+    except ValueError:
+        return Response({'error': 'year and month must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= month <= 12 or not 1 <= year <= 9998:
+        return Response({'error': 'Invalid year or month'}, status=status.HTTP_400_BAD_REQUEST)
     
-    serializer = SalarySummarySerializer(summary_data)
+    serializer = SalarySummarySerializer(get_salary_summary(year, month))
     return Response(serializer.data)
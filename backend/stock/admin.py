@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import StockMovement, StockSale
+from .models import (
+    StockMovement, StockSale, StockBalance, StockSnapshot, StockArchiveRun, ArchivedStockMovement,
+    StockValuation, CostLayer
+)
 
 @admin.register(StockMovement)
 class StockMovementAdmin(admin.ModelAdmin):
@@ -20,3 +23,59 @@ class StockSaleAdmin(admin.ModelAdmin):
     search_fields = ['product__name', 'customer_name']
     ordering = ['-date', '-created_at']
     readonly_fields = ['id', 'total_amount', 'created_at']
+
+
+@admin.register(StockBalance)
+class StockBalanceAdmin(admin.ModelAdmin):
+    """Admin configuration for StockBalance model"""
+    
+    list_display = ['product', 'raw', 'in_washing', 'washed', 'updated_at']
+    search_fields = ['product__name']
+    readonly_fields = ['product', 'raw', 'in_washing', 'washed', 'updated_at']
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    """Admin configuration for StockSnapshot model"""
+    
+    list_display = ['product', 'taken_at', 'raw', 'in_washing', 'washed']
+    list_filter = ['taken_at', 'product']
+    search_fields = ['product__name']
+    ordering = ['-taken_at']
+    readonly_fields = ['id', 'product', 'taken_at', 'raw', 'in_washing', 'washed', 'created_at']
+
+@admin.register(StockArchiveRun)
+class StockArchiveRunAdmin(admin.ModelAdmin):
+    """Admin configuration for StockArchiveRun model"""
+    
+    list_display = ['cutoff', 'status', 'archived_count', 'carried_forward_count', 'triggered_by', 'created_at', 'finished_at']
+    list_filter = ['status']
+    ordering = ['-created_at']
+    readonly_fields = ['id', 'cutoff', 'status', 'archived_count', 'carried_forward_count', 'error', 'triggered_by', 'created_at', 'finished_at']
+
+@admin.register(ArchivedStockMovement)
+class ArchivedStockMovementAdmin(admin.ModelAdmin):
+    """Admin configuration for ArchivedStockMovement model"""
+    
+    list_display = ['product', 'type', 'quantity', 'reference_id', 'period', 'created_at']
+    list_filter = ['type', 'period', 'product']
+    search_fields = ['product__name', 'reference_id', 'notes']
+    ordering = ['-created_at']
+    readonly_fields = [field.name for field in ArchivedStockMovement._meta.fields]
+
+@admin.register(StockValuation)
+class StockValuationAdmin(admin.ModelAdmin):
+    """Admin configuration for StockValuation model"""
+    
+    list_display = ['product', 'fifo_raw_value', 'fifo_in_washing_value', 'fifo_washed_value', 'average_raw_value', 'average_in_washing_value', 'average_washed_value', 'updated_at']
+    search_fields = ['product__name']
+    readonly_fields = [field.name for field in StockValuation._meta.fields]
+
+@admin.register(CostLayer)
+class CostLayerAdmin(admin.ModelAdmin):
+    """Admin configuration for CostLayer model"""
+    
+    list_display = ['product', 'stage', 'unit_cost', 'quantity', 'remaining', 'source_type', 'created_at']
+    list_filter = ['stage', 'product']
+    search_fields = ['product__name']
+    ordering = ['created_at']
+    readonly_fields = [field.name for field in CostLayer._meta.fields]
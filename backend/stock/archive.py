@@ -0,0 +1,127 @@
+"""
+Ledger compaction and cold-storage archival.
+
+Movements older than a horizon are copied to the stock_movements_archive
+table (partitioned by month) and removed from the hot ledger. Everything
+that was archived, plus the previous run's carry-forward rows, is replaced
+by signed opening-balance rows dated at the cutoff - one per product and
+stock bucket, keyed by the product - so balances, overview aggregates and
+rebuilds are unchanged while the hot table stays bounded.
+
+Movements of washing tasks that are not yet completed stay hot, because the
+task can still post changes to them.
+"""
+import threading
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from tasks.models import Task
+from .models import ArchivedStockMovement, StockArchiveRun, StockMovement, ledger_totals
+from .snapshots import take_snapshot
+
+OPENING_TYPES = ('opening_raw', 'opening_in_washing', 'opening_washed')
+
+
+def archive_cutoff(now=None, horizon_days=None):
+    """Start of the month containing `now - horizon`, so whole months are archived"""
+    horizon_days = horizon_days if horizon_days is not None else getattr(settings, 'STOCK_ARCHIVE_HORIZON_DAYS', 365)
+    moment = (now or timezone.now()) - timedelta(days=horizon_days)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def archivable_movements(cutoff):
+    """Hot movements recorded before `cutoff` whose source can no longer change them"""
+    open_tasks = Task.objects.filter(task_type='washing').exclude(status='Completed').values('id')
+    return StockMovement.objects.filter(created_at__lt=cutoff).exclude(
+        source_type='task', source_id__in=open_tasks
+    )
+
+
+def run_archive(run, chunk_size=2000):
+    """
+    Execute an archive run: snapshot, copy, delete and carry forward in one transaction.
+
+    The run row is updated with the outcome; exceptions are recorded and re-raised.
+    """
+    cutoff = run.cutoff
+    StockArchiveRun.objects.filter(pk=run.pk).update(status='running')
+
+    try:
+        # A snapshot at the cutoff keeps as-of queries exact once history moves out
+        take_snapshot(cutoff)
+
+        with transaction.atomic():
+            movements = archivable_movements(cutoff)
+            totals = ledger_totals(movements)
+
+            archived_count = 0
+            batch = []
+            for movement in movements.exclude(source_type='carry_forward').order_by('created_at', 'id').iterator(chunk_size=chunk_size):
+                batch.append(ArchivedStockMovement(
+                    id=movement.id,
+                    product_id=movement.product_id,
+                    type=movement.type,
+                    quantity=movement.quantity,
+                    reference_id=movement.reference_id,
+                    source_type=movement.source_type,
+                    source_id=movement.source_id,
+                    notes=movement.notes,
+                    created_at=movement.created_at,
+                    period=movement.created_at.date().replace(day=1),
+                    archive_run_id=run.pk
+                ))
+                if len(batch) >= chunk_size:
+                    ArchivedStockMovement.objects.bulk_create(batch)
+                    archived_count += len(batch)
+                    batch = []
+            ArchivedStockMovement.objects.bulk_create(batch)
+            archived_count += len(batch)
+
+            # Balances are not touched: the carry-forward rows net to exactly what is removed
+            movements.delete()
+
+            carry_forward = [
+                StockMovement(
+                    product_id=product_id,
+                    type=movement_type,
+                    quantity=quantity,
+                    source_type='carry_forward',
+                    source_id=product_id,
+                    notes=f'Opening balance carried forward from movements before {cutoff:%Y-%m-%d}'
+                )
+                for product_id, levels in totals.items()
+                for movement_type, quantity in zip(OPENING_TYPES, levels)
+                if quantity
+            ]
+            StockMovement.objects.bulk_create(carry_forward)
+            # created_at is auto_now_add, so date the rows at the cutoff afterwards
+            StockMovement.objects.filter(source_type='carry_forward', source_id__in=totals.keys()).update(created_at=cutoff)
+
+            StockArchiveRun.objects.filter(pk=run.pk).update(
+                status='completed',
+                archived_count=archived_count,
+                carried_forward_count=len(carry_forward),
+                finished_at=timezone.now()
+            )
+    except Exception as e:
+        StockArchiveRun.objects.filter(pk=run.pk).update(status='failed', error=str(e), finished_at=timezone.now())
+        raise
+
+    run.refresh_from_db()
+    return run
+
+
+def start_archive_job(run):
+    """Run an archive in a background thread so the triggering request returns immediately"""
+    def target():
+        try:
+            run_archive(run)
+        except Exception:
+            pass  # Outcome is recorded on the run row
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=target, name=f'stock-archive-{run.pk}', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from stock.archive import archive_cutoff, run_archive
+from stock.models import StockArchiveRun, StockMovement
+
+class Command(BaseCommand):
+    help = 'Move stock movements older than the archive horizon to the archive table and carry balances forward'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            help='Archive horizon in days (defaults to STOCK_ARCHIVE_HORIZON_DAYS)')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(horizon_days=options['older_than_days'])
+        self.stdout.write(f'🗄️  Archiving stock movements recorded before {cutoff:%Y-%m-%d}...')
+
+        run = StockArchiveRun.objects.create(cutoff=cutoff)
+        try:
+            run = run_archive(run)
+        except Exception as e:
+            raise CommandError(f'❌ Archive failed: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Archived {run.archived_count} movement(s), wrote {run.carried_forward_count} carry-forward row(s); '
+            f'{StockMovement.objects.count()} movement(s) remain in the ledger'
+        ))
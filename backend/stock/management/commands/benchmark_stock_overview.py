@@ -0,0 +1,83 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from products.models import Product
+from stock.models import StockMovement
+from stock.overview import stock_overview_rows
+
+class _Rollback(Exception):
+    """Raised to discard the synthetic benchmark data"""
+
+def legacy_overview():
+    """Per-product Python ledger scan, as stock_overview worked before the aggregate engine"""
+    rows = []
+    for product in Product.objects.all():
+        raw_stock = 0
+        washed_stock = 0
+        for movement in StockMovement.objects.filter(product=product):
+            if movement.type == 'purchase':
+                raw_stock += abs(movement.quantity)
+            elif movement.type in ('sell_raw', 'assign_wash'):
+                raw_stock -= abs(movement.quantity)
+            elif movement.type == 'sell_washed':
+                washed_stock -= abs(movement.quantity)
+            elif movement.type == 'complete_wash':
+                washed_stock += abs(movement.quantity)
+        rows.append((product.id, max(0, raw_stock), max(0, washed_stock)))
+    return rows
+
+class Command(BaseCommand):
+    help = 'Compare the aggregate stock overview with the per-product Python loop on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100, help='Number of synthetic products')
+        parser.add_argument('--movements', type=int, default=1_000_000, help='Number of synthetic stock movements')
+        parser.add_argument('--runs', type=int, default=3, help='Timed runs per implementation')
+        parser.add_argument('--skip-legacy', action='store_true', help='Only time the aggregate engine')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🚀 Stock overview benchmark'))
+        self.stdout.write('=' * 40)
+
+        try:
+            with transaction.atomic():
+                self._seed(options['products'], options['movements'])
+                self._report('aggregate engine', lambda: stock_overview_rows(), options['runs'])
+                if not options['skip_legacy']:
+                    self._report('legacy python loop', legacy_overview, options['runs'])
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write('🧹 Synthetic data rolled back')
+
+    def _seed(self, product_count, movement_count, batch_size=20_000):
+        start = time.perf_counter()
+        products = Product.objects.bulk_create([
+            Product(name=f'Benchmark bottle {index}', purchase_price=5, wash_price=2)
+            for index in range(product_count)
+        ])
+        movement_types = ['purchase', 'purchase', 'assign_wash', 'complete_wash', 'sell_raw', 'sell_washed']
+
+        created = 0
+        while created < movement_count:
+            batch = []
+            for _ in range(min(batch_size, movement_count - created)):
+                movement_type = random.choice(movement_types)
+                quantity = random.randint(1, 50)
+                batch.append(StockMovement(
+                    product=random.choice(products),
+                    type=movement_type,
+                    quantity=-quantity if movement_type.startswith('sell') else quantity,
+                ))
+            StockMovement.objects.bulk_create(batch)
+            created += len(batch)
+
+        self.stdout.write(f'📦 Seeded {product_count} products / {movement_count} movements in {time.perf_counter() - start:.1f}s')
+
+    def _report(self, label, func, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(f'⏱️  {label}: best {min(timings) * 1000:.1f} ms, mean {sum(timings) / len(timings) * 1000:.1f} ms over {runs} run(s)')
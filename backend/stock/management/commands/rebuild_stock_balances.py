@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from stock.models import StockBalance
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized StockBalance rows from the StockMovement ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', action='append', dest='products',
+                            help='Product id to rebuild (repeatable, defaults to all products)')
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare stored balances with a full recompute, do not write')
+
+    def handle(self, *args, **options):
+        verify = options['verify']
+        mismatches = StockBalance.rebuild(product_ids=options['products'], dry_run=verify)
+
+        for product_id, stored, expected in mismatches:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {product_id}: stored {stored} != ledger {expected} (raw, in_washing, washed)')
+            )
+
+        if verify:
+            if mismatches:
+                self.stdout.write(self.style.ERROR(f'❌ {len(mismatches)} balance(s) out of sync with the ledger'))
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS('✅ All stock balances match the ledger'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt stock balances ({len(mismatches)} corrected)'))
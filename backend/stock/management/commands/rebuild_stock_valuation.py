@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from stock.valuation import rebuild_valuation
+
+class Command(BaseCommand):
+    help = 'Rebuild FIFO cost layers and moving-average valuations by replaying the stock ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', action='append', dest='products',
+                            help='Product id to rebuild (repeatable, defaults to all products)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('💰 Rebuilding stock valuation from the ledger...')
+        replayed = rebuild_valuation(product_ids=options['products'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Replayed {replayed} stock movement(s) into valuation'))
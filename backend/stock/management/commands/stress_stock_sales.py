@@ -0,0 +1,79 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework import serializers
+from products.models import Product
+from purchases.models import Purchase, PurchaseItem
+from stock.models import StockSale
+from stock.serializers import StockSaleCreateSerializer
+
+class Command(BaseCommand):
+    help = 'Fire concurrent stock sales at one product and check that nothing is oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=200, help='Raw units purchased before the run')
+        parser.add_argument('--sales', type=int, default=500, help='Number of sale attempts')
+        parser.add_argument('--quantity', type=int, default=1, help='Units per sale')
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent worker threads')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic product and its ledger')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🚀 Concurrent stock sale stress test'))
+        self.stdout.write('=' * 40)
+
+        product = Product.objects.create(name='Stress test bottle', purchase_price=5, wash_price=2)
+        purchase = Purchase.objects.create(total_cost=options['stock'], date=date.today())
+        PurchaseItem.objects.create(purchase=purchase, product=product, quantity=options['stock'], cost=options['stock'])
+
+        results = {'sold': 0, 'rejected': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def sell(_):
+            outcome = 'sold'
+            try:
+                serializer = StockSaleCreateSerializer(data={
+                    'product': product.id,
+                    'sale_type': 'raw',
+                    'quantity': options['quantity'],
+                    'price_per_unit': '1.00',
+                    'date': date.today().isoformat(),
+                })
+                if serializer.is_valid():
+                    serializer.save()
+                else:
+                    outcome = 'rejected'
+            except serializers.ValidationError:
+                outcome = 'rejected'
+            except Exception as e:
+                outcome = 'errors'
+                self.stderr.write(f'❌ {e}')
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            list(executor.map(sell, range(options['sales'])))
+        elapsed = time.perf_counter() - start
+
+        sold_units = sum(StockSale.objects.filter(product=product).values_list('quantity', flat=True))
+        product.refresh_from_db()
+        remaining = product.current_stock['raw']
+        oversold = max(0, sold_units - options['stock'])
+
+        self.stdout.write(f'⏱️  {options["sales"]} attempts on {options["threads"]} threads in {elapsed:.2f}s '
+                          f'({options["sales"] / elapsed:.0f} sales/s)')
+        self.stdout.write(f'📦 sold {results["sold"]}, rejected {results["rejected"]}, errors {results["errors"]}')
+        self.stdout.write(f'📦 units sold {sold_units} of {options["stock"]}, remaining raw stock {remaining}')
+
+        if oversold or sold_units + remaining != options['stock']:
+            self.stdout.write(self.style.ERROR(f'❌ Oversold by {oversold} unit(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Zero oversells'))
+
+        if not options['keep']:
+            product.delete()
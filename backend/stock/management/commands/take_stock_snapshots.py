@@ -0,0 +1,50 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from stock.models import StockMovement
+from stock.snapshots import get_snapshot_interval, parse_as_of, snapshot_boundary, take_snapshot
+
+class Command(BaseCommand):
+    help = 'Record point-in-time stock snapshots (run daily from cron, or with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--at', type=str, help='Snapshot time (ISO datetime) instead of the latest boundary')
+        parser.add_argument('--backfill', action='store_true',
+                            help='Also write every missing boundary since the first stock movement')
+        parser.add_argument('--replace', action='store_true', help='Overwrite existing snapshot runs')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and take a snapshot at every interval boundary')
+
+    def handle(self, *args, **options):
+        interval = get_snapshot_interval()
+
+        if options['at']:
+            taken_at = parse_as_of(options['at'])
+            if taken_at is None:
+                raise CommandError(f'Invalid --at value: {options["at"]}')
+            self._snapshot(taken_at, options['replace'])
+            return
+
+        if options['backfill']:
+            first = StockMovement.objects.aggregate(first=Min('created_at'))['first']
+            if first:
+                boundary = snapshot_boundary(first, interval) + interval
+                latest = snapshot_boundary(timezone.now(), interval)
+                while boundary < latest:
+                    self._snapshot(boundary, options['replace'])
+                    boundary += interval
+
+        self._snapshot(snapshot_boundary(timezone.now(), interval), options['replace'])
+
+        while options['loop']:
+            next_boundary = snapshot_boundary(timezone.now(), interval) + interval
+            time.sleep(max(0, (next_boundary - timezone.now()).total_seconds()))
+            self._snapshot(next_boundary, options['replace'])
+
+    def _snapshot(self, taken_at, replace):
+        written = take_snapshot(taken_at, replace=replace)
+        if written is None:
+            self.stdout.write(f'ℹ️  Snapshot at {taken_at.isoformat()} already exists')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'📸 Snapshot at {taken_at.isoformat()}: {written} product(s)'))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:48
+
+from django.db import migrations, models
+from django.db.models.functions import Abs
+import django.db.models.deletion
+
+
+MOVEMENT_EFFECTS = {
+    'purchase': (1, 0, 0),
+    'sell_raw': (-1, 0, 0),
+    'sell_washed': (0, 0, -1),
+    'assign_wash': (-1, 1, 0),
+    'complete_wash': (0, -1, 1),
+}
+
+
+def populate_balances(apps, schema_editor):
+    """Seed StockBalance rows from the existing movement ledger"""
+    StockMovement = apps.get_model('stock', 'StockMovement')
+    StockBalance = apps.get_model('stock', 'StockBalance')
+
+    totals = {}
+    rows = StockMovement.objects.order_by().values('product_id', 'type').annotate(
+        total=models.Sum(Abs('quantity'))
+    )
+    for row in rows:
+        balance = totals.setdefault(row['product_id'], [0, 0, 0])
+        for index, factor in enumerate(MOVEMENT_EFFECTS.get(row['type'], (0, 0, 0))):
+            balance[index] += factor * row['total']
+
+    StockBalance.objects.bulk_create([
+        StockBalance(product_id=product_id, raw=raw, in_washing=in_washing, washed=washed)
+        for product_id, (raw, in_washing, washed) in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('stock', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_balance', serialize=False, to='products.product')),
+                ('raw', models.IntegerField(default=0)),
+                ('in_washing', models.IntegerField(default=0)),
+                ('washed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'stock_balances',
+            },
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
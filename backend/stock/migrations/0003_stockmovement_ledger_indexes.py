@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0002_stockbalance'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='stockmovement',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['-created_at', '-id'], name='stock_mov_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['type', '-created_at'], name='stock_mov_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', '-created_at'], name='stock_mov_product_created_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('stock', '0003_stockmovement_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('taken_at', models.DateTimeField()),
+                ('raw', models.IntegerField(default=0)),
+                ('in_washing', models.IntegerField(default=0)),
+                ('washed', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.product')),
+            ],
+            options={
+                'db_table': 'stock_snapshots',
+                'ordering': ['-taken_at'],
+                'indexes': [models.Index(fields=['-taken_at'], name='stock_snapshot_taken_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('product', 'taken_at'), name='unique_stock_snapshot_per_product'),
+        ),
+    ]
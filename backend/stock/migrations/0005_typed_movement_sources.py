@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:56
+
+from django.db import migrations, models
+import uuid
+
+
+SOURCE_TYPE_BY_MOVEMENT = {
+    'purchase': 'purchase_item',
+    'sell_raw': 'stock_sale',
+    'sell_washed': 'stock_sale',
+    'assign_wash': 'task',
+    'complete_wash': 'task',
+}
+
+
+def type_movement_sources(apps, schema_editor):
+    """
+    Derive (source_type, source_id) from the legacy reference_id strings.
+
+    Where older duplicates share a source and type, only the newest row is typed;
+    the rest keep just their reference_id so the unique constraint can be added
+    without rewriting ledger history.
+    """
+    StockMovement = apps.get_model('stock', 'StockMovement')
+
+    seen = set()
+    pending = []
+    movements = StockMovement.objects.exclude(reference_id__isnull=True).order_by('-created_at', '-id')
+    for movement in movements.iterator(chunk_size=2000):
+        try:
+            source_id = uuid.UUID(movement.reference_id)
+        except ValueError:
+            continue
+
+        key = (SOURCE_TYPE_BY_MOVEMENT.get(movement.type), source_id, movement.type)
+        if key[0] is None or key in seen:
+            continue
+        seen.add(key)
+
+        movement.source_type, movement.source_id = key[0], source_id
+        pending.append(movement)
+        if len(pending) >= 2000:
+            StockMovement.objects.bulk_update(pending, ['source_type', 'source_id'])
+            pending = []
+
+    StockMovement.objects.bulk_update(pending, ['source_type', 'source_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0004_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='source_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='source_type',
+            field=models.CharField(blank=True, choices=[('purchase_item', 'Purchase Item'), ('stock_sale', 'Stock Sale'), ('task', 'Task')], max_length=20, null=True),
+        ),
+        migrations.RunPython(type_movement_sources, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', 'type', 'created_at'], name='stock_mov_prod_type_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockmovement',
+            constraint=models.UniqueConstraint(fields=('source_type', 'source_id', 'type'), name='unique_stock_movement_source'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0001_initial'),
+        ('stock', '0005_typed_movement_sources'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='source_type',
+            field=models.CharField(blank=True, choices=[('purchase_item', 'Purchase Item'), ('stock_sale', 'Stock Sale'), ('task', 'Task'), ('carry_forward', 'Archive Carry-Forward')], max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='type',
+            field=models.CharField(choices=[('purchase', 'Purchase'), ('sell_raw', 'Sell Raw'), ('sell_washed', 'Sell Washed'), ('assign_wash', 'Assign for Washing'), ('complete_wash', 'Complete Washing'), ('opening_raw', 'Opening Raw Balance'), ('opening_in_washing', 'Opening In-Washing Balance'), ('opening_washed', 'Opening Washed Balance')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='StockArchiveRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('cutoff', models.DateTimeField(help_text='Movements recorded before this moment are archived')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('archived_count', models.PositiveIntegerField(default=0)),
+                ('carried_forward_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('triggered_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'stock_archive_runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedStockMovement',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('purchase', 'Purchase'), ('sell_raw', 'Sell Raw'), ('sell_washed', 'Sell Washed'), ('assign_wash', 'Assign for Washing'), ('complete_wash', 'Complete Washing'), ('opening_raw', 'Opening Raw Balance'), ('opening_in_washing', 'Opening In-Washing Balance'), ('opening_washed', 'Opening Washed Balance')], max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('reference_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('source_type', models.CharField(blank=True, choices=[('purchase_item', 'Purchase Item'), ('stock_sale', 'Stock Sale'), ('task', 'Task'), ('carry_forward', 'Archive Carry-Forward')], max_length=20, null=True)),
+                ('source_id', models.UUIDField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('period', models.DateField(help_text='First day of the month the movement was recorded in')),
+                ('archive_run', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='stock.stockarchiverun')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_stock_movements', to='products.product')),
+            ],
+            options={
+                'db_table': 'stock_movements_archive',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['period', 'product'], name='stock_arch_period_product_idx'), models.Index(fields=['product', 'created_at'], name='stock_arch_product_created_idx'), models.Index(fields=['-created_at', '-id'], name='stock_arch_created_id_idx'), models.Index(fields=['source_type', 'source_id'], name='stock_arch_source_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('stock', '0006_stock_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockValuation',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_valuation', serialize=False, to='products.product')),
+                ('fifo_raw_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('fifo_in_washing_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('fifo_washed_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('average_raw_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('average_in_washing_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('average_washed_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'stock_valuations',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockValuationEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('movement_type', models.CharField(choices=[('purchase', 'Purchase'), ('sell_raw', 'Sell Raw'), ('sell_washed', 'Sell Washed'), ('assign_wash', 'Assign for Washing'), ('complete_wash', 'Complete Washing'), ('opening_raw', 'Opening Raw Balance'), ('opening_in_washing', 'Opening In-Washing Balance'), ('opening_washed', 'Opening Washed Balance')], max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('fifo_raw_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('fifo_in_washing_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('fifo_washed_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('average_raw_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('average_in_washing_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('average_washed_value', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('effective_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_entries', to='products.product')),
+            ],
+            options={
+                'db_table': 'stock_valuation_entries',
+                'ordering': ['-effective_at'],
+                'indexes': [models.Index(fields=['effective_at', 'product'], name='stock_val_entry_time_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('stage', models.CharField(choices=[('raw', 'Raw'), ('in_washing', 'In Washing'), ('washed', 'Washed')], max_length=20)),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('quantity', models.PositiveIntegerField()),
+                ('remaining', models.PositiveIntegerField()),
+                ('source_type', models.CharField(blank=True, choices=[('purchase_item', 'Purchase Item'), ('stock_sale', 'Stock Sale'), ('task', 'Task'), ('carry_forward', 'Archive Carry-Forward')], max_length=20, null=True)),
+                ('source_id', models.UUIDField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='products.product')),
+            ],
+            options={
+                'db_table': 'stock_cost_layers',
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('remaining__gt', 0)), fields=['product', 'stage', 'created_at'], name='stock_layer_open_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,53 @@
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.db.models import Case, F, Max, Subquery, Sum, When
+from django.db.models.functions import Abs
+from django.utils import timezone
 from products.models import Product
+from .signals import stock_changed
+from decimal import Decimal
 import uuid
 
+# Effect of one unit of each movement type on (raw, in_washing, washed) stock.
+# Quantities are applied by magnitude because sales are stored as negative values.
+MOVEMENT_EFFECTS = {
+    'purchase': (1, 0, 0),
+    'sell_raw': (-1, 0, 0),
+    'sell_washed': (0, 0, -1),
+    'assign_wash': (-1, 1, 0),
+    'complete_wash': (0, -1, 1),
+    'opening_raw': (1, 0, 0),
+    'opening_in_washing': (0, 1, 0),
+    'opening_washed': (0, 0, 1),
+}
+
+# Carry-forward rows written by ledger archival hold signed balances
+SIGNED_MOVEMENT_TYPES = {'opening_raw', 'opening_in_washing', 'opening_washed'}
+
+def movement_units(movement_type, quantity):
+    """Units a ledger row contributes: carry-forward rows are signed, others count by magnitude"""
+    return quantity if movement_type in SIGNED_MOVEMENT_TYPES else abs(quantity)
+
+def movement_units_expression(quantity='quantity', movement_type='type'):
+    """SQL counterpart of movement_units()"""
+    return Case(
+        When(**{f'{movement_type}__in': SIGNED_MOVEMENT_TYPES}, then=F(quantity)),
+        default=Abs(quantity),
+        output_field=models.IntegerField()
+    )
+
+def ledger_totals(movements):
+    """Sum a movement queryset into {product_id: (raw, in_washing, washed)} with one GROUP BY"""
+    totals = {}
+    rows = movements.order_by().values('product_id', 'type').annotate(total=Sum(movement_units_expression()))
+    for row in rows:
+        balance = totals.setdefault(row['product_id'], [0, 0, 0])
+        for index, factor in enumerate(MOVEMENT_EFFECTS.get(row['type'], (0, 0, 0))):
+            balance[index] += factor * row['total']
+    
+    return {product_id: tuple(balance) for product_id, balance in totals.items()}
+
 class StockMovement(models.Model):
     """Track all stock movements for inventory management"""
     
@@ -11,6 +57,16 @@ class StockMovement(models.Model):
         ('sell_washed', 'Sell Washed'),
         ('assign_wash', 'Assign for Washing'),
         ('complete_wash', 'Complete Washing'),
+        ('opening_raw', 'Opening Raw Balance'),
+        ('opening_in_washing', 'Opening In-Washing Balance'),
+        ('opening_washed', 'Opening Washed Balance'),
+    ]
+    
+    SOURCE_TYPES = [
+        ('purchase_item', 'Purchase Item'),
+        ('stock_sale', 'Stock Sale'),
+        ('task', 'Task'),
+        ('carry_forward', 'Archive Carry-Forward'),
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -18,15 +74,140 @@ class StockMovement(models.Model):
     type = models.CharField(max_length=20, choices=MOVEMENT_TYPES)
     quantity = models.IntegerField()  # Can be negative for outgoing stock
     reference_id = models.CharField(max_length=100, blank=True, null=True)  # Reference to related record
+    source_type = models.CharField(max_length=20, choices=SOURCE_TYPES, blank=True, null=True)
+    source_id = models.UUIDField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    @classmethod
+    def record(cls, product_id, movement_type, quantity, source_type, source_id, previous_quantity=None, notes=None, unit_cost=None):
+        """
+        Insert or update the ledger row of a source record with one INSERT ... ON CONFLICT.
+        
+        `previous_quantity` is what the source last posted (None for a new source);
+        only the difference is applied to the running balances, valuation and snapshots.
+        `unit_cost` is the cost per unit of purchased stock.
+        """
+        cls.objects.bulk_create(
+            [cls(
+                product_id=product_id,
+                type=movement_type,
+                quantity=quantity,
+                reference_id=str(source_id),
+                source_type=source_type,
+                source_id=source_id,
+                notes=notes
+            )],
+            update_conflicts=True,
+            unique_fields=['source_type', 'source_id', 'type'],
+            update_fields=['quantity']
+        )
+        
+        delta = abs(quantity) - abs(previous_quantity or 0)
+        if delta:
+            StockBalance.apply(product_id, movement_type, delta, unit_cost=unit_cost, source_type=source_type, source_id=source_id)
+            if previous_quantity is not None:
+                # The row may predate snapshot runs that need the change folded in
+                created_at = Subquery(cls.objects.filter(
+                    source_type=source_type, source_id=source_id, type=movement_type
+                ).values('created_at')[:1])
+                StockSnapshot.apply_backdated(product_id, movement_type, delta, created_at)
+    
+    @classmethod
+    def record_many(cls, product_id, movement_type, source_type, changes):
+        """
+        Upsert the ledger rows of many sources of one product with a single INSERT ... ON CONFLICT.
+        
+        `changes` is a list of (source_id, quantity, previous_quantity, notes) tuples with the
+        same meaning as in record(). Increases are applied to the balances in one step;
+        decreases are applied per source so the valuation takes back that source's own layers.
+        """
+        cls.objects.bulk_create(
+            [
+                cls(
+                    product_id=product_id,
+                    type=movement_type,
+                    quantity=quantity,
+                    reference_id=str(source_id),
+                    source_type=source_type,
+                    source_id=source_id,
+                    notes=notes
+                )
+                for source_id, quantity, previous_quantity, notes in changes
+            ],
+            update_conflicts=True,
+            unique_fields=['source_type', 'source_id', 'type'],
+            update_fields=['quantity']
+        )
+        
+        deltas = {
+            source_id: abs(quantity) - abs(previous_quantity or 0)
+            for source_id, quantity, previous_quantity, notes in changes
+        }
+        increase = sum(delta for delta in deltas.values() if delta > 0)
+        if increase:
+            StockBalance.apply(product_id, movement_type, increase, source_type=source_type)
+        for source_id, delta in deltas.items():
+            if delta < 0:
+                StockBalance.apply(product_id, movement_type, delta, source_type=source_type, source_id=source_id)
+        
+        # Only rows recorded before the latest snapshot run need the change folded in
+        latest_snapshot = StockSnapshot.objects.filter(product_id=product_id).aggregate(latest=Max('taken_at'))['latest']
+        if latest_snapshot is not None:
+            backdated = cls.objects.filter(
+                source_type=source_type,
+                source_id__in=[source_id for source_id, delta in deltas.items() if delta],
+                type=movement_type,
+                created_at__lte=latest_snapshot
+            ).values_list('source_id', 'created_at')
+            for source_id, created_at in backdated:
+                StockSnapshot.apply_backdated(product_id, movement_type, deltas[source_id], created_at)
+    
+    def save(self, *args, **kwargs):
+        # Keep the product's StockBalance in step with the ledger row
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = StockMovement.objects.filter(pk=self.pk).values_list('type', 'quantity').first()
+            
+            super().save(*args, **kwargs)
+            
+            units = movement_units(self.type, self.quantity)
+            if previous:
+                previous_units = movement_units(*previous)
+                StockBalance.apply(self.product_id, previous[0], -previous_units, source_type=self.source_type, source_id=self.source_id)
+                # Edits to already-snapshotted rows must flow into those snapshots
+                StockSnapshot.apply_backdated(self.product_id, previous[0], -previous_units, self.created_at)
+                StockSnapshot.apply_backdated(self.product_id, self.type, units, self.created_at)
+            StockBalance.apply(self.product_id, self.type, units, source_type=self.source_type, source_id=self.source_id)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            units = movement_units(self.type, self.quantity)
+            StockBalance.apply(self.product_id, self.type, -units, source_type=self.source_type, source_id=self.source_id)
+            StockSnapshot.apply_backdated(self.product_id, self.type, -units, self.created_at)
+        return result
+    
     def __str__(self):
         return f"{self.product.name} - {self.type} - {self.quantity}"
     
     class Meta:
         db_table = 'stock_movements'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Keyset pagination and date-range scans over the ledger
+            models.Index(fields=['-created_at', '-id'], name='stock_mov_created_id_idx'),
+            # Multi-type filters restricted to a date range
+            models.Index(fields=['type', '-created_at'], name='stock_mov_type_created_idx'),
+            models.Index(fields=['product', '-created_at'], name='stock_mov_product_created_idx'),
+            # Per-product, per-type ledger scans (stock computations, valuation)
+            models.Index(fields=['product', 'type', 'created_at'], name='stock_mov_prod_type_idx'),
+        ]
+        constraints = [
+            # One ledger row per source record and movement type, the target of upserts
+            models.UniqueConstraint(fields=['source_type', 'source_id', 'type'], name='unique_stock_movement_source'),
+        ]
 
 class StockSale(models.Model):
     """Track sales of raw or washed stock"""
@@ -52,16 +233,32 @@ class StockSale(models.Model):
         self.total_amount = self.quantity * self.price_per_unit
         
         # Create stock movement
-        super().save(*args, **kwargs)
-        
-        movement_type = 'sell_raw' if self.sale_type == 'raw' else 'sell_washed'
-        StockMovement.objects.create(
-            product=self.product,
-            type=movement_type,
-            quantity=-self.quantity,  # Negative because it's outgoing
-            reference_id=str(self.id),
-            notes=f"Sale to {self.customer_name or 'Customer'}"
-        )
+        with transaction.atomic():
+            previous_quantity = None
+            if not self._state.adding:
+                stored = StockSale.objects.filter(pk=self.pk).values_list('quantity', flat=True).first()
+                previous_quantity = -stored if stored is not None else None
+            if previous_quantity is not None and previous_quantity != -self.quantity:
+                ArchivedStockMovement.check_source('stock_sale', self.id, 'sale')
+            
+            super().save(*args, **kwargs)
+            
+            # An unchanged quantity leaves the ledger alone, archived or not
+            if previous_quantity != -self.quantity:
+                movement_type = 'sell_raw' if self.sale_type == 'raw' else 'sell_washed'
+                StockMovement.record(
+                    self.product_id,
+                    movement_type,
+                    -self.quantity,  # Negative because it's outgoing
+                    source_type='stock_sale',
+                    source_id=self.id,
+                    previous_quantity=previous_quantity,
+                    notes=f"Sale to {self.customer_name or 'Customer'}"
+                )
+    
+    def delete(self, *args, **kwargs):
+        ArchivedStockMovement.check_source('stock_sale', self.id, 'sale')
+        return super().delete(*args, **kwargs)
     
     def __str__(self):
         return f"{self.product.name} - {self.sale_type} - {self.quantity} units"
@@ -69,3 +266,466 @@ class StockSale(models.Model):
     class Meta:
         db_table = 'stock_sales'
         ordering = ['-date', '-created_at']
+
+
+class StockBalance(models.Model):
+    """Running raw / in-washing / washed totals per product, maintained on every StockMovement write"""
+    
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='stock_balance')
+    raw = models.IntegerField(default=0)
+    in_washing = models.IntegerField(default=0)
+    washed = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @classmethod
+    def apply(cls, product_id, movement_type, quantity, unit_cost=None, source_type=None, source_id=None):
+        """
+        Add `quantity` units of `movement_type` to the product's balance row and post
+        the value change to its StockValuation.
+        
+        `unit_cost` is the cost of purchased units; the source identifies the record
+        behind the movement so reversals take back its own cost layers first.
+        """
+        effects = MOVEMENT_EFFECTS[movement_type]
+        raw, in_washing, washed = (factor * quantity for factor in effects)
+        changes = {
+            'raw': F('raw') + raw,
+            'in_washing': F('in_washing') + in_washing,
+            'washed': F('washed') + washed,
+            'updated_at': timezone.now(),
+        }
+        
+        if not cls.objects.filter(product_id=product_id).update(**changes):
+            cls.objects.get_or_create(product_id=product_id)
+            cls.objects.filter(product_id=product_id).update(**changes)
+        stock_changed.send(sender=cls, product_id=product_id)
+        
+        if quantity and movement_type in VALUATION_FLOWS:
+            # Levels before this movement, read back from the row the update just locked
+            levels = cls.objects.filter(product_id=product_id).values_list('raw', 'in_washing', 'washed').get()
+            levels = tuple(level - factor * quantity for level, factor in zip(levels, effects))
+            StockValuation.post(
+                product_id, movement_type, quantity, levels,
+                unit_cost=unit_cost, source_type=source_type, source_id=source_id
+            )
+    
+    @classmethod
+    def lock(cls, product_id):
+        """Lock and return the product's balance row for the rest of the current transaction"""
+        return cls.lock_many([product_id])[product_id]
+    
+    @classmethod
+    def lock_many(cls, product_ids):
+        """
+        Lock the balance rows of several products, returning {product_id: balance}.
+        
+        Must be the first statement of the transaction. Backends with row locks use
+        SELECT ... FOR UPDATE in primary key order; SQLite has none, so an UPDATE takes
+        the database write lock up front, which serializes writers the same way
+        BEGIN IMMEDIATE would.
+        """
+        product_ids = sorted(set(product_ids))
+        balances = cls.objects.filter(product_id__in=product_ids)
+        
+        if connection.features.has_select_for_update:
+            cls.objects.bulk_create([cls(product_id=product_id) for product_id in product_ids], ignore_conflicts=True)
+            balances = balances.select_for_update().order_by('product_id')
+        elif balances.update(updated_at=timezone.now()) < len(product_ids):
+            cls.objects.bulk_create([cls(product_id=product_id) for product_id in product_ids], ignore_conflicts=True)
+        
+        return {balance.product_id: balance for balance in balances}
+    
+    @staticmethod
+    def compute_from_ledger(product_ids=None):
+        """Recompute balances from the full StockMovement ledger, keyed by product id"""
+        movements = StockMovement.objects.all()
+        if product_ids is not None:
+            movements = movements.filter(product_id__in=product_ids)
+        return ledger_totals(movements)
+    
+    @classmethod
+    def rebuild(cls, product_ids=None, dry_run=False):
+        """
+        Rebuild balance rows from the ledger.
+        
+        Returns a list of (product_id, stored, expected) tuples for every product
+        whose stored balance differed from the recomputed one.
+        """
+        products = Product.objects.all()
+        if product_ids is not None:
+            products = products.filter(id__in=product_ids)
+        product_ids = list(products.values_list('id', flat=True))
+        
+        with transaction.atomic():
+            expected = cls.compute_from_ledger(product_ids)
+            stored = {
+                balance.product_id: balance
+                for balance in cls.objects.select_for_update().filter(product_id__in=product_ids)
+            }
+            
+            mismatches = []
+            for product_id in product_ids:
+                target = expected.get(product_id, (0, 0, 0))
+                balance = stored.get(product_id)
+                current = (balance.raw, balance.in_washing, balance.washed) if balance else (0, 0, 0)
+                if current == target:
+                    continue
+                
+                mismatches.append((product_id, current, target))
+                if not dry_run:
+                    cls.objects.update_or_create(
+                        product_id=product_id,
+                        defaults=dict(zip(('raw', 'in_washing', 'washed'), target))
+                    )
+                    stock_changed.send(sender=cls, product_id=product_id)
+        
+        return mismatches
+    
+    def as_stock(self):
+        """Stock dict in the shape returned by Product.current_stock"""
+        raw = max(0, self.raw)
+        washed = max(0, self.washed)
+        return {
+            'raw': raw,
+            'in_washing': max(0, self.in_washing),
+            'washed': washed,
+            'total': raw + washed
+        }
+    
+    def __str__(self):
+        return f"{self.product_id} - raw {self.raw} / washing {self.in_washing} / washed {self.washed}"
+    
+    class Meta:
+        db_table = 'stock_balances'
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock levels of every product at a scheduled point in time.
+    
+    Each snapshot run writes one row per product with the same taken_at, so
+    as-of queries only replay the movements recorded after the nearest run.
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots')
+    taken_at = models.DateTimeField()
+    raw = models.IntegerField(default=0)
+    in_washing = models.IntegerField(default=0)
+    washed = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    @classmethod
+    def apply_backdated(cls, product_id, movement_type, quantity, created_at):
+        """Fold a change to a movement recorded at `created_at` into every later snapshot"""
+        raw, in_washing, washed = (factor * quantity for factor in MOVEMENT_EFFECTS[movement_type])
+        cls.objects.filter(product_id=product_id, taken_at__gte=created_at).update(
+            raw=F('raw') + raw,
+            in_washing=F('in_washing') + in_washing,
+            washed=F('washed') + washed
+        )
+    
+    def __str__(self):
+        return f"{self.product_id} @ {self.taken_at} - raw {self.raw} / washing {self.in_washing} / washed {self.washed}"
+    
+    class Meta:
+        db_table = 'stock_snapshots'
+        ordering = ['-taken_at']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'taken_at'], name='unique_stock_snapshot_per_product'),
+        ]
+        indexes = [
+            models.Index(fields=['-taken_at'], name='stock_snapshot_taken_idx'),
+        ]
+
+
+class StockArchiveRun(models.Model):
+    """One execution of the ledger archival pipeline"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    cutoff = models.DateTimeField(help_text='Movements recorded before this moment are archived')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    archived_count = models.PositiveIntegerField(default=0)
+    carried_forward_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    triggered_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    @classmethod
+    def latest_cutoff(cls):
+        """Cutoff of the most recent completed run, or None if nothing has been archived"""
+        return cls.objects.filter(status='completed').aggregate(latest=Max('cutoff'))['latest']
+    
+    def __str__(self):
+        return f"Archive before {self.cutoff} - {self.status}"
+    
+    class Meta:
+        db_table = 'stock_archive_runs'
+        ordering = ['-created_at']
+
+class ArchivedStockMovement(models.Model):
+    """Cold copy of a StockMovement moved out of the hot ledger, kept for audits"""
+    
+    id = models.UUIDField(primary_key=True, editable=False)  # Original StockMovement id
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='archived_stock_movements')
+    type = models.CharField(max_length=20, choices=StockMovement.MOVEMENT_TYPES)
+    quantity = models.IntegerField()
+    reference_id = models.CharField(max_length=100, blank=True, null=True)
+    source_type = models.CharField(max_length=20, choices=StockMovement.SOURCE_TYPES, blank=True, null=True)
+    source_id = models.UUIDField(blank=True, null=True)
+    notes = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()  # Original timestamp, not auto-populated
+    period = models.DateField(help_text='First day of the month the movement was recorded in')
+    archive_run = models.ForeignKey(StockArchiveRun, on_delete=models.PROTECT, related_name='movements')
+    
+    @classmethod
+    def check_source(cls, source_type, source_id, label):
+        """
+        Refuse to change or delete a record whose movements were archived: the
+        carry-forward rows already count them, so a new hot row would count them twice.
+        """
+        if cls.objects.filter(source_type=source_type, source_id=source_id).exists():
+            raise ValidationError(f"This {label}'s stock movements have been archived and can no longer be changed")
+    
+    def __str__(self):
+        return f"{self.product_id} - {self.type} - {self.quantity} ({self.period:%Y-%m})"
+    
+    class Meta:
+        db_table = 'stock_movements_archive'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['period', 'product'], name='stock_arch_period_product_idx'),
+            models.Index(fields=['product', 'created_at'], name='stock_arch_product_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='stock_arch_created_id_idx'),
+            models.Index(fields=['source_type', 'source_id'], name='stock_arch_source_idx'),
+        ]
+
+
+# Stock stages carried at cost, in the same order as MOVEMENT_EFFECTS columns
+VALUATION_STAGES = ('raw', 'in_washing', 'washed')
+
+VALUATION_METHODS = ('fifo', 'average')
+
+# Stage each movement type takes units out of and puts them into (None is outside the business)
+VALUATION_FLOWS = {
+    'purchase': (None, 'raw'),
+    'sell_raw': ('raw', None),
+    'sell_washed': ('washed', None),
+    'assign_wash': ('raw', 'in_washing'),
+    'complete_wash': ('in_washing', 'washed'),
+}
+
+VALUE_PLACES = Decimal('0.0001')
+
+def value_field(method, stage):
+    """Name of the StockValuation / StockValuationEntry column for a method and stage"""
+    return f'{method}_{stage}_value'
+
+VALUE_FIELDS = [value_field(method, stage) for method in VALUATION_METHODS for stage in VALUATION_STAGES]
+
+
+class CostLayer(models.Model):
+    """Units of one product at one stage sharing a unit cost, consumed oldest first under FIFO"""
+    
+    STAGES = [
+        ('raw', 'Raw'),
+        ('in_washing', 'In Washing'),
+        ('washed', 'Washed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='cost_layers')
+    stage = models.CharField(max_length=20, choices=STAGES)
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+    quantity = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+    source_type = models.CharField(max_length=20, choices=StockMovement.SOURCE_TYPES, blank=True, null=True)
+    source_id = models.UUIDField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    @classmethod
+    def consume(cls, product_id, stage, units, prefer_source_id=None, chunk_size=50):
+        """
+        Take `units` from the oldest open layers of a stage.
+        
+        Returns ([(quantity, unit_cost), ...], shortfall). Layers of `prefer_source_id`
+        go first so a reversal takes back its own units. Every layer is emptied at most
+        once, so consumption is O(1) amortized per movement.
+        """
+        ordering = ['created_at', 'id']
+        if prefer_source_id is not None:
+            ordering.insert(0, Case(When(source_id=prefer_source_id, then=0), default=1, output_field=models.IntegerField()))
+        open_layers = cls.objects.select_for_update().filter(
+            product_id=product_id, stage=stage, remaining__gt=0
+        ).order_by(*ordering)
+        
+        taken = []
+        while units > 0:
+            layers = list(open_layers[:chunk_size])
+            if not layers:
+                break
+            
+            emptied = []
+            for layer in layers:
+                take = min(units, layer.remaining)
+                taken.append((take, layer.unit_cost))
+                units -= take
+                if take == layer.remaining:
+                    emptied.append(layer.pk)
+                else:
+                    cls.objects.filter(pk=layer.pk).update(remaining=F('remaining') - take)
+                if not units:
+                    break
+            cls.objects.filter(pk__in=emptied).update(remaining=0)
+        
+        return taken, units
+    
+    def __str__(self):
+        return f"{self.product_id} - {self.stage} - {self.remaining}/{self.quantity} @ {self.unit_cost}"
+    
+    class Meta:
+        db_table = 'stock_cost_layers'
+        ordering = ['created_at', 'id']
+        indexes = [
+            # Only open layers are ever consumed, so keep the index to those
+            models.Index(fields=['product', 'stage', 'created_at'], condition=models.Q(remaining__gt=0), name='stock_layer_open_idx'),
+        ]
+
+class StockValuation(models.Model):
+    """
+    Running inventory value per product and stage, under both FIFO and moving-average costing.
+    
+    Every stock movement posts its value change here and to a StockValuationEntry,
+    so valuation never replays history.
+    """
+    
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='stock_valuation')
+    fifo_raw_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    fifo_in_washing_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    fifo_washed_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    average_raw_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    average_in_washing_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    average_washed_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def unit_cost(self, method, stage, level, fallback):
+        """Current cost per unit held at a stage, or `fallback` when the stage is empty"""
+        value = getattr(self, value_field(method, stage))
+        if level > 0 and value > 0:
+            return value / level
+        return fallback
+    
+    @classmethod
+    def post(cls, product_id, movement_type, quantity, levels, unit_cost=None, source_type=None, source_id=None, effective_at=None):
+        """
+        Value `quantity` units of `movement_type` given the product's (raw, in_washing, washed)
+        levels before the movement. A negative quantity reverses an earlier posting.
+        """
+        source, target = VALUATION_FLOWS[movement_type]
+        reversal = quantity < 0
+        if reversal:
+            source, target = target, source
+        units = abs(quantity)
+        levels = dict(zip(VALUATION_STAGES, levels))
+        
+        valuation, _ = cls.objects.select_for_update().get_or_create(product_id=product_id)
+        purchase_price, wash_price = Product.objects.filter(pk=product_id).values_list('purchase_price', 'wash_price').get()
+        # Cost of units the valuation has no layers for (e.g. stock recorded before it existed)
+        fallback = {'raw': purchase_price, 'in_washing': purchase_price, 'washed': purchase_price + wash_price}
+        # Washing adds the wash price to every unit; undoing it takes the price back off
+        added_cost = Decimal(0)
+        if movement_type == 'complete_wash':
+            added_cost = -wash_price if reversal else wash_price
+        
+        changes = dict.fromkeys(VALUE_FIELDS, Decimal(0))
+        
+        if source:
+            average_field = value_field('average', source)
+            if levels[source] > 0 and units >= levels[source]:
+                moved_value = getattr(valuation, average_field)  # Emptying the stage takes all of its value
+            else:
+                moved_value = valuation.unit_cost('average', source, levels[source], fallback[source]) * units
+            changes[average_field] -= moved_value
+            
+            moved_layers, shortfall = CostLayer.consume(
+                product_id, source, units, prefer_source_id=source_id if reversal else None
+            )
+            changes[value_field('fifo', source)] -= sum(count * cost for count, cost in moved_layers)
+            if shortfall:
+                moved_layers.append((shortfall, fallback[source]))
+        else:
+            # Units arriving from outside: purchases at their cost, returns at the stage's current cost
+            average_cost = unit_cost if unit_cost is not None else valuation.unit_cost('average', target, levels[target], fallback[target])
+            fifo_cost = unit_cost if unit_cost is not None else valuation.unit_cost('fifo', target, levels[target], fallback[target])
+            moved_value = average_cost * units
+            moved_layers = [(units, fifo_cost)]
+        
+        if target:
+            changes[value_field('average', target)] += max(moved_value + added_cost * units, Decimal(0))
+            layers = [
+                CostLayer(
+                    product_id=product_id,
+                    stage=target,
+                    unit_cost=max(cost + added_cost, Decimal(0)).quantize(VALUE_PLACES),
+                    quantity=count,
+                    remaining=count,
+                    source_type=source_type,
+                    source_id=source_id,
+                    created_at=effective_at or timezone.now()
+                )
+                for count, cost in moved_layers if count
+            ]
+            CostLayer.objects.bulk_create(layers)
+            changes[value_field('fifo', target)] += sum(layer.unit_cost * layer.quantity for layer in layers)
+        
+        changes = {field: Decimal(change).quantize(VALUE_PLACES) for field, change in changes.items()}
+        cls.objects.filter(product_id=product_id).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + change for field, change in changes.items() if change}
+        )
+        StockValuationEntry.objects.create(
+            product_id=product_id,
+            movement_type=movement_type,
+            quantity=quantity,
+            effective_at=effective_at or timezone.now(),
+            **changes
+        )
+    
+    def __str__(self):
+        return f"{self.product_id} - fifo {self.fifo_raw_value}/{self.fifo_in_washing_value}/{self.fifo_washed_value}"
+    
+    class Meta:
+        db_table = 'stock_valuations'
+
+class StockValuationEntry(models.Model):
+    """Value change posted by one stock movement; summed up to a moment for as-of valuation"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='valuation_entries')
+    movement_type = models.CharField(max_length=20, choices=StockMovement.MOVEMENT_TYPES)
+    quantity = models.IntegerField()
+    fifo_raw_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    fifo_in_washing_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    fifo_washed_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    average_raw_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    average_in_washing_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    average_washed_value = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    effective_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.product_id} - {self.movement_type} {self.quantity} @ {self.effective_at}"
+    
+    class Meta:
+        db_table = 'stock_valuation_entries'
+        ordering = ['-effective_at']
+        indexes = [
+            models.Index(fields=['effective_at', 'product'], name='stock_val_entry_time_idx'),
+        ]
@@ -0,0 +1,116 @@
+"""
+Stock overview engine.
+
+Computes raw, in-washing, washed and total stock for many products in a single
+GROUP BY query, using conditional sums over the stock_movements ledger.
+"""
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Abs, Coalesce, Greatest
+from products.models import Product
+from .models import MOVEMENT_EFFECTS, SIGNED_MOVEMENT_TYPES
+from .snapshots import as_stock, stock_as_of
+
+STOCK_COLUMNS = ('raw', 'in_washing', 'washed')
+
+ORDERING_FIELDS = {
+    'name': 'name',
+    'raw_stock': 'raw_stock',
+    'washed_stock': 'washed_stock',
+    'total_stock': 'total_stock',
+}
+
+
+def _ledger_sum(column_index):
+    """Conditional SUM of movement quantities contributing to one stock column"""
+    whens = [
+        When(stock_movements__type=movement_type,
+             then=Value(effects[column_index]) * (
+                 F('stock_movements__quantity') if movement_type in SIGNED_MOVEMENT_TYPES
+                 else Abs('stock_movements__quantity')
+             ))
+        for movement_type, effects in MOVEMENT_EFFECTS.items()
+        if effects[column_index]
+    ]
+    return Coalesce(
+        Sum(Case(*whens, default=Value(0), output_field=IntegerField())),
+        Value(0),
+    )
+
+
+def stock_overview_queryset(product_ids=None, ordering=None):
+    """
+    Product queryset annotated with raw_stock, in_washing_stock, washed_stock
+    and total_stock, evaluated as one aggregate query over the ledger.
+
+    Args:
+        product_ids: Optional iterable of product ids to restrict the overview to
+        ordering: Optional key from ORDERING_FIELDS, prefixed with '-' for descending
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+
+    raw, in_washing, washed = (_ledger_sum(index) for index in range(len(STOCK_COLUMNS)))
+    products = products.annotate(
+        raw_stock=Greatest(raw, Value(0)),
+        in_washing_stock=Greatest(in_washing, Value(0)),
+        washed_stock=Greatest(washed, Value(0)),
+    ).annotate(
+        total_stock=F('raw_stock') + F('washed_stock'),
+    )
+
+    if ordering:
+        descending = ordering.startswith('-')
+        field = ORDERING_FIELDS[ordering.lstrip('-')]
+        products = products.order_by(f"{'-' if descending else ''}{field}", 'name')
+
+    return products
+
+
+def stock_overview_rows(product_ids=None, ordering=None):
+    """Overview rows in the shape consumed by StockOverviewSerializer"""
+    products = stock_overview_queryset(product_ids, ordering).values(
+        'id', 'name', 'purchase_price', 'wash_price',
+        'raw_stock', 'in_washing_stock', 'washed_stock', 'total_stock'
+    )
+    return [
+        {
+            'product_id': product['id'],
+            'product_name': product['name'],
+            'raw_stock': product['raw_stock'],
+            'in_washing_stock': product['in_washing_stock'],
+            'washed_stock': product['washed_stock'],
+            'total_stock': product['total_stock'],
+            'purchase_price': product['purchase_price'],
+            'wash_price': product['wash_price']
+        }
+        for product in products
+    ]
+
+
+def stock_overview_rows_as_of(as_of, product_ids=None, ordering=None):
+    """Overview rows at a past moment, from the nearest snapshot run plus later movements"""
+    products = Product.objects.filter(created_at__lte=as_of)
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+
+    levels = stock_as_of(as_of, product_ids)
+    rows = []
+    for product in products.values('id', 'name', 'purchase_price', 'wash_price'):
+        stock = as_stock(levels.get(product['id'], (0, 0, 0)))
+        rows.append({
+            'product_id': product['id'],
+            'product_name': product['name'],
+            'raw_stock': stock['raw'],
+            'in_washing_stock': stock['in_washing'],
+            'washed_stock': stock['washed'],
+            'total_stock': stock['total'],
+            'purchase_price': product['purchase_price'],
+            'wash_price': product['wash_price']
+        })
+
+    if ordering:
+        key = 'product_name' if ordering.lstrip('-') == 'name' else ordering.lstrip('-')
+        rows.sort(key=lambda row: (row[key], row['product_name']), reverse=ordering.startswith('-'))
+
+    return rows
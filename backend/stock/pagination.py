@@ -0,0 +1,86 @@
+"""
+Keyset pagination for the stock movement ledger.
+
+Pages are addressed by an opaque cursor encoding the (created_at, id) of the
+last row served, so each page is an index range scan no matter how deep the
+client has paged, and concurrent inserts never shift rows between pages.
+"""
+import base64
+import uuid
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+class LedgerCursorPagination(BasePagination):
+    """Forward-only cursor pagination over (-created_at, -id)"""
+    
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('-created_at', '-id')
+    
+    @classmethod
+    def is_requested(cls, request):
+        """Cursor mode is opt-in so existing list clients keep receiving a plain array"""
+        params = request.query_params
+        return cls.cursor_query_param in params or cls.page_size_query_param in params
+    
+    def get_page_size(self, request):
+        default = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 20
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            return default
+        return max(1, min(page_size, self.max_page_size))
+    
+    def encode_cursor(self, item):
+        raw = f"{item.created_at.isoformat()}|{item.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, item_id = base64.urlsafe_b64decode(encoded.encode()).decode().split('|')
+            created_at = parse_datetime(created_at)
+            item_id = uuid.UUID(item_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor')
+        if created_at is None:
+            raise NotFound('Invalid cursor')
+        return created_at, item_id
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position:
+            created_at, item_id = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=item_id))
+        
+        # Fetch one extra row to know whether another page exists
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+    
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'page_size': self.page_size,
+            'results': data
+        })
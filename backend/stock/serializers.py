@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import StockMovement, StockSale
+from django.db import transaction
+from .models import StockMovement, StockSale, StockBalance, StockArchiveRun, ArchivedStockMovement
 from products.models import Product
 
 class StockMovementSerializer(serializers.ModelSerializer):
@@ -57,6 +58,38 @@ class StockSaleCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"Insufficient washed stock. Available: {current_stock['washed']}")
         
         return attrs
+    
+    def create(self, validated_data):
+        # Re-check stock under the balance lock so concurrent sales cannot oversell
+        with transaction.atomic():
+            balance = StockBalance.lock(validated_data['product'].id)
+            available = balance.as_stock()[validated_data['sale_type']]
+            if available < validated_data['quantity']:
+                raise serializers.ValidationError(
+                    f"Insufficient {validated_data['sale_type']} stock. Available: {available}"
+                )
+            return super().create(validated_data)
+
+class StockSaleBulkItemSerializer(serializers.Serializer):
+    """Serializer for one sale in a bulk sale request (stock is checked per batch in the view)"""
+    
+    product = serializers.UUIDField()
+    sale_type = serializers.ChoiceField(choices=StockSale.SALE_TYPES)
+    quantity = serializers.IntegerField()
+    price_per_unit = serializers.DecimalField(max_digits=10, decimal_places=2)
+    customer_name = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    date = serializers.DateField()
+    
+    def validate_quantity(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Quantity must be greater than 0")
+        return value
+    
+    def validate_price_per_unit(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Price per unit must be greater than 0")
+        return value
 
 class StockOverviewSerializer(serializers.Serializer):
     """Serializer for stock overview"""
@@ -64,7 +97,47 @@ class StockOverviewSerializer(serializers.Serializer):
     product_id = serializers.UUIDField()
     product_name = serializers.CharField()
     raw_stock = serializers.IntegerField()
+    in_washing_stock = serializers.IntegerField()
     washed_stock = serializers.IntegerField()
     total_stock = serializers.IntegerField()
     purchase_price = serializers.DecimalField(max_digits=10, decimal_places=2)
     wash_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+class StockArchiveRunSerializer(serializers.ModelSerializer):
+    """Serializer for StockArchiveRun model"""
+    
+    triggered_by_username = serializers.CharField(source='triggered_by.username', read_only=True, default=None)
+    
+    class Meta:
+        model = StockArchiveRun
+        fields = [
+            'id', 'cutoff', 'status', 'archived_count', 'carried_forward_count', 'error',
+            'triggered_by_username', 'created_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+class ArchivedStockMovementSerializer(serializers.ModelSerializer):
+    """Serializer for ArchivedStockMovement model"""
+    
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    
+    class Meta:
+        model = ArchivedStockMovement
+        fields = [
+            'id', 'product', 'product_name', 'type', 'quantity', 'reference_id',
+            'notes', 'created_at', 'period', 'archive_run'
+        ]
+        read_only_fields = fields
+
+class StockValuationSerializer(serializers.Serializer):
+    """Serializer for per-product inventory valuation rows"""
+    
+    product_id = serializers.UUIDField()
+    product_name = serializers.CharField()
+    raw_stock = serializers.IntegerField()
+    in_washing_stock = serializers.IntegerField()
+    washed_stock = serializers.IntegerField()
+    raw_value = serializers.DecimalField(max_digits=16, decimal_places=2)
+    in_washing_value = serializers.DecimalField(max_digits=16, decimal_places=2)
+    washed_value = serializers.DecimalField(max_digits=16, decimal_places=2)
+    total_value = serializers.DecimalField(max_digits=16, decimal_places=2)
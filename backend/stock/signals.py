@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent with product_id whenever a product's StockBalance changes
+stock_changed = Signal()
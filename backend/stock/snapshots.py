@@ -0,0 +1,132 @@
+"""
+Point-in-time stock queries.
+
+Snapshot runs record every product's stock at a scheduled boundary
+(daily by default, see STOCK_SNAPSHOT_INTERVAL). Stock as of any moment is
+the nearest run at or before that moment plus the movements recorded since,
+so answering costs O(movements since the run) rather than O(all history).
+"""
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from products.models import Product
+from .models import ArchivedStockMovement, StockArchiveRun, StockMovement, StockSnapshot, ledger_totals
+
+
+def get_snapshot_interval():
+    return getattr(settings, 'STOCK_SNAPSHOT_INTERVAL', timedelta(days=1))
+
+
+def snapshot_boundary(moment, interval=None):
+    """Latest scheduled snapshot boundary at or before `moment`"""
+    interval = interval or get_snapshot_interval()
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return moment - ((moment - epoch) % interval)
+
+
+def parse_as_of(value):
+    """
+    Parse an ?as_of= value into an aware datetime.
+
+    A bare date means the end of that day. Returns None if the value is invalid.
+    """
+    day = parse_date(value)
+    if day is not None:
+        moment = datetime.combine(day, time.max)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def latest_snapshot_time(as_of):
+    """taken_at of the nearest snapshot run at or before `as_of`, or None"""
+    return StockSnapshot.objects.filter(taken_at__lte=as_of).aggregate(latest=Max('taken_at'))['latest']
+
+
+def stock_as_of(as_of, product_ids=None):
+    """
+    Stock levels at `as_of` as {product_id: (raw, in_washing, washed)}.
+
+    Products with no snapshot row and no movements in the window are omitted.
+    """
+    taken_at = latest_snapshot_time(as_of)
+
+    totals = {}
+    if taken_at is not None:
+        snapshots = StockSnapshot.objects.filter(taken_at=taken_at)
+        if product_ids is not None:
+            snapshots = snapshots.filter(product_id__in=product_ids)
+        for product_id, raw, in_washing, washed in snapshots.values_list('product_id', 'raw', 'in_washing', 'washed'):
+            totals[product_id] = (raw, in_washing, washed)
+
+    movements = StockMovement.objects.filter(created_at__lte=as_of)
+    if taken_at is not None:
+        movements = movements.filter(created_at__gt=taken_at)
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=product_ids)
+
+    windows = [movements]
+
+    # Movements before the archive cutoff live in the archive table, which together with
+    # the hot rows (minus their carry-forward summaries) is the full original ledger
+    archive_cutoff = StockArchiveRun.latest_cutoff()
+    if archive_cutoff is not None and (taken_at is None or taken_at < archive_cutoff):
+        windows = [movements.exclude(source_type='carry_forward')]
+        archived = ArchivedStockMovement.objects.filter(created_at__lte=as_of)
+        if taken_at is not None:
+            archived = archived.filter(created_at__gt=taken_at)
+        if product_ids is not None:
+            archived = archived.filter(product_id__in=product_ids)
+        windows.append(archived)
+
+    for window in windows:
+        for product_id, delta in ledger_totals(window).items():
+            base = totals.get(product_id, (0, 0, 0))
+            totals[product_id] = tuple(current + change for current, change in zip(base, delta))
+
+    return totals
+
+
+def as_stock(levels):
+    """Stock dict in the shape returned by Product.current_stock"""
+    raw, in_washing, washed = levels
+    raw, washed = max(0, raw), max(0, washed)
+    return {
+        'raw': raw,
+        'in_washing': max(0, in_washing),
+        'washed': washed,
+        'total': raw + washed
+    }
+
+
+def take_snapshot(taken_at, replace=False):
+    """
+    Write a snapshot run for every product at `taken_at`.
+
+    Returns the number of rows written, or None if a run already exists and
+    `replace` is False.
+    """
+    with transaction.atomic():
+        existing = StockSnapshot.objects.filter(taken_at=taken_at)
+        if existing.exists():
+            if not replace:
+                return None
+            existing.delete()
+
+        levels = stock_as_of(taken_at)
+        snapshots = []
+        for product_id in Product.objects.filter(created_at__lte=taken_at).values_list('id', flat=True):
+            raw, in_washing, washed = levels.get(product_id, (0, 0, 0))
+            snapshots.append(StockSnapshot(
+                product_id=product_id, taken_at=taken_at,
+                raw=raw, in_washing=in_washing, washed=washed
+            ))
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=500)
+        return len(snapshots)
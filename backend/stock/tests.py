@@ -0,0 +1,161 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+from products.models import Product
+from purchases.models import Purchase, PurchaseItem
+from tasks.models import Task
+from workers.models import Worker
+from .archive import archive_cutoff, run_archive
+from .models import StockArchiveRun, StockBalance, StockMovement, StockSale, StockSnapshot, ledger_totals
+from .snapshots import take_snapshot
+
+
+class StockBalanceTests(TestCase):
+    """StockBalance must always equal a full recompute of the StockMovement ledger"""
+
+    def setUp(self):
+        self.bottle = Product.objects.create(name='Bottle', purchase_price=Decimal('5.00'), wash_price=Decimal('2.00'))
+        self.jar = Product.objects.create(name='Jar', purchase_price=Decimal('8.00'), wash_price=Decimal('3.00'))
+        self.worker = Worker.objects.create(name='Test Washer', phone_number='0700000000', id_number='TEST-0001')
+        self.purchase = Purchase.objects.create(total_cost=Decimal('1000.00'), date=date.today())
+
+    def assertBalancesMatchLedger(self):
+        expected = StockBalance.compute_from_ledger()
+        for product in (self.bottle, self.jar):
+            balance = StockBalance.objects.filter(product=product).first()
+            stored = (balance.raw, balance.in_washing, balance.washed) if balance else (0, 0, 0)
+            self.assertEqual(stored, expected.get(product.id, (0, 0, 0)), product.name)
+        self.assertEqual(StockBalance.rebuild(dry_run=True), [])
+
+    def buy(self, product, quantity):
+        return PurchaseItem.objects.create(purchase=self.purchase, product=product, quantity=quantity, cost=Decimal(quantity * 5))
+
+    def sell(self, product, sale_type, quantity):
+        return StockSale.objects.create(
+            product=product, sale_type=sale_type, quantity=quantity,
+            price_per_unit=Decimal('7.00'), date=date.today()
+        )
+
+    def wash(self, product, assigned, washed=0):
+        return Task.objects.create(
+            worker=self.worker, product=product, assigned_quantity=assigned,
+            washed_quantity=washed, salary=Decimal('100.00'), date=date.today()
+        )
+
+    def test_purchases_and_sales(self):
+        item = self.buy(self.bottle, 100)
+        self.buy(self.jar, 40)
+        self.sell(self.bottle, 'raw', 30)
+        self.assertBalancesMatchLedger()
+        self.assertEqual(self.bottle.current_stock['raw'], 70)
+
+        item.quantity = 120
+        item.save()
+        sale = self.sell(self.jar, 'raw', 10)
+        sale.quantity = 15
+        sale.save()
+        self.assertBalancesMatchLedger()
+        self.assertEqual(self.bottle.current_stock['raw'], 90)
+        self.assertEqual(self.jar.current_stock['raw'], 25)
+
+    def test_task_create_update_delete(self):
+        self.buy(self.bottle, 100)
+        task = self.wash(self.bottle, 50)
+        self.assertBalancesMatchLedger()
+        self.assertEqual(self.bottle.current_stock, {'raw': 50, 'in_washing': 50, 'washed': 0, 'total': 50})
+
+        task.washed_quantity = 20
+        task.save()
+        task = Task.objects.get(pk=task.pk)
+        task.assigned_quantity = 60
+        task.washed_quantity = 45
+        task.save()
+        self.assertBalancesMatchLedger()
+        self.sell(self.bottle, 'washed', 5)
+        self.assertBalancesMatchLedger()
+        self.assertEqual(self.bottle.current_stock, {'raw': 40, 'in_washing': 15, 'washed': 40, 'total': 80})
+
+        # Deleting a task leaves its ledger rows, so the balance keeps counting them
+        task.delete()
+        self.assertBalancesMatchLedger()
+
+        # Deleting a ledger row directly takes it out of the balance
+        StockMovement.objects.filter(source_type='task', type='complete_wash').get().delete()
+        self.assertBalancesMatchLedger()
+        self.assertEqual(self.bottle.current_stock['washed'], 0)
+
+    def test_backdated_writes(self):
+        item = self.buy(self.bottle, 100)
+        sale = self.sell(self.bottle, 'raw', 10)
+        task = self.wash(self.bottle, 30, 10)
+        taken_at = timezone.now()
+        take_snapshot(taken_at)
+
+        # Edits to rows recorded before the snapshot
+        item.quantity = 80
+        item.save()
+        sale.quantity = 25
+        sale.save()
+        task.washed_quantity = 30
+        task.save()
+        movement = StockMovement.objects.get(source_type='purchase_item', source_id=item.id)
+        movement.quantity = 90
+        movement.save()
+        self.assertBalancesMatchLedger()
+
+        snapshot = StockSnapshot.objects.get(product=self.bottle, taken_at=taken_at)
+        expected = ledger_totals(StockMovement.objects.filter(created_at__lte=taken_at))[self.bottle.id]
+        self.assertEqual((snapshot.raw, snapshot.in_washing, snapshot.washed), expected)
+
+    def test_record_many_upserts(self):
+        self.buy(self.bottle, 200)
+        tasks = [self.wash(self.bottle, 40) for _ in range(3)]
+
+        # New completed-washing rows for every task, then a mix of increases and decreases
+        StockMovement.record_many(self.bottle.id, 'complete_wash', 'task', [
+            (task.id, 20, None, 'Completed') for task in tasks
+        ])
+        self.assertBalancesMatchLedger()
+        StockMovement.record_many(self.bottle.id, 'complete_wash', 'task', [
+            (tasks[0].id, 40, 20, None),
+            (tasks[1].id, 5, 20, None),
+            (tasks[2].id, 20, 20, None),
+        ])
+        self.assertBalancesMatchLedger()
+        self.assertEqual(StockMovement.objects.filter(type='complete_wash').count(), 3)
+        self.assertEqual(self.bottle.current_stock, {'raw': 80, 'in_washing': 55, 'washed': 65, 'total': 145})
+
+    def test_rebuild_repairs_drift(self):
+        self.buy(self.bottle, 100)
+        StockBalance.objects.filter(product=self.bottle).update(raw=7)
+
+        mismatches = StockBalance.rebuild()
+        self.assertEqual(mismatches, [(self.bottle.id, (7, 0, 0), (100, 0, 0))])
+        self.assertBalancesMatchLedger()
+
+    def test_archived_sources_cannot_change(self):
+        item = self.buy(self.bottle, 100)
+        sale = self.sell(self.bottle, 'raw', 10)
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(days=800))
+        run = run_archive(StockArchiveRun.objects.create(cutoff=archive_cutoff()))
+        self.assertEqual(run.archived_count, 2)
+
+        sale.quantity = 15
+        with self.assertRaises(ValidationError):
+            sale.save()
+        item.quantity = 120
+        with self.assertRaises(ValidationError):
+            item.save()
+        with self.assertRaises(ValidationError):
+            StockSale.objects.get(pk=sale.pk).delete()
+        self.assertBalancesMatchLedger()
+        self.assertEqual(self.bottle.current_stock['raw'], 90)
+
+        # Fields that do not reach the ledger can still be edited
+        sale = StockSale.objects.get(pk=sale.pk)
+        sale.customer_name = 'Corner shop'
+        sale.save()
+        self.assertBalancesMatchLedger()
+        self.assertEqual(self.bottle.current_stock['raw'], 90)
@@ -3,8 +3,13 @@ from . import views
 
 urlpatterns = [
     path('', views.stock_overview, name='stock_overview'),
+    path('valuation/', views.stock_valuation, name='stock_valuation'),
     path('movements/', views.stock_movements, name='stock_movements'),
     path('sales/', views.stock_sales, name='stock_sales'),
     path('sell/', views.sell_stock, name='sell_stock'),
+    path('sell/bulk/', views.sell_stock_bulk, name='sell_stock_bulk'),
+    path('archive/', views.stock_archive_runs, name='stock_archive_runs'),
+    path('archive/movements/', views.archived_stock_movements, name='archived_stock_movements'),
+    path('archive/<uuid:run_id>/', views.stock_archive_run_detail, name='stock_archive_run_detail'),
     path('<uuid:product_id>/', views.product_stock_detail, name='product_stock_detail'),
 ]
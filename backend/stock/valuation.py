@@ -0,0 +1,131 @@
+"""
+Inventory valuation.
+
+Every stock movement posts its value change to StockValuation as it is
+recorded (see StockValuation.post): FIFO cost layers are consumed oldest
+first and moving-average costs are carried per stage, so each movement
+costs O(1) amortized work. Reads only combine the stored values with stock
+levels; as-of values sum the StockValuationEntry journal up to that moment.
+"""
+import heapq
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from products.models import Product
+from purchases.models import PurchaseItem
+from .models import (
+    MOVEMENT_EFFECTS, VALUATION_FLOWS, VALUATION_STAGES,
+    ArchivedStockMovement, CostLayer, StockBalance, StockMovement, StockValuation,
+    StockValuationEntry, movement_units, value_field
+)
+from .snapshots import as_stock, stock_as_of
+
+
+def get_valuation_method():
+    return getattr(settings, 'STOCK_VALUATION_METHOD', 'fifo')
+
+
+def valuation_rows(method, product_ids=None, as_of=None):
+    """
+    Stock levels and their value per product under `method`.
+
+    Current values come from the StockValuation rows; as-of values from one
+    aggregate over the valuation journal.
+    """
+    fields = [value_field(method, stage) for stage in VALUATION_STAGES]
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+
+    if as_of is None:
+        levels = {
+            product_id: (raw, in_washing, washed)
+            for product_id, raw, in_washing, washed in StockBalance.objects.filter(
+                product__in=products
+            ).values_list('product_id', 'raw', 'in_washing', 'washed')
+        }
+        values = {
+            row[0]: row[1:]
+            for row in StockValuation.objects.filter(product__in=products).values_list('product_id', *fields)
+        }
+    else:
+        levels = stock_as_of(as_of, product_ids)
+        entries = StockValuationEntry.objects.filter(effective_at__lte=as_of, product__in=products)
+        values = {
+            row['product_id']: tuple(row[field] for field in fields)
+            for row in entries.order_by().values('product_id').annotate(**{field: Sum(field) for field in fields})
+        }
+
+    rows = []
+    for product_id, name in products.values_list('id', 'name'):
+        stock = as_stock(levels.get(product_id, (0, 0, 0)))
+        raw_value, in_washing_value, washed_value = (value or Decimal(0) for value in values.get(product_id, (0, 0, 0)))
+        rows.append({
+            'product_id': product_id,
+            'product_name': name,
+            'raw_stock': stock['raw'],
+            'in_washing_stock': stock['in_washing'],
+            'washed_stock': stock['washed'],
+            'raw_value': raw_value,
+            'in_washing_value': in_washing_value,
+            'washed_value': washed_value,
+            'total_value': raw_value + in_washing_value + washed_value,
+        })
+    return rows
+
+
+def rebuild_valuation(product_ids=None):
+    """
+    Rebuild cost layers, valuations and the journal by replaying the full ledger,
+    archived movements included, in the order it was recorded.
+
+    Only needed once to bootstrap valuation for existing data or after manual
+    ledger repairs; normal writes keep valuation up to date incrementally.
+    Returns the number of movements replayed.
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    product_ids = list(products.values_list('id', flat=True))
+
+    fields = ('id', 'product_id', 'type', 'quantity', 'source_type', 'source_id', 'created_at')
+    # Carry-forward rows only summarize what the archive table holds in full
+    hot = StockMovement.objects.filter(product_id__in=product_ids).exclude(
+        source_type='carry_forward'
+    ).order_by('created_at', 'id').values_list(*fields)
+    archived = ArchivedStockMovement.objects.filter(product_id__in=product_ids).order_by(
+        'created_at', 'id'
+    ).values_list(*fields)
+
+    unit_costs = {
+        item_id: cost / quantity
+        for item_id, cost, quantity in PurchaseItem.objects.filter(
+            product_id__in=product_ids, quantity__gt=0
+        ).values_list('id', 'cost', 'quantity')
+    }
+
+    replayed = 0
+    with transaction.atomic():
+        CostLayer.objects.filter(product_id__in=product_ids).delete()
+        StockValuationEntry.objects.filter(product_id__in=product_ids).delete()
+        StockValuation.objects.filter(product_id__in=product_ids).delete()
+
+        levels = {}
+        movements = heapq.merge(hot.iterator(), archived.iterator(), key=lambda row: (row[6], row[0]))
+        for _, product_id, movement_type, quantity, source_type, source_id, created_at in movements:
+            if movement_type not in VALUATION_FLOWS:
+                continue
+            units = movement_units(movement_type, quantity)
+            current = levels.get(product_id, (0, 0, 0))
+            StockValuation.post(
+                product_id, movement_type, units, current,
+                unit_cost=unit_costs.get(source_id) if source_type == 'purchase_item' else None,
+                source_type=source_type,
+                source_id=source_id,
+                effective_at=created_at
+            )
+            levels[product_id] = tuple(level + factor * units for level, factor in zip(current, MOVEMENT_EFFECTS[movement_type]))
+            replayed += 1
+
+    return replayed
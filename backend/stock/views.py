@@ -3,57 +3,166 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from datetime import datetime, timedelta
 from products.models import Product
-from .models import StockMovement, StockSale
+from .models import StockMovement, StockSale, StockBalance, StockArchiveRun, ArchivedStockMovement, VALUATION_METHODS
 from .serializers import (
     StockMovementSerializer, StockSaleSerializer, 
-    StockSaleCreateSerializer, StockOverviewSerializer
+    StockSaleCreateSerializer, StockSaleBulkItemSerializer, StockOverviewSerializer,
+    StockArchiveRunSerializer, ArchivedStockMovementSerializer, StockValuationSerializer
 )
+from .overview import stock_overview_rows, stock_overview_rows_as_of, ORDERING_FIELDS
+from .snapshots import as_stock, parse_as_of, stock_as_of
+from .pagination import LedgerCursorPagination
+from .archive import archive_cutoff, start_archive_job
+from .valuation import get_valuation_method, valuation_rows
 from audit.utils import log_audit
+from collections import defaultdict
+from decimal import Decimal
+import json
+import uuid
+
+MAX_BULK_SALES = 1000
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def stock_overview(request):
     """Get aggregated stock overview for all products"""
     
-    products = Product.objects.all()
-    stock_data = []
+    # Restrict to a subset of products if specified (comma separated ids)
+    product_ids = None
+    product_ids_param = request.query_params.get('product_ids')
+    if product_ids_param:
+        try:
+            product_ids = [uuid.UUID(value.strip()) for value in product_ids_param.split(',') if value.strip()]
+        except ValueError:
+            return Response({'error': 'Invalid product_ids. Use comma separated product UUIDs.'}, status=status.HTTP_400_BAD_REQUEST)
     
-    for product in products:
-        current_stock = product.current_stock
-        stock_data.append({
-            'product_id': product.id,
-            'product_name': product.name,
-            'raw_stock': current_stock['raw'],
-            'washed_stock': current_stock['washed'],
-            'total_stock': current_stock['total'],
-            'purchase_price': product.purchase_price,
-            'wash_price': product.wash_price
-        })
+    # Sort by stock level if specified, e.g. ordering=-total_stock
+    ordering = request.query_params.get('ordering')
+    if ordering and ordering.lstrip('-') not in ORDERING_FIELDS:
+        return Response({'error': f'Invalid ordering. Choose from: {", ".join(ORDERING_FIELDS)}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Point-in-time overview if as_of is specified
+    as_of_param = request.query_params.get('as_of')
+    if as_of_param:
+        as_of = parse_as_of(as_of_param)
+        if as_of is None:
+            return Response({'error': 'Invalid as_of. Use an ISO date or datetime.'}, status=status.HTTP_400_BAD_REQUEST)
+        stock_data = stock_overview_rows_as_of(as_of, product_ids=product_ids, ordering=ordering)
+    else:
+        stock_data = stock_overview_rows(product_ids=product_ids, ordering=ordering)
     
     serializer = StockOverviewSerializer(stock_data, many=True)
     return Response(serializer.data)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stock_valuation(request):
+    """Get the cost value of raw, in-washing and washed stock per product"""
+    
+    method = request.query_params.get('method', get_valuation_method())
+    if method not in VALUATION_METHODS:
+        return Response({'error': f'Invalid method. Choose from: {", ".join(VALUATION_METHODS)}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Restrict to a subset of products if specified (comma separated ids)
+    product_ids = None
+    product_ids_param = request.query_params.get('product_ids')
+    if product_ids_param:
+        try:
+            product_ids = [uuid.UUID(value.strip()) for value in product_ids_param.split(',') if value.strip()]
+        except ValueError:
+            return Response({'error': 'Invalid product_ids. Use comma separated product UUIDs.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Point-in-time valuation if as_of is specified
+    as_of = None
+    as_of_param = request.query_params.get('as_of')
+    if as_of_param:
+        as_of = parse_as_of(as_of_param)
+        if as_of is None:
+            return Response({'error': 'Invalid as_of. Use an ISO date or datetime.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = valuation_rows(method, product_ids=product_ids, as_of=as_of)
+    serializer = StockValuationSerializer(rows, many=True)
+    return Response({
+        'method': method,
+        'as_of': as_of,
+        'total_value': str(sum(row['total_value'] for row in rows).quantize(Decimal('0.01'))),
+        'products': serializer.data
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def stock_movements(request):
     """Get stock movement history"""
     
-    movements = StockMovement.objects.all()
+    movements = StockMovement.objects.select_related('product')
     
     # Filter by product if specified
     product_id = request.query_params.get('product_id')
     if product_id:
         movements = movements.filter(product_id=product_id)
     
-    # Filter by movement type if specified
+    # Filter by movement type(s) if specified, e.g. type=purchase,sell_raw
     movement_type = request.query_params.get('type')
     if movement_type:
-        movements = movements.filter(type=movement_type)
+        movement_types = [value.strip() for value in movement_type.split(',') if value.strip()]
+        valid_types = dict(StockMovement.MOVEMENT_TYPES)
+        invalid_types = [value for value in movement_types if value not in valid_types]
+        if invalid_types:
+            return Response({'error': f'Invalid movement type(s): {", ".join(invalid_types)}'}, status=status.HTTP_400_BAD_REQUEST)
+        movements = movements.filter(type__in=movement_types)
+    
+    # Filter by date range if specified (as datetime bounds so the created_at indexes apply)
+    for param, lookup, offset in (('start_date', 'created_at__gte', 0), ('end_date', 'created_at__lt', 1)):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                day = datetime.strptime(value, '%Y-%m-%d') + timedelta(days=offset)
+            except ValueError:
+                return Response({'error': f'Invalid {param} format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+            movements = movements.filter(**{lookup: timezone.make_aware(day)})
+    
+    # Stream the whole (filtered) ledger as NDJSON without materializing it
+    if request.query_params.get('export') == 'ndjson':
+        response = StreamingHttpResponse(
+            stream_movements_ndjson(movements),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="stock_movements.ndjson"'
+        return response
+    
+    # Keyset pagination on (created_at, id) when a cursor or page_size is requested
+    if LedgerCursorPagination.is_requested(request):
+        paginator = LedgerCursorPagination()
+        page = paginator.paginate_queryset(movements, request)
+        serializer = StockMovementSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
-    serializer = StockMovementSerializer(movements, many=True)
+    serializer = StockMovementSerializer(movements.order_by(*LedgerCursorPagination.ordering), many=True)
     return Response(serializer.data)
 
+def stream_movements_ndjson(movements, chunk_size=2000):
+    """Yield one JSON document per movement, reading the ledger in chunks"""
+    fields = ('id', 'product_id', 'product__name', 'type', 'quantity', 'reference_id', 'notes', 'created_at')
+    rows = movements.order_by(*LedgerCursorPagination.ordering).values_list(*fields)
+    
+    for movement_id, product_id, product_name, movement_type, quantity, reference_id, notes, created_at in rows.iterator(chunk_size=chunk_size):
+        yield json.dumps({
+            'id': movement_id,
+            'product': product_id,
+            'product_name': product_name,
+            'type': movement_type,
+            'quantity': quantity,
+            'reference_id': reference_id,
+            'notes': notes,
+            'created_at': created_at
+        }, cls=DjangoJSONEncoder) + '\n'
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def sell_stock(request):
@@ -74,6 +183,105 @@ def sell_stock(request):
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sell_stock_bulk(request):
+    """Record many stock sales in one transaction"""
+    
+    items = request.data.get('sales') if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'Provide a non-empty list of sales.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_SALES:
+        return Response({'error': f'At most {MAX_BULK_SALES} sales per request.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Field validation per item
+    errors = {}
+    sales_data = []
+    for index, item in enumerate(items):
+        serializer = StockSaleBulkItemSerializer(data=item)
+        if serializer.is_valid():
+            sales_data.append(serializer.validated_data)
+        else:
+            errors[index] = serializer.errors
+            sales_data.append(None)
+    
+    products = Product.objects.in_bulk({data['product'] for data in sales_data if data})
+    for index, data in enumerate(sales_data):
+        if data and data['product'] not in products:
+            errors[index] = {'product': [f'Invalid pk "{data["product"]}" - object does not exist.']}
+    
+    if errors:
+        return Response({'errors': bulk_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        # One locked stock read per product, then check the running totals item by item
+        balances = StockBalance.lock_many(products.keys())
+        available = {
+            (product_id, sale_type): balance.as_stock()[sale_type]
+            for product_id, balance in balances.items()
+            for sale_type, _ in StockSale.SALE_TYPES
+        }
+        for index, data in enumerate(sales_data):
+            key = (data['product'], data['sale_type'])
+            if available[key] < data['quantity']:
+                errors[index] = {'non_field_errors': [f"Insufficient {data['sale_type']} stock. Available: {available[key]}"]}
+            else:
+                available[key] -= data['quantity']
+        
+        if errors:
+            return Response({'errors': bulk_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        sales = StockSale.objects.bulk_create([
+            StockSale(
+                product=products[data['product']],
+                sale_type=data['sale_type'],
+                quantity=data['quantity'],
+                price_per_unit=data['price_per_unit'],
+                total_amount=data['quantity'] * data['price_per_unit'],
+                customer_name=data.get('customer_name'),
+                notes=data.get('notes'),
+                date=data['date']
+            )
+            for data in sales_data
+        ])
+        
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product=sale.product,
+                type='sell_raw' if sale.sale_type == 'raw' else 'sell_washed',
+                quantity=-sale.quantity,  # Negative because it's outgoing
+                reference_id=str(sale.id),
+                source_type='stock_sale',
+                source_id=sale.id,
+                notes=f"Sale to {sale.customer_name or 'Customer'}"
+            )
+            for sale in sales
+        ])
+        
+        # bulk_create skips StockMovement.save, so apply the balance changes per product
+        sold = defaultdict(int)
+        for sale in sales:
+            sold[(sale.product_id, 'sell_raw' if sale.sale_type == 'raw' else 'sell_washed')] += sale.quantity
+        for (product_id, movement_type), quantity in sold.items():
+            StockBalance.apply(product_id, movement_type, quantity)
+        
+        total_amount = sum(sale.total_amount for sale in sales)
+        log_audit(
+            user=request.user,
+            action='SELL_STOCK_BULK',
+            details=f'Recorded {len(sales)} sales ({sum(sale.quantity for sale in sales)} units) for ${total_amount}'
+        )
+    
+    return Response({
+        'count': len(sales),
+        'total_amount': total_amount,
+        'sales': StockSaleSerializer(sales, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
+def bulk_errors(errors):
+    """Per-item error list for bulk endpoints, ordered by item index"""
+    return [{'index': index, 'errors': item_errors} for index, item_errors in sorted(errors.items())]
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def stock_sales(request):
@@ -100,15 +308,26 @@ def product_stock_detail(request, product_id):
     """Get detailed stock information for a specific product"""
     
     product = get_object_or_404(Product, id=product_id)
-    current_stock = product.current_stock
+    recent_movements = StockMovement.objects.filter(product=product).select_related('product')
+    recent_sales = StockSale.objects.filter(product=product).select_related('product')
+    
+    # Point-in-time stock if as_of is specified
+    as_of_param = request.query_params.get('as_of')
+    if as_of_param:
+        as_of = parse_as_of(as_of_param)
+        if as_of is None:
+            return Response({'error': 'Invalid as_of. Use an ISO date or datetime.'}, status=status.HTTP_400_BAD_REQUEST)
+        current_stock = as_stock(stock_as_of(as_of, [product.id]).get(product.id, (0, 0, 0)))
+        recent_movements = recent_movements.filter(created_at__lte=as_of)
+        recent_sales = recent_sales.filter(created_at__lte=as_of)
+    else:
+        current_stock = product.current_stock
     
     # Get recent movements for this product
-    recent_movements = StockMovement.objects.filter(product=product)[:10]
-    movements_serializer = StockMovementSerializer(recent_movements, many=True)
+    movements_serializer = StockMovementSerializer(recent_movements[:10], many=True)
     
     # Get recent sales for this product
-    recent_sales = StockSale.objects.filter(product=product)[:10]
-    sales_serializer = StockSaleSerializer(recent_sales, many=True)
+    sales_serializer = StockSaleSerializer(recent_sales[:10], many=True)
     
     return Response({
         'product': {
@@ -121,3 +340,84 @@ def product_stock_detail(request, product_id):
         'recent_movements': movements_serializer.data,
         'recent_sales': sales_serializer.data
     })
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def stock_archive_runs(request):
+    """List ledger archive runs or start a new one (Admin only)"""
+    
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    if request.method == 'GET':
+        runs = StockArchiveRun.objects.select_related('triggered_by')
+        serializer = StockArchiveRunSerializer(runs, many=True)
+        return Response(serializer.data)
+    
+    elif request.method == 'POST':
+        horizon_days = request.data.get('older_than_days')
+        try:
+            horizon_days = int(horizon_days) if horizon_days is not None else None
+        except (TypeError, ValueError):
+            return Response({'error': 'older_than_days must be a whole number of days.'}, status=status.HTTP_400_BAD_REQUEST)
+        if horizon_days is not None and horizon_days < 1:
+            return Response({'error': 'older_than_days must be at least 1.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if StockArchiveRun.objects.filter(status__in=['pending', 'running']).exists():
+            return Response({'error': 'An archive run is already in progress.'}, status=status.HTTP_409_CONFLICT)
+        
+        run = StockArchiveRun.objects.create(cutoff=archive_cutoff(horizon_days=horizon_days), triggered_by=request.user)
+        start_archive_job(run)
+        
+        # Log audit trail
+        log_audit(
+            user=request.user,
+            action='ARCHIVE_STOCK',
+            details=f'Started stock ledger archive for movements before {run.cutoff:%Y-%m-%d}'
+        )
+        
+        return Response(StockArchiveRunSerializer(run).data, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stock_archive_run_detail(request, run_id):
+    """Get the status of a ledger archive run (Admin only)"""
+    
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    run = get_object_or_404(StockArchiveRun.objects.select_related('triggered_by'), id=run_id)
+    return Response(StockArchiveRunSerializer(run).data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def archived_stock_movements(request):
+    """Browse archived stock movements for audits (Admin only)"""
+    
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    movements = ArchivedStockMovement.objects.select_related('product')
+    
+    # Filter by product if specified
+    product_id = request.query_params.get('product_id')
+    if product_id:
+        movements = movements.filter(product_id=product_id)
+    
+    # Filter by archived month if specified, e.g. period=2025-01
+    period = request.query_params.get('period')
+    if period:
+        try:
+            movements = movements.filter(period=datetime.strptime(period, '%Y-%m').date())
+        except ValueError:
+            return Response({'error': 'Invalid period format. Use YYYY-MM.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Filter by source record if specified
+    reference_id = request.query_params.get('reference_id')
+    if reference_id:
+        movements = movements.filter(reference_id=reference_id)
+    
+    paginator = LedgerCursorPagination()
+    page = paginator.paginate_queryset(movements, request)
+    serializer = ArchivedStockMovementSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Task
+from .models import Task, TaskDailyStats
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
@@ -32,3 +32,15 @@ class TaskAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         })
     )
+
+@admin.register(TaskDailyStats)
+class TaskDailyStatsAdmin(admin.ModelAdmin):
+    """Admin configuration for TaskDailyStats model (maintained automatically)"""
+    
+    list_display = ['date', 'worker', 'product', 'task_type', 'status', 'task_count', 'net_pay']
+    list_filter = ['task_type', 'status', 'date']
+    ordering = ['-date']
+    readonly_fields = [
+        'id', 'date', 'worker', 'product', 'task_type', 'status', 'task_count',
+        'assigned_quantity', 'washed_quantity', 'salary', 'deduction', 'net_pay', 'updated_at'
+    ]
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from tasks.models import TaskDailyStats
+
+class Command(BaseCommand):
+    help = 'Rebuild the TaskDailyStats rollup from the tasks table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare the stored rollup with a full recompute, do not write')
+
+    def handle(self, *args, **options):
+        verify = options['verify']
+        mismatches = TaskDailyStats.rebuild(dry_run=verify)
+
+        for key, stored, expected in mismatches:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {key}: stored {stored} != tasks {expected} (count, assigned, washed, salary, deduction, net_pay)')
+            )
+
+        if verify:
+            if mismatches:
+                self.stdout.write(self.style.ERROR(f'❌ {len(mismatches)} rollup row(s) out of sync with the tasks table'))
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS('✅ Task statistics rollup matches the tasks table'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt task statistics rollup ({len(mismatches)} corrected)'))
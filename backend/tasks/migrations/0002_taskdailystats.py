@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def populate_stats(apps, schema_editor):
+    """Seed the TaskDailyStats rollup from the existing tasks"""
+    Task = apps.get_model('tasks', 'Task')
+    TaskDailyStats = apps.get_model('tasks', 'TaskDailyStats')
+
+    rows = Task.objects.order_by().values('date', 'worker_id', 'product_id', 'task_type', 'status').annotate(
+        task_count=models.Count('id'),
+        total_assigned=models.Sum('assigned_quantity'),
+        total_washed=models.Sum('washed_quantity'),
+        total_salary=models.Sum('salary'),
+        total_deduction=models.Sum('deduction'),
+        total_net_pay=models.Sum('net_pay'),
+    )
+    TaskDailyStats.objects.bulk_create([
+        TaskDailyStats(
+            date=row['date'],
+            worker_id=row['worker_id'],
+            product_id=row['product_id'],
+            task_type=row['task_type'],
+            status=row['status'],
+            task_count=row['task_count'],
+            assigned_quantity=row['total_assigned'],
+            washed_quantity=row['total_washed'],
+            salary=row['total_salary'],
+            deduction=row['total_deduction'],
+            net_pay=row['total_net_pay'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('workers', '0003_workerhistory'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDailyStats',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('task_type', models.CharField(choices=[('washing', 'Washing Task'), ('daily_salary', 'Daily Salary')], max_length=20)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=20)),
+                ('task_count', models.IntegerField(default=0)),
+                ('assigned_quantity', models.IntegerField(default=0)),
+                ('washed_quantity', models.IntegerField(default=0)),
+                ('salary', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('deduction', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_daily_stats', to='products.product')),
+                ('worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='workers.worker')),
+            ],
+            options={
+                'db_table': 'task_daily_stats',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='task_stats_date_idx'), models.Index(fields=['worker', 'date'], name='task_stats_worker_date_idx')],
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:14
+
+from importlib import import_module
+from django.db import migrations, models
+
+rollup = import_module('tasks.migrations.0002_taskdailystats')
+
+
+def merge_duplicate_rows(apps, schema_editor):
+    """Concurrent first writes may have left several rows per key; reseed the rollup from tasks"""
+    apps.get_model('tasks', 'TaskDailyStats').objects.all().delete()
+    rollup.populate_stats(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_taskdailystats'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='taskdailystats',
+            constraint=models.UniqueConstraint(condition=models.Q(('product__isnull', False)), fields=('date', 'worker', 'product', 'task_type', 'status'), name='unique_task_daily_stats'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailystats',
+            constraint=models.UniqueConstraint(condition=models.Q(('product__isnull', True)), fields=('date', 'worker', 'task_type', 'status'), name='unique_task_daily_stats_no_product'),
+        ),
+    ]
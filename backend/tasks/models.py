@@ -1,9 +1,24 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Sum
 from workers.models import Worker
 from products.models import Product
 import uuid
 from decimal import Decimal
 
+# Task columns the rollups maintained on task writes group and sum by
+ROLLUP_TASK_FIELDS = (
+    'date', 'worker_id', 'product_id', 'task_type', 'status',
+    'assigned_quantity', 'washed_quantity', 'salary', 'deduction', 'net_pay'
+)
+
+def apply_task_rollups(added=(), removed=()):
+    """Post Task.rollup_entry() changes to every rollup maintained on task writes"""
+    from salaries.models import WorkerBalance, WorkerDailyEarnings
+    
+    for rollup in (TaskDailyStats, WorkerDailyEarnings):
+        rollup.apply(added=added, removed=removed)
+    WorkerBalance.apply_tasks(added=added, removed=removed)
+
 class Task(models.Model):
     """Task model for tracking worker assignments and salaries"""
     
@@ -34,6 +49,31 @@ class Task(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def save(self, *args, **kwargs):
+        self.update_derived_fields()
+        
+        with transaction.atomic():
+            posted = self._get_posted_quantities()
+            posted_entry = self._get_posted_rollup_entry()
+            super().save(*args, **kwargs)
+            
+            # Create stock movements for washing tasks
+            if self.task_type == 'washing' and self.product_id:
+                self._create_stock_movements(*posted)
+            self._posted_quantities = (self.assigned_quantity, self.washed_quantity)
+            
+            apply_task_rollups(added=[self.rollup_entry()], removed=[posted_entry] if posted_entry else [])
+            self._posted_rollup_entry = self.rollup_entry()
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            posted_entry = self._get_posted_rollup_entry()
+            result = super().delete(*args, **kwargs)
+            if posted_entry:
+                apply_task_rollups(removed=[posted_entry])
+        return result
+    
+    def update_derived_fields(self):
+        """Recompute net pay and progress status; also used by bulk writes that skip save()"""
         # Calculate net pay
         self.net_pay = self.salary - self.deduction
         
@@ -44,50 +84,72 @@ class Task(models.Model):
             self.status = 'Completed'
         elif self.washed_quantity > 0:
             self.status = 'In Progress'
-        
-        super().save(*args, **kwargs)
-        
-        # Create stock movements for washing tasks
-        if self.task_type == 'washing' and self.product:
-            self._create_stock_movements()
     
-    def _create_stock_movements(self):
-        """Create stock movements for washing tasks"""
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the posted quantities so save() only sends the ledger the difference
+        loaded = dict(zip(field_names, values))
+        posted = (loaded.get('assigned_quantity', models.DEFERRED), loaded.get('washed_quantity', models.DEFERRED))
+        if models.DEFERRED not in posted:
+            instance._posted_quantities = posted
+        if all(field in loaded for field in ROLLUP_TASK_FIELDS):
+            instance._posted_rollup_entry = instance.rollup_entry()
+        return instance
+    
+    def rollup_entry(self):
+        """The task's ROLLUP_TASK_FIELDS values, as counted by the rollups"""
+        entry = {field: getattr(self, field) for field in ROLLUP_TASK_FIELDS}
+        # Dates may still be ISO strings when assigned directly
+        entry['date'] = self._meta.get_field('date').to_python(entry['date'])
+        return entry
+    
+    def _get_posted_rollup_entry(self):
+        """Rollup entry already counted for this task, or None for a new task"""
+        if self._state.adding:
+            return None
+        if hasattr(self, '_posted_rollup_entry'):
+            return self._posted_rollup_entry
+        return Task.objects.filter(pk=self.pk).values(*ROLLUP_TASK_FIELDS).first()
+    
+    def _get_posted_quantities(self):
+        """(assigned, washed) quantities already posted to the ledger, or (None, None) for a new task"""
+        if self._state.adding:
+            return None, None
+        if hasattr(self, '_posted_quantities'):
+            return self._posted_quantities
+        return Task.objects.filter(pk=self.pk).values_list(
+            'assigned_quantity', 'washed_quantity'
+        ).first() or (None, None)
+    
+    def _create_stock_movements(self, previous_assigned, previous_washed):
+        """Upsert the stock movements of a washing task, posting only what changed"""
         from stock.models import StockMovement
         
-        # Create movement for assigned washing (raw -> in progress)
-        if self.assigned_quantity > 0:
-            StockMovement.objects.get_or_create(
-                product=self.product,
-                type='assign_wash',
-                quantity=self.assigned_quantity,
-                reference_id=str(self.id),
-                defaults={
-                    'notes': f'Assigned to {self.worker.name} for washing',
-                    'created_at': self.created_at
-                }
+        # Movement for assigned washing (raw -> in progress)
+        if self.assigned_quantity > 0 and self.assigned_quantity != previous_assigned:
+            StockMovement.record(
+                self.product_id,
+                'assign_wash',
+                self.assigned_quantity,
+                source_type='task',
+                source_id=self.id,
+                previous_quantity=previous_assigned,
+                notes=f'Assigned to {self.worker.name} for washing'
             )
         
-        # Create movement for completed washing (in progress -> washed)
-        if self.washed_quantity > 0:
-            # Check if movement already exists to avoid duplicates
-            existing_movement = StockMovement.objects.filter(
-                product=self.product,
-                type='complete_wash',
-                reference_id=str(self.id)
-            ).first()
-            
-            if existing_movement:
-                existing_movement.quantity = self.washed_quantity
-                existing_movement.save()
-            else:
-                StockMovement.objects.create(
-                    product=self.product,
-                    type='complete_wash',
-                    quantity=self.washed_quantity,
-                    reference_id=str(self.id),
-                    notes=f'Completed by {self.worker.name}'
-                )
+        # Movement for completed washing (in progress -> washed)
+        if self.washed_quantity != (previous_washed or 0):
+            StockMovement.record(
+                self.product_id,
+                'complete_wash',
+                self.washed_quantity,
+                source_type='task',
+                source_id=self.id,
+                previous_quantity=previous_washed,
+                # Notes are only written when the row is first inserted
+                notes=f'Completed by {self.worker.name}' if not previous_washed else None
+            )
     
     @property
     def completion_percentage(self):
@@ -104,3 +166,178 @@ class Task(models.Model):
     class Meta:
         db_table = 'tasks'
         ordering = ['-date', '-created_at']
+
+
+class TaskRollup(models.Model):
+    """
+    Base for tables that sum tasks by a key and are maintained on every task write.
+    
+    Subclasses name their key columns, a task count column and summed columns, all
+    matching Task attnames, plus the field values a task needs to be counted.
+    """
+    
+    key_fields = ()
+    count_field = 'task_count'
+    value_fields = ()
+    task_conditions = {}
+    
+    @classmethod
+    def contribution(cls, entry):
+        """(key, values) a Task.rollup_entry() adds to this rollup, or None if it is not counted"""
+        if any(entry[field] != value for field, value in cls.task_conditions.items()):
+            return None
+        return tuple(entry[field] for field in cls.key_fields), tuple(entry[field] for field in cls.value_fields)
+    
+    @classmethod
+    def _rows_for(cls, keys):
+        """Locked rows that may match `keys`, narrowed on every key column without NULLs"""
+        lookups = {}
+        for index, field in enumerate(cls.key_fields):
+            values = {key[index] for key in keys}
+            if None not in values:
+                lookups[f'{field}__in'] = values
+        rows = {}
+        for row in cls.objects.select_for_update().filter(**lookups):
+            rows.setdefault(tuple(getattr(row, field) for field in cls.key_fields), row)
+        return rows
+    
+    @classmethod
+    def apply(cls, added=(), removed=()):
+        """
+        Add and remove Task.rollup_entry() contributions with a constant number of queries.
+        
+        Missing rows are inserted empty first (ignoring conflicts with concurrent writers,
+        which subclasses' unique constraints on the key turn into skipped rows) and then
+        locked and updated with the rest. Rows that no longer count any task are deleted.
+        """
+        changes = {}
+        for sign, entries in ((1, added), (-1, removed)):
+            for entry in entries:
+                counted = cls.contribution(entry)
+                if counted is None:
+                    continue
+                key, values = counted
+                totals = changes.setdefault(key, [0] * (len(values) + 1))
+                totals[0] += sign
+                for index, value in enumerate(values, start=1):
+                    totals[index] += sign * value
+        changes = {key: totals for key, totals in changes.items() if any(totals)}
+        if not changes:
+            return
+        
+        rows = cls._rows_for(changes)
+        missing = [key for key in changes if key not in rows]
+        if missing:
+            cls.objects.bulk_create([cls(**dict(zip(cls.key_fields, key))) for key in missing], ignore_conflicts=True)
+            rows.update(cls._rows_for(missing))
+        
+        updated, emptied = [], []
+        for key, (count, *amounts) in changes.items():
+            row = rows[key]
+            setattr(row, cls.count_field, getattr(row, cls.count_field) + count)
+            for field, amount in zip(cls.value_fields, amounts):
+                setattr(row, field, getattr(row, field) + amount)
+            (updated if getattr(row, cls.count_field) else emptied).append(row)
+        
+        cls.objects.bulk_update(updated, [cls.count_field, *cls.value_fields])
+        if emptied:
+            cls.objects.filter(pk__in=[row.pk for row in emptied]).delete()
+    
+    @classmethod
+    def compute_from_tasks(cls):
+        """Recompute the rollup from the tasks table as {key: (count, *values)}"""
+        rows = Task.objects.filter(**cls.task_conditions).order_by().values(*cls.key_fields).annotate(
+            rollup_count=Count('id'),
+            **{f'total_{field}': Sum(field) for field in cls.value_fields}
+        )
+        return {
+            tuple(row[field] for field in cls.key_fields): (row['rollup_count'], *(row[f'total_{field}'] for field in cls.value_fields))
+            for row in rows
+        }
+    
+    @classmethod
+    def rebuild(cls, dry_run=False):
+        """
+        Rebuild the rollup from the tasks table.
+        
+        Returns a list of (key, stored, expected) tuples for every key that differed.
+        """
+        with transaction.atomic():
+            expected = cls.compute_from_tasks()
+            stored = {}
+            for row in cls.objects.select_for_update():
+                key = tuple(getattr(row, field) for field in cls.key_fields)
+                totals = stored.get(key, (0,) * (len(cls.value_fields) + 1))
+                values = (getattr(row, cls.count_field), *(getattr(row, field) for field in cls.value_fields))
+                stored[key] = tuple(total + value for total, value in zip(totals, values))
+            
+            mismatches = [
+                (key, stored.get(key), expected.get(key))
+                for key in stored.keys() | expected.keys()
+                if stored.get(key) != expected.get(key)
+            ]
+            if mismatches and not dry_run:
+                cls.objects.all().delete()
+                cls.objects.bulk_create([
+                    cls(
+                        **dict(zip(cls.key_fields, key)),
+                        **{cls.count_field: values[0]},
+                        **dict(zip(cls.value_fields, values[1:]))
+                    )
+                    for key, values in expected.items()
+                ], batch_size=1000)
+        
+        return mismatches
+    
+    class Meta:
+        abstract = True
+
+
+class TaskDailyStats(TaskRollup):
+    """
+    Task counts, quantities and pay per day, worker, product, type and status.
+    
+    Maintained on every task write so statistics over a date range sum a few
+    rollup rows instead of scanning the tasks table.
+    """
+    
+    key_fields = ('date', 'worker_id', 'product_id', 'task_type', 'status')
+    value_fields = ('assigned_quantity', 'washed_quantity', 'salary', 'deduction', 'net_pay')
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    date = models.DateField()
+    worker = models.ForeignKey(Worker, on_delete=models.CASCADE, related_name='daily_stats')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='task_daily_stats')
+    task_type = models.CharField(max_length=20, choices=Task.TASK_TYPES)
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    task_count = models.IntegerField(default=0)
+    assigned_quantity = models.IntegerField(default=0)
+    washed_quantity = models.IntegerField(default=0)
+    salary = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    deduction = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    net_pay = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.date} - {self.worker_id} - {self.task_type} / {self.status}: {self.task_count}"
+    
+    class Meta:
+        db_table = 'task_daily_stats'
+        ordering = ['-date']
+        constraints = [
+            # Daily salary tasks have no product, and NULLs never conflict, so they get their own key
+            models.UniqueConstraint(
+                fields=['date', 'worker', 'product', 'task_type', 'status'],
+                condition=models.Q(product__isnull=False),
+                name='unique_task_daily_stats'
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'worker', 'task_type', 'status'],
+                condition=models.Q(product__isnull=True),
+                name='unique_task_daily_stats_no_product'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='task_stats_date_idx'),
+            models.Index(fields=['worker', 'date'], name='task_stats_worker_date_idx'),
+        ]
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import Task
 from workers.serializers import WorkerSummarySerializer
 from products.serializers import ProductSerializer
+from stock.models import ArchivedStockMovement
 
 class TaskSerializer(serializers.ModelSerializer):
     """Serializer for Task model"""
@@ -18,6 +19,13 @@ class TaskSerializer(serializers.ModelSerializer):
             'net_pay', 'completion_percentage', 'date', 'notes', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'net_pay', 'status', 'created_at', 'updated_at']
+    
+    # Columns task lists load for this serializer (worker and product come from select_related)
+    list_columns = [
+        'id', 'worker', 'worker__name', 'product', 'product__name', 'task_type',
+        'assigned_quantity', 'washed_quantity', 'status', 'salary', 'deduction',
+        'net_pay', 'date', 'notes', 'created_at', 'updated_at'
+    ]
 
 class TaskCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating tasks"""
@@ -42,6 +50,36 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         
         return attrs
 
+class TaskBulkAssignItemSerializer(serializers.Serializer):
+    """Serializer for one washing assignment in a bulk assignment request (stock is checked per batch in the view)"""
+    
+    worker = serializers.UUIDField()
+    product = serializers.UUIDField()
+    assigned_quantity = serializers.IntegerField()
+    salary = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, default=0)
+    deduction = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, default=0)
+    date = serializers.DateField(required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    
+    def validate_assigned_quantity(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Assigned quantity must be greater than 0 for washing tasks")
+        return value
+
+class TaskBulkProgressItemSerializer(serializers.Serializer):
+    """Serializer for one task in a bulk progress update (checked against the stored tasks in the view)"""
+    
+    id = serializers.UUIDField()
+    washed_quantity = serializers.IntegerField(required=False)
+    salary = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    deduction = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    
+    def validate_washed_quantity(self, value):
+        if value < 0:
+            raise serializers.ValidationError("Washed quantity cannot be negative")
+        return value
+
 class TaskUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating tasks"""
     
@@ -58,6 +96,12 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
         if task and task.task_type == 'washing' and value > task.assigned_quantity:
             raise serializers.ValidationError(f"Washed quantity cannot exceed assigned quantity ({task.assigned_quantity})")
         
+        # Stock movements moved to the ledger archive can no longer be changed
+        if task and value != task.washed_quantity and ArchivedStockMovement.objects.filter(
+            source_type='task', source_id=task.id
+        ).exists():
+            raise serializers.ValidationError("This task's stock movements have been archived and can no longer be changed")
+        
         return value
 
 class DailySalaryTaskSerializer(serializers.ModelSerializer):
@@ -79,3 +123,5 @@ class TaskSummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['id', 'worker_name', 'product_name', 'task_type', 'status', 'net_pay', 'date']
+    
+    list_columns = ['id', 'worker', 'worker__name', 'product', 'product__name', 'task_type', 'status', 'net_pay', 'date']
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent with the list of tasks and whether they were created whenever tasks are
+# written with bulk_create or bulk_update, which skip post_save
+tasks_bulk_saved = Signal()
@@ -0,0 +1,113 @@
+"""
+Task statistics engine.
+
+Computes status counts, pay totals and recent activity in a single conditional
+aggregation query, either over the TaskDailyStats rollup (a few rows per day)
+or directly over the tasks table.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Task, TaskDailyStats
+
+RECENT_ACTIVITY_DAYS = 30
+
+# Columns each group_by value groups on, in output order
+GROUP_BY_FIELDS = {
+    'worker': ('worker_id', 'worker__name'),
+    'product': ('product_id', 'product__name'),
+    'day': ('date',),
+}
+
+GROUP_OUTPUT_NAMES = {
+    'worker__name': 'worker_name',
+    'product__name': 'product_name',
+}
+
+STATUS_COUNTS = {
+    'completed': 'Completed',
+    'pending': 'Pending',
+    'in_progress': 'In Progress',
+}
+
+SALARY_TOTALS = {
+    'total_salary': 'salary',
+    'total_deductions': 'deduction',
+    'total_net_pay': 'net_pay',
+}
+
+
+def get_use_rollup():
+    return getattr(settings, 'TASK_STATS_FROM_ROLLUP', True)
+
+
+def _aggregates(from_rollup, recent_since):
+    """Aggregate expressions for one statistics row over the rollup or the tasks table"""
+    def count(condition=None):
+        if from_rollup:
+            return Coalesce(Sum('task_count', filter=condition), Value(0))
+        return Count('id', filter=condition)
+
+    aggregates = {'total': count(), 'tasks_last_30_days': count(Q(date__gte=recent_since))}
+    for name, task_status in STATUS_COUNTS.items():
+        aggregates[name] = count(Q(status=task_status))
+    for name, field in SALARY_TOTALS.items():
+        aggregates[name] = Sum(field)
+    return aggregates
+
+
+def _format(row):
+    """Statistics row in the response shape of /api/tasks/statistics/"""
+    return {
+        'task_counts': {'total': row['total'], **{name: row[name] for name in STATUS_COUNTS}},
+        'salary_summary': {name: row[name] for name in SALARY_TOTALS},
+        'recent_activity': {'tasks_last_30_days': row['tasks_last_30_days']},
+    }
+
+
+def _sum_rows(rows):
+    """Add grouped statistics rows into one overall row"""
+    totals = {}
+    for name in ('total', 'tasks_last_30_days', *STATUS_COUNTS):
+        totals[name] = sum(row[name] for row in rows)
+    for name in SALARY_TOTALS:
+        values = [row[name] for row in rows if row[name] is not None]
+        totals[name] = sum(values) if values else None
+    return totals
+
+
+def compute_task_statistics(start_date=None, end_date=None, group_by=None, from_rollup=None):
+    """
+    Task statistics, optionally restricted to a date range and broken down by group.
+
+    Args:
+        start_date: Optional first task date (inclusive)
+        end_date: Optional last task date (inclusive)
+        group_by: Optional key from GROUP_BY_FIELDS; adds a 'groups' list
+        from_rollup: Read TaskDailyStats instead of tasks (defaults to TASK_STATS_FROM_ROLLUP)
+    """
+    if from_rollup is None:
+        from_rollup = get_use_rollup()
+    source = TaskDailyStats.objects.all() if from_rollup else Task.objects.all()
+    if start_date:
+        source = source.filter(date__gte=start_date)
+    if end_date:
+        source = source.filter(date__lte=end_date)
+
+    recent_since = timezone.now().date() - timedelta(days=RECENT_ACTIVITY_DAYS)
+    aggregates = _aggregates(from_rollup, recent_since)
+
+    if not group_by:
+        return _format(source.aggregate(**aggregates))
+
+    # One grouped query; the overall figures are the sum of the groups
+    fields = GROUP_BY_FIELDS[group_by]
+    rows = list(source.order_by().values(*fields).annotate(**aggregates).order_by(fields[-1]))
+    statistics = _format(_sum_rows(rows))
+    statistics['groups'] = [
+        {**{GROUP_OUTPUT_NAMES.get(field, field): row[field] for field in fields}, **_format(row)}
+        for row in rows
+    ]
+    return statistics
@@ -0,0 +1,180 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from authentication.models import User
+from products.models import Product
+from purchases.models import Purchase, PurchaseItem
+from workers.models import Worker
+from .models import Task, TaskDailyStats
+from .statistics import compute_task_statistics
+
+
+class TaskListQueryCountTests(TestCase):
+    """The task list endpoints take the same number of queries however many rows they return"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='lister', password='unused-password', role='admin'))
+        self.products = [
+            Product.objects.create(name=f'Bottle {index}', purchase_price=Decimal('5.00'), wash_price=Decimal('2.00'))
+            for index in range(3)
+        ]
+        self.workers = [
+            Worker.objects.create(name=f'Washer {index}', phone_number='0700000000', id_number=f'TASKS-{index:04d}')
+            for index in range(3)
+        ]
+
+    def add_tasks(self, count):
+        for index in range(count):
+            Task.objects.create(
+                worker=self.workers[index % len(self.workers)],
+                product=self.products[index % len(self.products)],
+                assigned_quantity=10,
+                washed_quantity=index % 11,
+                salary=Decimal('20.00'),
+                date=date.today() - timedelta(days=index % 5)
+            )
+
+    def assertConstantQueries(self, url, params, queries):
+        for count in (3, 30):
+            self.add_tasks(count)
+            with self.assertNumQueries(queries):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+
+    def test_task_list(self):
+        self.assertConstantQueries('/api/tasks/', {}, 1)
+
+    def test_task_list_summary(self):
+        self.assertConstantQueries('/api/tasks/', {'summary': 'true'}, 1)
+
+    def test_task_list_paginated(self):
+        for page_size in (5, 25):
+            with self.subTest(page_size=page_size):
+                # Page count query plus the page itself
+                self.assertConstantQueries('/api/tasks/', {'page_size': page_size}, 2)
+
+    def test_worker_tasks(self):
+        url = f'/api/tasks/worker/{self.workers[0].id}/'
+        self.assertConstantQueries(url, {}, 1)
+        for page_size in (2, 10):
+            with self.subTest(page_size=page_size):
+                self.assertConstantQueries(url, {'page_size': page_size}, 2)
+
+    def test_list_rows(self):
+        self.add_tasks(6)
+        response = self.client.get('/api/tasks/', {'page_size': 4})
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual(len(response.data['results']), 4)
+        row = response.data['results'][0]
+        task = Task.objects.select_related('worker', 'product').get(pk=row['id'])
+        self.assertEqual(row['worker_name'], task.worker.name)
+        self.assertEqual(row['product_name'], task.product.name)
+
+
+class TaskRollupTests(TestCase):
+    """The TaskDailyStats rollup gives the same statistics as the tasks table after every kind of write"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='rollup', password='unused-password', role='admin'))
+        self.product = Product.objects.create(name='Bottle', purchase_price=Decimal('5.00'), wash_price=Decimal('2.00'))
+        self.workers = [
+            Worker.objects.create(name=f'Washer {index}', phone_number='0700000000', id_number=f'ROLLUP-{index:04d}')
+            for index in range(2)
+        ]
+        purchase = Purchase.objects.create(total_cost=Decimal('5000.00'), date=date.today())
+        PurchaseItem.objects.create(purchase=purchase, product=self.product, quantity=1000, cost=Decimal('5000.00'))
+
+    def assertRollupMatchesTasks(self):
+        for group_by in (None, 'worker', 'product', 'day'):
+            with self.subTest(group_by=group_by):
+                self.assertEqual(
+                    compute_task_statistics(group_by=group_by, from_rollup=True),
+                    compute_task_statistics(group_by=group_by, from_rollup=False)
+                )
+        self.assertEqual(TaskDailyStats.rebuild(dry_run=True), [])
+
+    def wash(self, worker, assigned, washed=0, day=0):
+        return Task.objects.create(
+            worker=worker, product=self.product, assigned_quantity=assigned, washed_quantity=washed,
+            salary=Decimal('40.00'), deduction=Decimal('5.00'), date=date.today() - timedelta(days=day)
+        )
+
+    def test_create_update_delete(self):
+        first = self.wash(self.workers[0], 50)
+        second = self.wash(self.workers[1], 30, washed=10, day=1)
+        for _ in range(2):
+            # Two daily salary tasks share a key with no product
+            Task.objects.create(worker=self.workers[0], task_type='daily_salary', salary=Decimal('300.00'), date=date.today())
+        self.assertRollupMatchesTasks()
+
+        first.washed_quantity = 50
+        first.salary = Decimal('55.00')
+        first.save()
+        second = Task.objects.get(pk=second.pk)
+        second.washed_quantity = 20
+        second.save()
+        self.assertRollupMatchesTasks()
+        self.assertEqual(TaskDailyStats.objects.filter(product__isnull=True).get().task_count, 2)
+
+        first.delete()
+        Task.objects.filter(task_type='daily_salary').first().delete()
+        self.assertRollupMatchesTasks()
+
+    def test_bulk_assign_and_progress(self):
+        self.wash(self.workers[0], 10)
+        response = self.client.post('/api/tasks/bulk/', {'tasks': [
+            {'worker': str(worker.id), 'product': str(self.product.id), 'assigned_quantity': 20, 'salary': '30.00'}
+            for worker in self.workers * 2
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertRollupMatchesTasks()
+
+        response = self.client.put('/api/tasks/bulk/progress/', {'tasks': [
+            {'id': task['id'], 'washed_quantity': 20 if index % 2 else 8}
+            for index, task in enumerate(response.data['tasks'])
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertRollupMatchesTasks()
+        self.assertEqual(compute_task_statistics(from_rollup=True)['task_counts']['completed'], 2)
+
+    def test_rollup_key_is_unique(self):
+        for product in (self.product, None):
+            with self.subTest(product=product):
+                key = {'date': date.today(), 'worker': self.workers[0], 'product': product, 'task_type': 'washing', 'status': 'Pending'}
+                TaskDailyStats.objects.create(**key)
+                with self.assertRaises(IntegrityError), transaction.atomic():
+                    TaskDailyStats.objects.create(**key)
+
+
+class TaskBulkProgressLockTests(TestCase):
+    """PUT /api/tasks/bulk/progress/ takes the write lock before reading the tasks it updates"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='progress', password='unused-password', role='admin'))
+        product = Product.objects.create(name='Bottle', purchase_price=Decimal('5.00'), wash_price=Decimal('2.00'))
+        worker = Worker.objects.create(name='Washer', phone_number='0700000000', id_number='LOCK-0001')
+        self.tasks = [
+            Task.objects.create(worker=worker, product=product, assigned_quantity=10, salary=Decimal('20.00'), date=date.today()),
+            Task.objects.create(worker=worker, task_type='daily_salary', salary=Decimal('300.00'), date=date.today()),
+        ]
+
+    def test_first_statement_is_a_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put('/api/tasks/bulk/progress/', {'tasks': [
+                {'id': str(self.tasks[0].id), 'washed_quantity': 10},
+                {'id': str(self.tasks[1].id), 'deduction': '20.00'},
+            ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        statements = [query['sql'] for query in queries.captured_queries]
+        opened = next(index for index, sql in enumerate(statements) if sql.startswith('SAVEPOINT'))
+        first = statements[opened + 1]
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', first)
+        else:
+            self.assertTrue(first.startswith('UPDATE'), first)
@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.task_list_create, name='task_list_create'),
+    path('bulk/', views.task_bulk_assign, name='task_bulk_assign'),
+    path('bulk/progress/', views.task_bulk_progress, name='task_bulk_progress'),
     path('<uuid:pk>/', views.task_detail, name='task_detail'),
     path('daily-salary/', views.create_daily_salary_task, name='create_daily_salary_task'),
     path('worker/<uuid:worker_id>/', views.worker_tasks, name='worker_tasks'),
@@ -3,12 +3,27 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from .models import Task
+from django.db import transaction
+from django.utils import timezone
+from bottleflow.pagination import OptInPageNumberPagination
+from products.models import Product
+from workers.models import Worker
+from salaries.models import WorkerBalance
+from stock.models import StockMovement, StockBalance, ArchivedStockMovement
+from stock.views import bulk_errors
+from .models import Task, apply_task_rollups
 from .serializers import (
     TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer,
-    DailySalaryTaskSerializer, TaskSummarySerializer
+    DailySalaryTaskSerializer, TaskSummarySerializer, TaskBulkAssignItemSerializer,
+    TaskBulkProgressItemSerializer
 )
+from .signals import tasks_bulk_saved
+from .statistics import compute_task_statistics, GROUP_BY_FIELDS
 from audit.utils import log_audit
+from collections import defaultdict
+from datetime import datetime
+
+MAX_BULK_TASKS = 1000
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -33,13 +48,7 @@ def task_list_create(request):
         if task_type:
             tasks = tasks.filter(task_type=task_type)
         
-        # Check if summary view is requested
-        if request.query_params.get('summary') == 'true':
-            serializer = TaskSummarySerializer(tasks, many=True)
-        else:
-            serializer = TaskSerializer(tasks, many=True)
-        
-        return Response(serializer.data)
+        return task_list_response(request, tasks)
     
     elif request.method == 'POST':
         serializer = TaskCreateSerializer(data=request.data)
@@ -61,6 +70,241 @@ def task_list_create(request):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def task_list_response(request, tasks):
+    """
+    Serialize a filtered task queryset for the list endpoints.
+    
+    Worker and product names come from one joined query restricted to the columns
+    the serializer reads; ?summary=true selects the summary serializer and
+    ?page= / ?page_size= paginate.
+    """
+    serializer_class = TaskSummarySerializer if request.query_params.get('summary') == 'true' else TaskSerializer
+    # created_at alone can tie, so id keeps page boundaries stable
+    tasks = tasks.select_related('worker', 'product').only(*serializer_class.list_columns).order_by('-date', '-created_at', '-id')
+    
+    if OptInPageNumberPagination.is_requested(request):
+        paginator = OptInPageNumberPagination()
+        page = paginator.paginate_queryset(tasks, request)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data)
+    
+    return Response(serializer_class(tasks, many=True).data)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def task_bulk_assign(request):
+    """Assign many washing tasks in one transaction"""
+    
+    items = request.data.get('tasks') if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'Provide a non-empty list of tasks.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_TASKS:
+        return Response({'error': f'At most {MAX_BULK_TASKS} tasks per request.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Field validation per item
+    errors = {}
+    tasks_data = []
+    for index, item in enumerate(items):
+        serializer = TaskBulkAssignItemSerializer(data=item)
+        if serializer.is_valid():
+            tasks_data.append(serializer.validated_data)
+        else:
+            errors[index] = serializer.errors
+            tasks_data.append(None)
+    
+    workers = Worker.objects.in_bulk({data['worker'] for data in tasks_data if data})
+    products = Product.objects.in_bulk({data['product'] for data in tasks_data if data})
+    for index, data in enumerate(tasks_data):
+        if not data:
+            continue
+        item_errors = {}
+        if data['worker'] not in workers:
+            item_errors['worker'] = [f'Invalid pk "{data["worker"]}" - object does not exist.']
+        if data['product'] not in products:
+            item_errors['product'] = [f'Invalid pk "{data["product"]}" - object does not exist.']
+        if item_errors:
+            errors[index] = item_errors
+    
+    if errors:
+        return Response({'errors': bulk_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        # One locked stock read per product, then check each product's total assignment against raw stock
+        balances = StockBalance.lock_many(products.keys())
+        assigned = defaultdict(int)
+        for data in tasks_data:
+            assigned[data['product']] += data['assigned_quantity']
+        for index, data in enumerate(tasks_data):
+            available = balances[data['product']].as_stock()['raw']
+            if assigned[data['product']] > available:
+                errors[index] = {'non_field_errors': [
+                    f"Insufficient raw stock for {products[data['product']].name}. "
+                    f"Available: {available}, assigned in this batch: {assigned[data['product']]}"
+                ]}
+        
+        if errors:
+            return Response({'errors': bulk_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        today = timezone.localdate()
+        tasks = Task.objects.bulk_create([
+            Task(
+                worker=workers[data['worker']],
+                product=products[data['product']],
+                task_type='washing',
+                assigned_quantity=data['assigned_quantity'],
+                status='Pending',
+                salary=data['salary'],
+                deduction=data['deduction'],
+                net_pay=data['salary'] - data['deduction'],
+                date=data.get('date') or today,
+                notes=data.get('notes')
+            )
+            for data in tasks_data
+        ])
+        
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product=task.product,
+                type='assign_wash',
+                quantity=task.assigned_quantity,
+                reference_id=str(task.id),
+                source_type='task',
+                source_id=task.id,
+                notes=f'Assigned to {task.worker.name} for washing'
+            )
+            for task in tasks
+        ])
+        
+        # bulk_create skips Task.save and StockMovement.save, so apply the balance changes per product
+        for product_id, quantity in assigned.items():
+            StockBalance.apply(product_id, 'assign_wash', quantity, source_type='task')
+        apply_task_rollups(added=[task.rollup_entry() for task in tasks])
+        tasks_bulk_saved.send(sender=Task, tasks=tasks, created=True)
+        
+        log_audit(
+            user=request.user,
+            action='CREATE_TASK_BULK',
+            details=f'Assigned {len(tasks)} washing tasks ({sum(assigned.values())} units) to {len({task.worker_id for task in tasks})} workers'
+        )
+    
+    return Response({
+        'count': len(tasks),
+        'tasks': TaskSerializer(tasks, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def task_bulk_progress(request):
+    """Apply progress updates to many tasks in one transaction"""
+    
+    items = request.data.get('tasks') if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'Provide a non-empty list of task updates.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_TASKS:
+        return Response({'error': f'At most {MAX_BULK_TASKS} tasks per request.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Field validation per item
+    errors = {}
+    updates = []
+    seen = set()
+    for index, item in enumerate(items):
+        serializer = TaskBulkProgressItemSerializer(data=item)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+            updates.append(None)
+        elif serializer.validated_data['id'] in seen:
+            errors[index] = {'id': ['Task appears more than once in this batch.']}
+            updates.append(None)
+        else:
+            seen.add(serializer.validated_data['id'])
+            updates.append(serializer.validated_data)
+    
+    # A task's worker and product never change, so the balances to lock are known before the transaction
+    owners = list(Task.objects.filter(id__in=seen).order_by().values_list('product_id', 'worker_id'))
+    product_ids = {product_id for product_id, _ in owners if product_id}
+    worker_ids = {worker_id for _, worker_id in owners}
+    
+    with transaction.atomic():
+        # Take the write lock with the first statement, in the same order as bulk assignment
+        StockBalance.lock_many(product_ids)
+        WorkerBalance.lock_many(worker_ids)
+        tasks = Task.objects.select_for_update().select_related('worker').in_bulk(seen)
+        # Stock movements moved to the ledger archive can no longer be changed
+        archived = set(ArchivedStockMovement.objects.filter(
+            source_type='task', source_id__in=seen
+        ).values_list('source_id', flat=True).distinct())
+        
+        for index, data in enumerate(updates):
+            if not data:
+                continue
+            task = tasks.get(data['id'])
+            if task is None:
+                errors[index] = {'id': [f'Invalid pk "{data["id"]}" - object does not exist.']}
+                continue
+            washed_quantity = data.get('washed_quantity', task.washed_quantity)
+            if task.task_type == 'washing' and washed_quantity > task.assigned_quantity:
+                errors[index] = {'washed_quantity': [f"Washed quantity cannot exceed assigned quantity ({task.assigned_quantity})"]}
+            elif washed_quantity != task.washed_quantity and task.id in archived:
+                errors[index] = {'washed_quantity': ["This task's stock movements have been archived and can no longer be changed"]}
+        
+        if errors:
+            return Response({'errors': bulk_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        now = timezone.now()
+        results = []
+        updated = []
+        previous_entries = []
+        completed = defaultdict(list)
+        for data in updates:
+            task = tasks[data['id']]
+            previous_washed = task.washed_quantity
+            previous_entries.append(task.rollup_entry())
+            for field in ('washed_quantity', 'salary', 'deduction', 'notes'):
+                if field in data:
+                    setattr(task, field, data[field])
+            task.update_derived_fields()
+            task.updated_at = now
+            updated.append(task)
+            
+            if task.task_type == 'washing' and task.product_id and task.washed_quantity != previous_washed:
+                completed[task.product_id].append((
+                    task.id,
+                    task.washed_quantity,
+                    previous_washed,
+                    # Notes are only written when the row is first inserted
+                    f'Completed by {task.worker.name}' if not previous_washed else None
+                ))
+            
+            results.append({
+                'id': task.id,
+                'previous_washed_quantity': previous_washed,
+                'washed_quantity': task.washed_quantity,
+                'status': task.status,
+                'net_pay': task.net_pay,
+                'completion_percentage': task.completion_percentage
+            })
+        
+        Task.objects.bulk_update(updated, ['washed_quantity', 'salary', 'deduction', 'net_pay', 'status', 'notes', 'updated_at'])
+        apply_task_rollups(added=[task.rollup_entry() for task in updated], removed=previous_entries)
+        for task in updated:
+            task._posted_quantities = (task.assigned_quantity, task.washed_quantity)
+            task._posted_rollup_entry = task.rollup_entry()
+        
+        # One ledger upsert per product for the changed completed-washing movements
+        for product_id, changes in completed.items():
+            StockMovement.record_many(product_id, 'complete_wash', 'task', changes)
+        tasks_bulk_saved.send(sender=Task, tasks=updated, created=False)
+        
+        log_audit(
+            user=request.user,
+            action='UPDATE_TASK_BULK',
+            details=f'Updated {len(updated)} tasks ({sum(len(changes) for changes in completed.values())} with washed quantity changes)'
+        )
+    
+    return Response({
+        'count': len(results),
+        'results': results
+    })
+
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAuthenticated])
 def task_detail(request, pk):
@@ -130,44 +374,26 @@ def worker_tasks(request, worker_id):
     if end_date:
         tasks = tasks.filter(date__lte=end_date)
     
-    serializer = TaskSerializer(tasks, many=True)
-    return Response(serializer.data)
+    return task_list_response(request, tasks)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def task_statistics(request):
     """Get task statistics and summaries"""
     
-    from django.db.models import Count, Sum, Avg
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    # Get basic statistics
-    total_tasks = Task.objects.count()
-    completed_tasks = Task.objects.filter(status='Completed').count()
-    pending_tasks = Task.objects.filter(status='Pending').count()
-    in_progress_tasks = Task.objects.filter(status='In Progress').count()
+    # Restrict to a date range if specified (inclusive)
+    dates = {}
+    for param in ('start_date', 'end_date'):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                dates[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({'error': f'Invalid {param} format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get salary statistics
-    total_salaries = Task.objects.aggregate(
-        total_salary=Sum('salary'),
-        total_deductions=Sum('deduction'),
-        total_net_pay=Sum('net_pay')
-    )
+    # Break the figures down if specified, e.g. group_by=worker
+    group_by = request.query_params.get('group_by')
+    if group_by and group_by not in GROUP_BY_FIELDS:
+        return Response({'error': f'Invalid group_by. Choose from: {", ".join(GROUP_BY_FIELDS)}'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get recent task activity (last 30 days)
-    thirty_days_ago = timezone.now().date() - timedelta(days=30)
-    recent_tasks = Task.objects.filter(date__gte=thirty_days_ago).count()
-    
-    return Response({
-        'task_counts': {
-            'total': total_tasks,
-            'completed': completed_tasks,
-            'pending': pending_tasks,
-            'in_progress': in_progress_tasks
-        },
-        'salary_summary': total_salaries,
-        'recent_activity': {
-            'tasks_last_30_days': recent_tasks
-        }
-    })
+    return Response(compute_task_statistics(group_by=group_by, **dates))
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
 
 
 class WorkersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workers'
+
+    def ready(self):
+        # Drop deleted workers from the worker_search index; workers.signals is
+        # not connected because the views create manager accounts themselves
+        from .models import Worker, unindex_deleted_worker
+        post_delete.connect(unindex_deleted_worker, sender=Worker, dispatch_uid='workers.unindex_deleted_worker')
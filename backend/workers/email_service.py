@@ -6,14 +6,21 @@ import string
 import logging
 from django.core.mail import send_mail
 from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from authentication.models import User
-from bottleflow.settings import EMAIL_HOST_USER, EMAIL_HOST_PASSWORD
+from notifications.outbox import enqueue_email, enqueue_emails
+from .models import Worker
 
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Times account creation regenerates usernames after losing one to a concurrent insert
+USERNAME_ATTEMPTS = 5
+
 def send_email(subject, message, recipient_list, from_email=None, fail_silently=False):
     """
     Utility function to send emails.
@@ -50,8 +57,8 @@ def generate_password(length=12):
     password = ''.join(secrets.choice(alphabet) for _ in range(length))
     return password
 
-def generate_username_from_email(email):
-    """Generate a username from email address"""
+def username_base(email):
+    """Username stem for an email address: its lowercase alphanumeric local part, at least 3 characters"""
     base_username = email.split('@')[0].lower()
     # Remove any non-alphanumeric characters
     username = ''.join(c for c in base_username if c.isalnum())
@@ -59,17 +66,76 @@ def generate_username_from_email(email):
     # Ensure username is at least 3 characters
     if len(username) < 3:
         username = f"user{username}"
+    return username
+
+def generate_usernames_from_emails(emails):
+    """
+    Unique usernames for several emails: base, base1, base2, ... as before,
+    but with one query for every username sharing a base and the free suffix
+    picked in memory. Emails in the same call never get the same username.
+    """
+    bases = [username_base(email) for email in emails]
+    prefixes = Q()
+    for base in set(bases):
+        prefixes |= Q(username__startswith=base)
+    taken = set(User.objects.filter(prefixes).values_list('username', flat=True)) if bases else set()
     
-    # Ensure username is unique
-    counter = 1
-    original_username = username
-    while User.objects.filter(username=username).exists():
-        username = f"{original_username}{counter}"
-        counter += 1
-    
+    usernames = []
+    for base in bases:
+        username, counter = base, 1
+        while username in taken:
+            username = f"{base}{counter}"
+            counter += 1
+        taken.add(username)
+        usernames.append(username)
+    return usernames
+
+def generate_username_from_email(email):
+    """Generate a unique username from email address"""
+    username = generate_usernames_from_emails([email])[0]
     logger.info(f"Generated unique username: {username} from email: {email}")
     return username
 
+def generate_credentials(count):
+    """(password, password hash) pairs; hashing is the slow part of creating an account"""
+    passwords = [generate_password() for _ in range(count)]
+    return [(password, make_password(password)) for password in passwords]
+
+def create_manager_users(people, credentials=None):
+    """
+    Create manager user accounts for many (name, email) pairs in one insert.
+    
+    Usernames are generated with one query; if a concurrent insert takes one of
+    them first, they are regenerated and the insert retried. Returns a list of
+    {'user', 'username', 'password'} dicts in input order.
+    
+    credentials: Optional generate_credentials() pairs made before a transaction
+        is opened, so it is not held while passwords are hashed
+    """
+    credentials = credentials or generate_credentials(len(people))
+    passwords = [password for password, _ in credentials]
+    hashed = [password_hash for _, password_hash in credentials]
+    
+    for attempt in range(1, USERNAME_ATTEMPTS + 1):
+        usernames = generate_usernames_from_emails([email for _, email in people])
+        users = [
+            User(username=username, email=User.objects.normalize_email(email), password=password_hash, role='manager')
+            for username, (_, email), password_hash in zip(usernames, people, hashed)
+        ]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            break
+        except IntegrityError:
+            if attempt == USERNAME_ATTEMPTS:
+                raise
+            logger.warning(f"Username taken by a concurrent insert, regenerating (attempt {attempt})")
+    
+    return [
+        {'user': user, 'username': user.username, 'password': password}
+        for user, password in zip(users, passwords)
+    ]
+
 def create_manager_account(name, email):
     """
     Create a manager user account and return credentials
@@ -88,19 +154,24 @@ def create_manager_account(name, email):
                 'message': 'Manager account creation failed - email already exists'
             }
         
-        # Generate credentials
-        username = generate_username_from_email(email)
+        # Generate credentials and create the user account, retrying if a
+        # concurrent insert takes the generated username first
         password = generate_password()
-        
-        logger.info(f"Generated username: {username} for {email}")
-        
-        # Create user account
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password,
-            role='manager'
-        )
+        for attempt in range(1, USERNAME_ATTEMPTS + 1):
+            username = generate_username_from_email(email)
+            try:
+                with transaction.atomic():
+                    user = User.objects.create_user(
+                        username=username,
+                        email=email,
+                        password=password,
+                        role='manager'
+                    )
+                break
+            except IntegrityError:
+                if attempt == USERNAME_ATTEMPTS:
+                    raise
+                logger.warning(f"Username {username} was taken concurrently, regenerating (attempt {attempt})")
         
         logger.info(f"Successfully created manager account for {name} with username {username}")
         print(f"✅ Manager account created: {username} for {name} ({email})")
@@ -123,8 +194,8 @@ def create_manager_account(name, email):
             'message': 'Failed to create manager account'
         }
 
-def send_manager_credentials_email(name, email, username, password, admin_user=None):
-    """Send manager account credentials via email"""
+def manager_credentials_email(name, username, password, admin_user=None):
+    """(subject, message, from_email) of the email that gives a new manager their credentials"""
     subject = f'BottleFlow Manager Account Created - Welcome {name}!'
     
     # Use admin user's email as sender if provided, otherwise use default
@@ -143,32 +214,79 @@ You can access the system at: {getattr(settings, 'FRONTEND_URL', 'http://localho
 If you have any questions, please contact {admin_name} at {from_email}.
 Best regards,
 {admin_name}"""
+    return subject, message, from_email
+
+def send_manager_credentials_email(name, email, username, password, admin_user=None):
+    """Queue manager account credentials for delivery via the email outbox"""
+    subject, message, from_email = manager_credentials_email(name, username, password, admin_user)
     
     try:
-        logger.info(f"Attempting to send manager credentials email to {email}")
-        
-        # Check if credentials are set in Django settings (loaded from .env)
-        if not settings.EMAIL_HOST_USER or not settings.EMAIL_HOST_PASSWORD:
-            error_msg = "Email credentials not configured. Please set EMAIL_HOST_USER and EMAIL_HOST_PASSWORD in your .env file. Refer to EMAIL_SETUP_GUIDE.md for details."
-            logger.error(error_msg)
-            print(f"❌ EMAIL CONFIG ERROR: {error_msg}")
-            return {'success': False, 'message': 'Email server is not configured.'}
-
-        email_sent = send_email(
+        # Queued for run_email_worker, so a slow SMTP server never holds the request
+        outbox_email = enqueue_email(
             subject,
             message,
             [email],
-            fail_silently=False,
             from_email=from_email,
+            category='manager_credentials'
         )
-
-        if email_sent:
-            return {'success': True, 'message': f'Credentials successfully sent to {email}.'}
-        else:
-            # send_email already logs the specific error
-            return {'success': False, 'message': 'Failed to send credentials email.'}
+        logger.info(f"Queued manager credentials email {outbox_email.id} to {email}")
+        return {'success': True, 'email': outbox_email, 'message': f'Credentials email queued for {email}.'}
     except Exception as e:
-        error_msg = f"Exception occurred while sending manager credentials email to {email}: {str(e)}"
+        error_msg = f"Exception occurred while queueing manager credentials email to {email}: {str(e)}"
         logger.error(error_msg)
-        print(f"❌ EMAIL SENDING ERROR: {error_msg}")
-        return {'success': False, 'message': 'An error occurred while sending credentials email.'}
+        print(f"❌ EMAIL QUEUE ERROR: {error_msg}")
+        return {'success': False, 'message': 'An error occurred while queueing credentials email.'}
+
+def create_pending_manager_accounts(batch_size=10):
+    """
+    Create user accounts for up to batch_size imported managers (account_pending)
+    and queue their credentials emails. Returns the number of accounts created,
+    0 once no managers are waiting.
+    
+    Passwords are hashed before the transaction, which only claims the workers,
+    inserts the users and links them, so it holds the database briefly.
+    """
+    while True:
+        candidates = list(
+            Worker.objects.filter(account_pending=True, user_account__isnull=True)
+            .order_by('created_at', 'id').values_list('id', flat=True)[:batch_size]
+        )
+        if not candidates:
+            return 0
+        credentials = dict(zip(candidates, generate_credentials(len(candidates))))
+        created = _create_claimed_accounts(candidates, credentials)
+        if created:
+            return created
+        # A concurrent run claimed these first, or their emails were taken; try the next ones
+
+def _create_claimed_accounts(candidates, credentials):
+    with transaction.atomic():
+        # Clearing the flag takes the rows; a concurrent run that took some of them
+        # first has committed their user accounts, so they no longer match below
+        Worker.objects.filter(id__in=candidates, account_pending=True).update(account_pending=False)
+        workers = list(Worker.objects.filter(id__in=candidates, user_account__isnull=True).order_by('created_at', 'id'))
+        
+        taken = set(User.objects.filter(email__in=[worker.email for worker in workers]).values_list('email', flat=True))
+        for worker in workers:
+            if worker.email in taken:
+                logger.error(f"Not creating an account for imported manager {worker.name}: a user with email {worker.email} already exists")
+        workers = [worker for worker in workers if worker.email not in taken]
+        if not workers:
+            return 0
+        
+        accounts = create_manager_users(
+            [(worker.name, worker.email) for worker in workers],
+            credentials=[credentials[worker.id] for worker in workers]
+        )
+        for worker, account in zip(workers, accounts):
+            worker.user_account = account['user']
+        Worker.objects.bulk_update(workers, ['user_account'])
+        
+        messages = []
+        for worker, account in zip(workers, accounts):
+            subject, body, from_email = manager_credentials_email(worker.name, account['username'], account['password'])
+            messages.append((subject, body, [worker.email], from_email))
+        enqueue_emails(messages, category='manager_credentials')
+    
+    logger.info(f"Created {len(workers)} accounts for imported managers")
+    return len(workers)
@@ -0,0 +1,246 @@
+"""
+Worker import.
+
+Reads workers from a CSV or XLSX file one row at a time and creates them in
+chunks: each chunk is validated field by field, checked for ID number and
+email clashes with one IN query per column, and inserted with bulk_create.
+Rows that fail are reported by row number while the rest are imported.
+Managers are created with account_pending set, and create_manager_accounts
+makes their user accounts and queues credentials outside the request.
+"""
+import csv
+import io
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from .models import Worker
+from .serializers import WorkerImportSerializer
+
+IMPORT_COLUMNS = ('name', 'phone_number', 'id_number', 'role', 'email')
+REQUIRED_COLUMNS = ('name', 'phone_number', 'id_number')
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class WorkerImportError(Exception):
+    """The file as a whole cannot be imported (format, encoding or header)"""
+
+
+def _header(cells):
+    """Column names from the header row: lowercase, spaces as underscores"""
+    columns = [str(cell or '').strip().lower().replace(' ', '_') for cell in cells]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise WorkerImportError(f'Missing column(s): {", ".join(missing)}. Expected {", ".join(IMPORT_COLUMNS)}.')
+    return columns
+
+
+def _row(columns, cells):
+    """Import fields of one data row; blank cells are left out so model defaults apply"""
+    row = {}
+    for column, cell in zip(columns, cells):
+        if isinstance(cell, float) and cell.is_integer():
+            # Spreadsheets store phone and ID numbers typed as numbers as floats
+            cell = int(cell)
+        value = '' if cell is None else str(cell).strip()
+        if column in IMPORT_COLUMNS and value:
+            row[column] = value
+    return row
+
+
+def _csv_rows(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        columns = _header(next(reader, []))
+        for cells in reader:
+            if any(cell.strip() for cell in cells):
+                yield reader.line_num, _row(columns, cells)
+    except UnicodeDecodeError:
+        raise WorkerImportError('CSV files must be UTF-8 encoded.')
+    finally:
+        # Leave the underlying file open for its owner
+        text.detach()
+
+
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise WorkerImportError('XLSX import needs openpyxl (pip install openpyxl); upload a CSV file instead.')
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception:
+        raise WorkerImportError('Could not read the XLSX file.')
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        columns = _header(next(rows, ()))
+        for row_number, cells in enumerate(rows, start=2):
+            if any(cell not in (None, '') for cell in cells):
+                yield row_number, _row(columns, cells)
+    finally:
+        workbook.close()
+
+
+def read_worker_rows(file, file_name):
+    """
+    Yield (row_number, fields) for each non-empty data row of a CSV or XLSX file,
+    reading it lazily so large files are never held in memory.
+    """
+    if file_name.lower().endswith('.xlsx'):
+        return _xlsx_rows(file)
+    if file_name.lower().endswith('.csv'):
+        return _csv_rows(file)
+    raise WorkerImportError('Upload a .csv or .xlsx file.')
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class WorkerImport:
+    """
+    Imports rows in chunks and keeps the running totals and error report.
+
+    ID numbers and emails seen earlier in the file are remembered, so duplicates
+    within the file are reported against the later row.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.total_rows = 0
+        self.created = 0
+        self.managers_queued = 0
+        self.errors = []
+        self.seen_id_numbers = set()
+        self.seen_emails = set()
+        self.last_row = 0
+        self.file_error = None
+
+    def run(self, rows):
+        try:
+            for chunk in _chunks(rows, self.chunk_size):
+                self.import_chunk(chunk)
+        except WorkerImportError as e:
+            if not self.total_rows:
+                raise
+            # Earlier chunks are already imported; report where reading stopped
+            self.file_error = f'{e} Rows after row {self.last_row} were not imported.'
+        return self
+
+    def import_chunk(self, chunk):
+        self.total_rows += len(chunk)
+        self.last_row = chunk[-1][0]
+        valid = []
+        for row_number, fields in chunk:
+            serializer = WorkerImportSerializer(data=fields)
+            if serializer.is_valid():
+                valid.append((row_number, serializer.validated_data))
+            else:
+                self.errors.append({'row': row_number, 'errors': serializer.errors})
+
+        pending = self._unique(valid)
+        if not self.dry_run and pending:
+            try:
+                self._insert(pending)
+            except IntegrityError:
+                # Another request took an ID number since the check; report those rows and insert the rest
+                pending = self._drop_taken(pending)
+                self._insert(pending)
+        self._count([worker for _, worker in pending])
+
+    def _insert(self, pending):
+        """Create the workers and add them to the search index in one transaction"""
+        with transaction.atomic():
+            workers = Worker.objects.bulk_create([worker for _, worker in pending])
+            Worker.index_search(workers, created=True)
+
+    def _unique(self, valid):
+        """(row_number, Worker) for rows whose ID number and email are free, reporting the others"""
+        workers = [(row_number, Worker(**data)) for row_number, data in valid]
+        id_numbers = [worker.id_number for _, worker in workers]
+        emails = [worker.email for _, worker in workers if worker.email]
+        manager_emails = [worker.email for _, worker in workers if worker.email and worker.role.lower() == 'manager']
+        taken_id_numbers = set(Worker.objects.filter(id_number__in=id_numbers).values_list('id_number', flat=True))
+        worker_emails = set(Worker.objects.filter(email__in=emails).values_list('email', flat=True)) if emails else set()
+        user_emails = set(
+            get_user_model().objects.filter(email__in=manager_emails).values_list('email', flat=True)
+        ) if manager_emails else set()
+
+        unique = []
+        for row_number, worker in workers:
+            id_number, email = worker.id_number, worker.email
+            is_manager = worker.role.lower() == 'manager'
+            error = None
+            if id_number in taken_id_numbers:
+                error = {'id_number': [f'A worker with the ID number {id_number} already exists.']}
+            elif email and email in worker_emails:
+                error = {'email': [f'A worker with the email {email} already exists.']}
+            elif is_manager and email in user_emails:
+                error = {'email': [f'A user account with the email {email} already exists.']}
+            elif id_number in self.seen_id_numbers:
+                error = {'id_number': ['ID number appears more than once in this file.']}
+            elif email and email in self.seen_emails:
+                error = {'email': ['Email appears more than once in this file.']}
+            self.seen_id_numbers.add(id_number)
+            if email:
+                self.seen_emails.add(email)
+
+            if error:
+                self.errors.append({'row': row_number, 'errors': error})
+                continue
+            worker.account_pending = is_manager
+            worker.update_search_fields()
+            unique.append((row_number, worker))
+        return unique
+
+    def _drop_taken(self, pending):
+        """Report and remove rows whose ID number now exists"""
+        taken = set(Worker.objects.filter(
+            id_number__in=[worker.id_number for _, worker in pending]
+        ).values_list('id_number', flat=True))
+        for row_number, worker in pending:
+            if worker.id_number in taken:
+                self.errors.append({'row': row_number, 'errors': {
+                    'id_number': [f'A worker with the ID number {worker.id_number} already exists.']
+                }})
+        return [(row_number, worker) for row_number, worker in pending if worker.id_number not in taken]
+
+    def _count(self, workers):
+        self.created += len(workers)
+        self.managers_queued += sum(1 for worker in workers if worker.account_pending)
+
+    def report(self):
+        """Response body for the import: totals and the row-level errors in file order"""
+        return {
+            'dry_run': self.dry_run,
+            'total_rows': self.total_rows,
+            'created': self.created,
+            'managers_queued': self.managers_queued,
+            'error_count': len(self.errors),
+            'file_error': self.file_error,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+
+def import_workers(file, file_name, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Import workers from an uploaded CSV or XLSX file and return the WorkerImport.
+
+    Args:
+        file: Binary file object
+        file_name: Name of the file; its extension picks the format
+        chunk_size: Rows validated and inserted together
+        dry_run: Validate and report without creating anything
+
+    Raises WorkerImportError when the file itself is unreadable.
+    """
+    return WorkerImport(chunk_size=chunk_size, dry_run=dry_run).run(read_worker_rows(file, file_name))
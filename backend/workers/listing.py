@@ -0,0 +1,53 @@
+"""
+Worker listing.
+
+Annotates workers with their salary totals from WorkerBalance and their
+completed task count from the WorkerDailyEarnings rollup, so a whole page of
+workers is serialized from one query instead of three per worker.
+"""
+from decimal import Decimal
+from django.db.models import DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import Worker
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+# WorkerSerializer field -> balance column, annotated as annotated_<field>
+BALANCE_FIELDS = {
+    'total_earned': 'total_earned',
+    'total_paid': 'total_paid',
+    'pending_salary': 'pending',
+}
+
+
+def annotate_worker_totals(workers):
+    """Add annotated_<field> values for WorkerSerializer's salary and task count fields"""
+    # Import here to avoid circular imports
+    from salaries.models import WorkerDailyEarnings
+    
+    completed = WorkerDailyEarnings.objects.filter(worker=OuterRef('pk')).order_by().values('worker').annotate(
+        total=Sum('completed_count')
+    ).values('total')
+    return workers.annotate(
+        **{
+            f'annotated_{field}': Coalesce(F(f'balance__{column}'), Value(Decimal(0)), output_field=MONEY)
+            for field, column in BALANCE_FIELDS.items()
+        },
+        annotated_total_tasks_completed=Coalesce(Subquery(completed, output_field=IntegerField()), Value(0))
+    )
+
+
+def worker_list_queryset(role=None, search=None):
+    """
+    Active workers with WorkerSerializer's totals annotated, ordered by name.
+    
+    Args:
+        role: Optional worker role to restrict to
+        search: Optional case-insensitive fragment of the worker name
+    """
+    workers = Worker.objects.filter(is_active=True)
+    if role:
+        workers = workers.filter(role=role)
+    if search:
+        workers = workers.filter(name__icontains=search)
+    return annotate_worker_totals(workers).order_by('name', 'id')
@@ -0,0 +1,76 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from workers.models import Worker
+from workers.search import DEFAULT_LIMIT, search_workers
+
+FIRST_NAMES = ['John', 'Mary', 'Peter', 'Grace', 'James', 'Ann', 'Joseph', 'Lucy', 'Daniel', 'Zoë', 'André', 'Faith']
+LAST_NAMES = ['Kamau', 'Wanjiru', 'Otieno', 'Achieng', 'Mwangi', 'Njeri', 'Kiprop', 'Chebet', 'Mutua', 'Wambui']
+
+# Label -> query; the last one matches nothing, so it is the full substring scan
+QUERIES = {
+    'common name prefix': 'jo',
+    'full name prefix': 'grace wanj',
+    'accented name': 'zoe',
+    'surname substring': 'otieno',
+    'phone fragment': '0712 3',
+    'ID number prefix': 'bench0424',
+    'ID number substring': '04242',
+    'no match': 'xylophone',
+}
+
+class _Rollback(Exception):
+    """Raised to discard the synthetic benchmark data"""
+
+class Command(BaseCommand):
+    help = 'Time /api/workers/search/ queries against synthetic workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=100_000, help='Number of synthetic workers')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help='Rows returned per search')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🚀 Worker search benchmark'))
+        self.stdout.write('=' * 40)
+
+        try:
+            with transaction.atomic():
+                self._seed(options['workers'])
+                for label, query in QUERIES.items():
+                    self._report(label, query, options['limit'], options['runs'])
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write('🧹 Synthetic data rolled back')
+
+    def _seed(self, worker_count, batch_size=10_000):
+        start = time.perf_counter()
+        created = 0
+        while created < worker_count:
+            batch = []
+            for index in range(created, min(created + batch_size, worker_count)):
+                worker = Worker(
+                    name=f'{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)} {index}',
+                    phone_number=f'07{random.randint(0, 99_999_999):08d}',
+                    id_number=f'BENCH{index:06d}',
+                    role=random.choice(['Washer', 'Washer', 'Washer', 'manager']),
+                )
+                worker.update_search_fields()
+                batch.append(worker)
+            Worker.index_search(Worker.objects.bulk_create(batch), created=True)
+            created += len(batch)
+
+        self.stdout.write(f'👷 Seeded {worker_count} workers in {time.perf_counter() - start:.1f}s')
+
+    def _report(self, label, query, limit, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            rows = search_workers(query, limit)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        self.stdout.write(
+            f'⏱️  {label} ({query!r}): {len(rows)} rows, '
+            f'median {timings[len(timings) // 2] * 1000:.2f} ms, worst {timings[-1] * 1000:.2f} ms'
+        )
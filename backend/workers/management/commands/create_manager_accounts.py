@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from workers.email_service import create_pending_manager_accounts
+
+class Command(BaseCommand):
+    help = 'Create user accounts for imported managers and queue their credentials emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Accounts created per transaction')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when no managers are waiting')
+        parser.add_argument('--once', action='store_true', help='Create the accounts waiting now and exit (e.g. from cron)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('👤 Manager account worker started'))
+
+        while True:
+            close_old_connections()
+            created = create_pending_manager_accounts(options['batch_size'])
+            if created:
+                self.stdout.write(f'👤 {created} manager accounts created')
+            # Keep going while batches come back full
+            if created >= options['batch_size']:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from audit.utils import log_audit
+from workers.importing import DEFAULT_CHUNK_SIZE, WorkerImportError, import_workers
+
+class Command(BaseCommand):
+    help = 'Import workers from a CSV or XLSX file; managers are queued for create_manager_accounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with name, phone_number, id_number, role and email columns')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows validated and inserted together')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without creating workers')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as file:
+                result = import_workers(file, path, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        except WorkerImportError as e:
+            raise CommandError(str(e))
+
+        if result.created:
+            log_audit(
+                user=None,
+                action='CREATE_WORKER_BULK',
+                details=f'Imported {result.created} workers from {path} with import_workers '
+                        f'({result.managers_queued} managers queued for accounts, {len(result.errors)} rows rejected)'
+            )
+
+        for error in result.report()['errors']:
+            details = '; '.join(f'{field}: {" ".join(str(message) for message in messages)}' for field, messages in error['errors'].items())
+            self.stdout.write(self.style.WARNING(f'⚠️  Row {error["row"]}: {details}'))
+        if result.file_error:
+            self.stdout.write(self.style.ERROR(f'❌ {result.file_error}'))
+
+        verb = 'would be created' if options['dry_run'] else 'created'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {result.total_rows} rows read: {result.created} workers {verb} '
+            f'({result.managers_queued} managers queued for accounts), {len(result.errors)} rejected'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from workers.models import Worker
+
+class Command(BaseCommand):
+    help = 'Rebuild the normalized worker search columns and the worker_search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare the stored search columns and index with a full recompute, do not write')
+
+    def handle(self, *args, **options):
+        verify = options['verify']
+        mismatches = Worker.rebuild_search(dry_run=verify)
+
+        for worker_id, stored, expected in mismatches:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️  {worker_id}: stored {stored} != recomputed {expected} (name, phone, ID number)')
+            )
+
+        if verify:
+            if mismatches:
+                self.stdout.write(self.style.ERROR(f'❌ {len(mismatches)} worker(s) out of sync with the search index; run rebuild_worker_search'))
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS('✅ Worker search index matches every worker'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt worker search index ({len(mismatches)} corrected)'))
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:41
+
+from django.db import migrations, models
+from workers.models import normalize_search_code, normalize_search_text
+
+
+def populate_search_fields(apps, schema_editor):
+    """Fill the normalized search columns for existing workers"""
+    Worker = apps.get_model('workers', 'Worker')
+    workers = list(Worker.objects.only('id', 'name', 'phone_number', 'id_number'))
+    for worker in workers:
+        worker.search_name = normalize_search_text(worker.name)
+        worker.search_phone = normalize_search_code(worker.phone_number)
+        worker.search_id_number = normalize_search_code(worker.id_number)
+    Worker.objects.bulk_update(workers, ['search_name', 'search_phone', 'search_id_number'], batch_size=1000)
+
+
+# Trigram index over the search columns for substring matches on SQLite, kept
+# in step by triggers so bulk_create and raw updates are covered too
+SEARCH_INDEX_SQL = [
+    """CREATE VIRTUAL TABLE worker_search USING fts5(
+        worker_id UNINDEXED, search_name, search_phone, search_id_number, tokenize='trigram'
+    )""",
+    """CREATE TRIGGER worker_search_insert AFTER INSERT ON workers BEGIN
+        INSERT INTO worker_search (worker_id, search_name, search_phone, search_id_number)
+        VALUES (new.id, new.search_name, new.search_phone, new.search_id_number);
+    END""",
+    """CREATE TRIGGER worker_search_update AFTER UPDATE ON workers
+    WHEN old.search_name IS NOT new.search_name
+        OR old.search_phone IS NOT new.search_phone
+        OR old.search_id_number IS NOT new.search_id_number
+    BEGIN
+        UPDATE worker_search
+        SET search_name = new.search_name, search_phone = new.search_phone, search_id_number = new.search_id_number
+        WHERE worker_id = old.id;
+    END""",
+    """CREATE TRIGGER worker_search_delete AFTER DELETE ON workers BEGIN
+        DELETE FROM worker_search WHERE worker_id = old.id;
+    END""",
+    """INSERT INTO worker_search (worker_id, search_name, search_phone, search_id_number)
+    SELECT id, search_name, search_phone, search_id_number FROM workers""",
+]
+
+DROP_SEARCH_INDEX_SQL = [
+    'DROP TRIGGER IF EXISTS worker_search_insert',
+    'DROP TRIGGER IF EXISTS worker_search_update',
+    'DROP TRIGGER IF EXISTS worker_search_delete',
+    'DROP TABLE IF EXISTS worker_search',
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Other backends fall back to scanning the search columns"""
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SEARCH_INDEX_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_SEARCH_INDEX_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workers', '0003_workerhistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worker',
+            name='search_id_number',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='search_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='search_phone',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.RunPython(populate_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
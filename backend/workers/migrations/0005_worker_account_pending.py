@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:49
+
+from importlib import import_module
+from django.db import migrations, models
+
+search_index = import_module('workers.migrations.0004_worker_search_fields')
+
+
+def restore_search_index(apps, schema_editor):
+    """
+    Altering workers on SQLite rebuilds the table, which drops its triggers;
+    recreate them and refill worker_search from the rebuilt table.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in search_index.DROP_SEARCH_INDEX_SQL[:-1]:
+        schema_editor.execute(sql)
+    # The triggers, between creating the table and populating it
+    for sql in search_index.SEARCH_INDEX_SQL[1:-1]:
+        schema_editor.execute(sql)
+    schema_editor.execute('DELETE FROM worker_search')
+    schema_editor.execute(search_index.SEARCH_INDEX_SQL[-1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workers', '0004_worker_search_fields'),
+    ]
+
+    operations = [
+        # Runs last when unapplying, after RemoveField has rebuilt the table again
+        migrations.RunPython(migrations.RunPython.noop, restore_search_index),
+        migrations.AddField(
+            model_name='worker',
+            name='account_pending',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
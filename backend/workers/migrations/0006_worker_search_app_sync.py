@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:58
+
+from importlib import import_module
+from django.db import migrations
+
+search_index = import_module('workers.migrations.0004_worker_search_fields')
+
+
+def drop_search_triggers(apps, schema_editor):
+    """
+    Worker.save, the post_delete receiver, queryset updates and the bulk create
+    paths now keep worker_search in step. The triggers go, since table rebuilds
+    on SQLite drop them.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in search_index.DROP_SEARCH_INDEX_SQL[:-1]:
+        schema_editor.execute(sql)
+    # Refill in case a rebuild had already dropped the triggers
+    schema_editor.execute('DELETE FROM worker_search')
+    schema_editor.execute(search_index.SEARCH_INDEX_SQL[-1])
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in search_index.SEARCH_INDEX_SQL[1:-1]:
+        schema_editor.execute(sql)
+    schema_editor.execute('DELETE FROM worker_search')
+    schema_editor.execute(search_index.SEARCH_INDEX_SQL[-1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workers', '0005_worker_account_pending'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, restore_search_triggers),
+    ]
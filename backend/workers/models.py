@@ -1,7 +1,37 @@
-from django.db import models
+from django.db import connection, models, transaction
 import uuid
+import unicodedata
 from django.conf import settings
 
+def normalize_search_text(value):
+    """Lowercase, accent-free, single-spaced text for prefix and substring search"""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.lower().split())
+
+def normalize_search_code(value):
+    """Lowercase letters and digits only, so '+254 712-345' and '254712345' match"""
+    return ''.join(c for c in (value or '').lower() if c.isalnum())
+
+# Worker ids per DELETE, well under SQLite's bound parameter limit
+SEARCH_INDEX_BATCH = 500
+
+class WorkerQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """Queryset updates of searched fields refresh the search columns and index of the rows they touch"""
+        if kwargs.keys().isdisjoint(self.model.SEARCH_FIELDS):
+            return super().update(**kwargs)
+        with transaction.atomic():
+            worker_ids = list(self.values_list('pk', flat=True))
+            count = super().update(**kwargs)
+            # Read back, since the new values may be expressions
+            workers = list(self.model.objects.filter(pk__in=worker_ids).only('id', *self.model.SEARCH_FIELDS))
+            for worker in workers:
+                worker.update_search_fields()
+            self.model.objects.bulk_update(workers, list(self.model.SEARCH_FIELDS.values()), batch_size=1000)
+            self.model.index_search(workers)
+        return count
+
 class Worker(models.Model):
     """Worker model for managing employees"""
     
@@ -13,34 +43,146 @@ class Worker(models.Model):
     email = models.EmailField(blank=True, null=True, help_text='Required for manager role')
     user_account = models.OneToOneField('authentication.User', on_delete=models.SET_NULL, null=True, blank=True, help_text='Associated user account for managers')
     is_active = models.BooleanField(default=True)
+    # Imported managers wait here for create_manager_accounts to make their user account
+    account_pending = models.BooleanField(default=False, db_index=True)
+    # Normalized copies of name, phone number and ID number for /api/workers/search/
+    search_name = models.CharField(max_length=100, default='', editable=False, db_index=True)
+    search_phone = models.CharField(max_length=15, default='', editable=False, db_index=True)
+    search_id_number = models.CharField(max_length=20, default='', editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    SEARCH_FIELDS = {'name': 'search_name', 'phone_number': 'search_phone', 'id_number': 'search_id_number'}
+    
+    objects = WorkerQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.name} ({self.role})"
     
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # Keep the search columns in step when only some fields are saved
+            kwargs['update_fields'] = {
+                *update_fields,
+                *(column for field, column in self.SEARCH_FIELDS.items() if field in update_fields)
+            }
+        created = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or not kwargs['update_fields'].isdisjoint(self.SEARCH_FIELDS.values()):
+                Worker.index_search([self], created=created)
+    
+    def update_search_fields(self):
+        """Recompute the normalized search columns; also used by bulk writes that skip save()"""
+        self.search_name = normalize_search_text(self.name)
+        self.search_phone = normalize_search_code(self.phone_number)
+        self.search_id_number = normalize_search_code(self.id_number)
+    
+    @staticmethod
+    def index_search(workers, created=False):
+        """
+        Write the workers' search columns to the worker_search trigram index.
+        
+        save() calls this for one worker; bulk_create callers pass the created
+        workers after update_search_fields(), with created=True as they have no
+        row to replace. Only SQLite has the index.
+        """
+        if connection.vendor != 'sqlite' or not workers:
+            return
+        if not created:
+            Worker.unindex_search([worker.id for worker in workers])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO worker_search (worker_id, search_name, search_phone, search_id_number) VALUES (%s, %s, %s, %s)',
+                [(worker.id.hex, worker.search_name, worker.search_phone, worker.search_id_number) for worker in workers]
+            )
+    
+    @staticmethod
+    def unindex_search(worker_ids):
+        """
+        Remove workers from the worker_search index.
+        
+        Rows are matched on the full worker id; it is an unindexed FTS5 column,
+        so each batch scans the index once.
+        """
+        if connection.vendor != 'sqlite' or not worker_ids:
+            return
+        worker_ids = [worker_id.hex for worker_id in worker_ids]
+        with connection.cursor() as cursor:
+            for start in range(0, len(worker_ids), SEARCH_INDEX_BATCH):
+                batch = worker_ids[start:start + SEARCH_INDEX_BATCH]
+                cursor.execute(f'DELETE FROM worker_search WHERE worker_id IN ({", ".join(["%s"] * len(batch))})', batch)
+    
+    @classmethod
+    def rebuild_search(cls, dry_run=False):
+        """
+        Recompute every worker's search columns and rewrite the worker_search index.
+        
+        Returns a list of (worker_id, stored, expected) tuples of
+        (search_name, search_phone, search_id_number) for every worker whose
+        columns or index row differed; a missing row, or an index row left by a
+        deleted worker, is None.
+        """
+        with transaction.atomic():
+            workers = list(cls.objects.only('id', *cls.SEARCH_FIELDS, *cls.SEARCH_FIELDS.values()))
+            columns = {worker.id: (worker.search_name, worker.search_phone, worker.search_id_number) for worker in workers}
+            for worker in workers:
+                worker.update_search_fields()
+            expected = {worker.id: (worker.search_name, worker.search_phone, worker.search_id_number) for worker in workers}
+            
+            indexed = connection.vendor == 'sqlite'
+            stored = columns
+            if indexed:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT worker_id, search_name, search_phone, search_id_number FROM worker_search')
+                    stored = {uuid.UUID(worker_id): tuple(values) for worker_id, *values in cursor.fetchall()}
+            
+            mismatches = [
+                (worker_id, stored.get(worker_id), values)
+                for worker_id, values in expected.items()
+                if columns[worker_id] != values or stored.get(worker_id) != values
+            ] + [(worker_id, values, None) for worker_id, values in stored.items() if worker_id not in expected]
+            if mismatches and not dry_run:
+                stale = [worker for worker in workers if columns[worker.id] != expected[worker.id]]
+                cls.objects.bulk_update(stale, list(cls.SEARCH_FIELDS.values()), batch_size=1000)
+                if indexed:
+                    with connection.cursor() as cursor:
+                        cursor.execute('DELETE FROM worker_search')
+                    cls.index_search(workers, created=True)
+        
+        return mismatches
+    
     @property
     def pending_salary(self):
-        """Calculate pending salary for this worker"""
-        from tasks.models import Task
-        from salaries.models import SalaryPayment
+        """Pending salary for this worker, read from the maintained WorkerBalance"""
+        from salaries.models import WorkerBalance
         
-        # Get total net pay from completed tasks
-        total_earned = Task.objects.filter(
-            worker=self,
-            status='Completed'
-        ).aggregate(
-            total=models.Sum('net_pay')
-        )['total'] or 0
+        try:
+            return self.balance.pending
+        except WorkerBalance.DoesNotExist:
+            return 0
+    
+    @property
+    def total_earned(self):
+        """Net pay earned from completed tasks, read from the maintained WorkerBalance"""
+        from salaries.models import WorkerBalance
         
-        # Get total payments made
-        total_paid = SalaryPayment.objects.filter(
-            worker=self
-        ).aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
+        try:
+            return self.balance.total_earned
+        except WorkerBalance.DoesNotExist:
+            return 0
+    
+    @property
+    def total_paid(self):
+        """Salary paid so far, read from the maintained WorkerBalance"""
+        from salaries.models import WorkerBalance
         
-        return max(0, total_earned - total_paid)
+        try:
+            return self.balance.total_paid
+        except WorkerBalance.DoesNotExist:
+            return 0
     
     @property
     def total_tasks_completed(self):
@@ -52,6 +194,10 @@ class Worker(models.Model):
         db_table = 'workers'
         ordering = ['name']
 
+def unindex_deleted_worker(sender, instance, **kwargs):
+    """post_delete receiver, so queryset deletes leave the search index too"""
+    Worker.unindex_search([instance.id])
+
 class WorkerHistory(models.Model):
     """Model to store history of deleted workers for audit purposes."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
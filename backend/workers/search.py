@@ -0,0 +1,87 @@
+"""
+Worker search.
+
+Matches a query against normalized copies of each worker's name, phone number
+and ID number. Prefix matches are index range scans on those columns and come
+first; substring matches fill whatever room is left in the result, from the
+worker_search FTS5 trigram index on SQLite or a table scan elsewhere.
+"""
+import uuid
+from django.db import connection
+from django.db.models import Q
+from .models import Worker, normalize_search_code, normalize_search_text
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# The trigram index needs three characters, so shorter queries only match prefixes
+MIN_SUBSTRING_LENGTH = 3
+
+SEARCH_COLUMNS = ('id', 'name', 'role')
+
+# Sorts after any character a normalized column can hold
+_PREFIX_END = '\U0010ffff'
+
+
+def _search_terms(query):
+    """Normalized term for each search column, skipping columns the query cannot match"""
+    text = normalize_search_text(query)
+    code = normalize_search_code(query)
+    terms = {}
+    if text:
+        terms['search_name'] = text
+    if any(c.isdigit() for c in code):
+        terms['search_phone'] = code
+    if code:
+        terms['search_id_number'] = code
+    return terms
+
+
+def search_workers(query, limit=DEFAULT_LIMIT):
+    """
+    Active workers matching query, as {id, name, role} rows.
+
+    Args:
+        query: Fragment of a name, phone number or ID number; case, accents,
+            spacing and punctuation are ignored
+        limit: Maximum number of rows to return
+    """
+    terms = _search_terms(query)
+    workers = Worker.objects.filter(is_active=True)
+    rows = {}
+
+    # A range rather than LIKE 'term%' so the column index is used on every backend
+    for column, term in terms.items():
+        if len(rows) >= limit:
+            break
+        matches = workers.filter(**{f'{column}__gte': term, f'{column}__lt': term + _PREFIX_END})
+        for row in matches.exclude(pk__in=list(rows)).order_by(column, 'id').values(*SEARCH_COLUMNS)[:limit - len(rows)]:
+            rows[row['id']] = row
+
+    substring_terms = {column: term for column, term in terms.items() if len(term) >= MIN_SUBSTRING_LENGTH}
+    if substring_terms and len(rows) < limit:
+        matches = _substring_matches(workers, substring_terms, list(rows), limit - len(rows))
+        for row in sorted(matches, key=lambda row: row['name']):
+            rows[row['id']] = row
+
+    return list(rows.values())
+
+
+def _substring_matches(workers, terms, exclude, limit):
+    """Up to limit {id, name, role} rows containing any of the terms, skipping the exclude ids"""
+    if connection.vendor != 'sqlite':
+        condition = Q()
+        for column, term in terms.items():
+            condition |= Q(**{f'{column}__contains': term})
+        return list(workers.filter(condition).exclude(pk__in=exclude).values(*SEARCH_COLUMNS)[:limit])
+
+    # Driving the join from the trigram index stops as soon as limit rows are found
+    match = ' OR '.join('{} : "{}"'.format(column, term.replace('"', '""')) for column, term in terms.items())
+    excluded = ''.join(' AND w.id != %s' for _ in exclude)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT w.id, w.name, w.role FROM worker_search s JOIN {Worker._meta.db_table} w ON w.id = s.worker_id '
+            f'WHERE worker_search MATCH %s AND w.is_active{excluded} LIMIT %s',
+            [match, *(worker_id.hex for worker_id in exclude), limit]
+        )
+        return [{'id': uuid.UUID(worker_id), 'name': name, 'role': role} for worker_id, name, role in cursor.fetchall()]
@@ -1,17 +1,29 @@
 from rest_framework import serializers
 from .models import Worker
 
+class AnnotatedReadOnlyField(serializers.ReadOnlyField):
+    """Read-only value from the `annotated_<source>` annotation when present, else the model attribute"""
+    
+    def get_attribute(self, instance):
+        value = getattr(instance, f'annotated_{self.source}', None)
+        if value is not None:
+            return value
+        return super().get_attribute(instance)
+
 class WorkerSerializer(serializers.ModelSerializer):
     """Serializer for Worker model"""
     
-    pending_salary = serializers.ReadOnlyField()
-    total_tasks_completed = serializers.ReadOnlyField()
+    # Lists annotate these in one query (workers.listing); single workers use the properties
+    pending_salary = AnnotatedReadOnlyField()
+    total_earned = AnnotatedReadOnlyField()
+    total_paid = AnnotatedReadOnlyField()
+    total_tasks_completed = AnnotatedReadOnlyField()
     
     class Meta:
         model = Worker
         fields = [
             'id', 'name', 'phone_number', 'id_number', 'role', 'email', 'is_active',
-            'pending_salary', 'total_tasks_completed', 'created_at', 'updated_at'
+            'pending_salary', 'total_earned', 'total_paid', 'total_tasks_completed', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -41,6 +53,12 @@ class WorkerCreateUpdateSerializer(serializers.ModelSerializer):
             })
         return data
 
+class WorkerImportSerializer(WorkerCreateUpdateSerializer):
+    """Field validation for one imported row; ID number uniqueness is checked per chunk instead of per row"""
+    
+    class Meta(WorkerCreateUpdateSerializer.Meta):
+        extra_kwargs = {'id_number': {'validators': []}}
+
 class WorkerSummarySerializer(serializers.ModelSerializer):
     """Simplified serializer for worker summaries"""
     
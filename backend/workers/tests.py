@@ -0,0 +1,184 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+import uuid
+from unittest import mock
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from products.models import Product
+from salaries.models import SalaryPayment
+from tasks.models import Task
+from .importing import import_workers
+from .models import Worker
+
+
+class WorkerListTests(TestCase):
+    """GET /api/workers/ annotates every total, so its query count does not grow with the workers listed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='lister', password='unused-password', role='admin'))
+        self.product = Product.objects.create(name='Bottle', purchase_price=Decimal('5.00'), wash_price=Decimal('2.00'))
+        self.count = 0
+
+    def add_workers(self, count):
+        for _ in range(count):
+            index = self.count = self.count + 1
+            worker = Worker.objects.create(name=f'Washer {index:03d}', phone_number='0700000000', id_number=f'LIST-{index:04d}')
+            for day in range(index % 4 + 1):
+                Task.objects.create(
+                    worker=worker, product=self.product, assigned_quantity=10,
+                    washed_quantity=10 if day % 2 == 0 else 4,
+                    salary=Decimal(50 + day), deduction=Decimal(day),
+                    date=date.today() - timedelta(days=day)
+                )
+            Task.objects.create(worker=worker, task_type='daily_salary', salary=Decimal('80.00'), date=date.today())
+            if index % 3:
+                SalaryPayment.objects.create(worker=worker, amount=Decimal(index * 10), date=date.today())
+
+    def get_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/workers/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_is_constant(self):
+        self.add_workers(1)
+        self.assertEqual(len(self.get_list().data), 1)
+        self.add_workers(24)
+        self.assertEqual(len(self.get_list().data), 25)
+
+    def test_paginated_query_count_is_constant(self):
+        for total in (1, 25):
+            self.add_workers(total - self.count)
+            # Page count query plus the page itself
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/workers/', {'page_size': 10})
+            self.assertEqual(response.data['count'], total)
+
+    def test_annotated_totals_match_each_worker(self):
+        self.add_workers(12)
+        rows = self.client.get('/api/workers/').data
+        self.assertEqual(len(rows), 12)
+        for row in rows:
+            completed = Task.objects.filter(worker_id=row['id'], status='Completed')
+            earned = completed.aggregate(total=Sum('net_pay'))['total'] or Decimal(0)
+            paid = SalaryPayment.objects.filter(worker_id=row['id']).aggregate(total=Sum('amount'))['total'] or Decimal(0)
+            with self.subTest(worker=row['name']):
+                self.assertEqual(Decimal(row['total_earned']), earned)
+                self.assertEqual(Decimal(row['total_paid']), paid)
+                self.assertEqual(Decimal(row['pending_salary']), max(Decimal(0), earned - paid))
+                self.assertEqual(row['total_tasks_completed'], completed.count())
+
+
+class ManagerBulkCreateTests(TestCase):
+    """POST /api/workers/managers/bulk/ hashes passwords before it opens its transaction"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='onboarder', password='unused-password', role='admin'))
+
+    def test_passwords_hashed_outside_transaction(self):
+        # The test case runs inside atomic blocks of its own; count the ones the view opens
+        depth = len(connection.atomic_blocks)
+        depths = []
+
+        def hash_password(password):
+            depths.append(len(connection.atomic_blocks))
+            return make_password(password)
+
+        managers = [
+            {'name': f'Manager {index}', 'phone_number': '0700000000', 'id_number': f'MGR-{index:04d}', 'email': f'manager{index}@example.com'}
+            for index in range(3)
+        ]
+        with mock.patch('workers.email_service.make_password', side_effect=hash_password):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/workers/managers/bulk/', {'managers': managers}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(depths, [depth] * 3)
+        self.assertEqual(User.objects.filter(role='manager').count(), 3)
+        self.assertEqual(Worker.rebuild_search(dry_run=True), [])
+
+
+class WorkerSearchTests(TestCase):
+    """GET /api/workers/search/ finds workers by a prefix or any substring of their name, phone or ID number"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='searcher', password='unused-password', role='admin'))
+
+    def search(self, query):
+        response = self.client.get('/api/workers/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.data]
+
+    def test_worker_created_after_migrating_found_by_substring(self):
+        # The test database is built by running every migration, including those that rebuild the workers table
+        Worker.objects.create(name='Jane Wanjiru Doe', phone_number='0712345678', id_number='ID-9087')
+        self.assertEqual(self.search('wanjiru'), ['Jane Wanjiru Doe'])
+        self.assertEqual(self.search('345678'), ['Jane Wanjiru Doe'])
+
+    def test_prefix_matches_before_substring_matches(self):
+        Worker.objects.create(name='Mary Johnson', phone_number='0700000001', id_number='ID-0001')
+        Worker.objects.create(name='John Kamau', phone_number='0700000002', id_number='ID-0002')
+        Worker.objects.create(name='Peter Otieno', phone_number='0700000003', id_number='ID-0003')
+        self.assertEqual(self.search('joh'), ['John Kamau', 'Mary Johnson'])
+        self.assertEqual(self.search('Jo'), ['John Kamau'])
+        self.assertEqual(self.search('000-003'), ['Peter Otieno'])
+        self.assertEqual(self.search('d0002'), ['John Kamau'])
+
+    def test_index_follows_save_and_delete(self):
+        worker = Worker.objects.create(name='Grace Wanjiru', phone_number='0711111111', id_number='ID-1111')
+        worker.name = 'Grace Achieng'
+        worker.save(update_fields=['name'])
+        self.assertEqual(self.search('wanjiru'), [])
+        self.assertEqual(self.search('achieng'), ['Grace Achieng'])
+
+        Worker.objects.filter(pk=worker.pk).delete()
+        self.assertEqual(self.search('achieng'), [])
+        self.assertEqual(Worker.rebuild_search(dry_run=True), [])
+
+    def test_imported_workers_are_indexed(self):
+        rows = 'name,phone_number,id_number\nLucy Chebet,0722000001,IMP-0001\nDaniel Mutua,0722000002,IMP-0002\n'
+        self.assertEqual(import_workers(BytesIO(rows.encode()), 'workers.csv').created, 2)
+        self.assertEqual(self.search('chebet'), ['Lucy Chebet'])
+        self.assertEqual(self.search('0002'), ['Daniel Mutua'])
+        self.assertEqual(Worker.rebuild_search(dry_run=True), [])
+
+    def test_queryset_updates_are_indexed(self):
+        worker = Worker.objects.create(name='Faith Njeri', phone_number='0733000000', id_number='ID-3333')
+        other = Worker.objects.create(name='Ann Kiprop', phone_number='0733000001', id_number='ID-3334')
+        Worker.objects.filter(pk=worker.pk).update(name='Faith Mwangi')
+        self.assertEqual(self.search('mwangi'), ['Faith Mwangi'])
+        self.assertEqual(self.search('njeri'), [])
+
+        other.phone_number = '0799 123 456'
+        Worker.objects.bulk_update([other], ['phone_number'])
+        self.assertEqual(self.search('123456'), ['Ann Kiprop'])
+        self.assertEqual(Worker.rebuild_search(dry_run=True), [])
+
+    def test_rows_keyed_by_full_worker_id(self):
+        # Ids that agree in all but their last bits must not share an index row
+        first = Worker.objects.create(id=uuid.UUID(int=(1 << 127) | 1), name='Lucy Chebet', phone_number='0744000001', id_number='ID-4441')
+        Worker.objects.create(id=uuid.UUID(int=(1 << 127) | 2), name='Lucy Achieng', phone_number='0744000002', id_number='ID-4442')
+        first.delete()
+        self.assertEqual(self.search('lucy'), ['Lucy Achieng'])
+        self.assertEqual(Worker.rebuild_search(dry_run=True), [])
+
+    def test_rebuild_repairs_raw_sql_update(self):
+        worker = Worker.objects.create(name='Faith Njeri', phone_number='0733000000', id_number='ID-3333')
+        with connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {Worker._meta.db_table} SET name = %s WHERE id = %s', ['Faith Mwangi', worker.id.hex])
+        with self.assertRaises(SystemExit):
+            call_command('rebuild_worker_search', verify=True, stdout=StringIO())
+
+        call_command('rebuild_worker_search', stdout=StringIO())
+        self.assertEqual(self.search('mwangi'), ['Faith Mwangi'])
+        self.assertEqual(self.search('njeri'), [])
+        self.assertEqual(Worker.rebuild_search(dry_run=True), [])
@@ -3,6 +3,9 @@ from . import views
 
 urlpatterns = [
     path('', views.worker_list_create, name='worker_list_create'),
+    path('import/', views.worker_import, name='worker_import'),
+    path('search/', views.worker_search, name='worker_search'),
     path('<uuid:pk>/', views.worker_detail, name='worker_detail'),
+    path('managers/bulk/', views.manager_bulk_create, name='manager_bulk_create'),
     path('verify/', views.verify_worker, name='verify_worker'),
 ]
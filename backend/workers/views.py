@@ -4,18 +4,41 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from bottleflow.pagination import OptInPageNumberPagination
 from .models import Worker, WorkerHistory
 from .serializers import WorkerSerializer, WorkerCreateUpdateSerializer
-from .email_service import create_manager_account, send_manager_credentials_email
+from .listing import annotate_worker_totals, worker_list_queryset
+from .search import DEFAULT_LIMIT, MAX_LIMIT, search_workers
+from .importing import WorkerImportError, import_workers
+from .email_service import (
+    create_manager_account, send_manager_credentials_email,
+    create_manager_users, generate_credentials, manager_credentials_email
+)
+from notifications.outbox import enqueue_emails
+from stock.views import bulk_errors
 from audit.utils import log_audit
 
+# Each account hashes a password, so batches are kept small
+MAX_BULK_MANAGERS = 50
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def worker_list_create(request):
     """List all workers or create a new worker"""
     
     if request.method == 'GET':
-        workers = Worker.objects.filter(is_active=True)
+        # Salary totals and task counts are annotated, so the list is a single query
+        workers = worker_list_queryset(
+            role=request.query_params.get('role'),
+            search=request.query_params.get('search')
+        )
+        
+        if OptInPageNumberPagination.is_requested(request):
+            paginator = OptInPageNumberPagination()
+            page = paginator.paginate_queryset(workers, request)
+            return paginator.get_paginated_response(WorkerSerializer(page, many=True).data)
+        
         serializer = WorkerSerializer(workers, many=True)
         return Response(serializer.data)
     
@@ -58,8 +81,8 @@ def worker_list_create(request):
                     worker.user_account = account_result['user']
                     worker.save()
                     
-                    print(f"🔄 Sending credentials email to {worker.email}...")
-                    # Send credentials email
+                    print(f"🔄 Queueing credentials email to {worker.email}...")
+                    # Queue credentials email (delivered by run_email_worker)
                     email_result = send_manager_credentials_email(
                         worker.name,
                         worker.email,
@@ -69,7 +92,7 @@ def worker_list_create(request):
                     )
                     
                     # Log audit trail with email status
-                    email_status = "with email sent" if email_result['success'] else "but email failed"
+                    email_status = "with email queued" if email_result['success'] else "but email failed"
                     log_audit(
                         user=request.user,
                         action='CREATE_MANAGER_WORKER',
@@ -82,7 +105,11 @@ def worker_list_create(request):
 
                     response_data = WorkerSerializer(worker).data
                     response_data['account_created'] = True
-                    response_data['email_sent'] = email_result['success']
+                    response_data['email_queued'] = email_result['success']
+                    if email_result['success']:
+                        # Delivery state: GET /api/notifications/emails/{email_id}/
+                        response_data['email_id'] = email_result['email'].id
+                        response_data['email_status'] = email_result['email'].status
                     response_data['username'] = account_result['username']
                     response_data['message'] = message
                     
@@ -124,12 +151,145 @@ def worker_list_create(request):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def manager_bulk_create(request):
+    """Onboard many managers at once: workers, user accounts and queued credential emails (Admin only)"""
+    
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    items = request.data.get('managers') if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'Provide a non-empty list of managers.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_MANAGERS:
+        return Response({'error': f'At most {MAX_BULK_MANAGERS} managers per request.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Field validation per item; every entry is a manager and needs an email
+    errors = {}
+    managers = []
+    for index, item in enumerate(items):
+        serializer = WorkerCreateUpdateSerializer(data={**item, 'role': 'manager'} if isinstance(item, dict) else item)
+        if serializer.is_valid():
+            managers.append(serializer.validated_data)
+        else:
+            errors[index] = serializer.errors
+            managers.append(None)
+    
+    # Duplicates within the batch and against existing workers and users, one query each
+    emails = [data['email'] for data in managers if data]
+    id_numbers = [data['id_number'] for data in managers if data]
+    worker_emails = set(Worker.objects.filter(email__in=emails).values_list('email', flat=True))
+    user_emails = set(get_user_model().objects.filter(email__in=emails).values_list('email', flat=True))
+    taken_id_numbers = set(Worker.objects.filter(id_number__in=id_numbers).values_list('id_number', flat=True))
+    seen_emails, seen_id_numbers = set(), set()
+    for index, data in enumerate(managers):
+        if not data:
+            continue
+        email, id_number = data['email'], data['id_number']
+        if email in worker_emails:
+            errors[index] = {'email': [f'A worker with the email {email} already exists.']}
+        elif email in user_emails:
+            errors[index] = {'email': [f'A user account with the email {email} already exists.']}
+        elif id_number in taken_id_numbers:
+            errors[index] = {'id_number': [f'A worker with the ID number {id_number} already exists.']}
+        elif email in seen_emails:
+            errors[index] = {'email': ['Email appears more than once in this batch.']}
+        elif id_number in seen_id_numbers:
+            errors[index] = {'id_number': ['ID number appears more than once in this batch.']}
+        seen_emails.add(email)
+        seen_id_numbers.add(id_number)
+    
+    if errors:
+        return Response({'errors': bulk_errors(errors)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Hash the passwords before the transaction so it is not held while they are computed
+    credentials = generate_credentials(len(managers))
+    with transaction.atomic():
+        accounts = create_manager_users([(data['name'], data['email']) for data in managers], credentials=credentials)
+        workers = [Worker(**data, user_account=account['user']) for data, account in zip(managers, accounts)]
+        for worker in workers:
+            worker.update_search_fields()
+        workers = Worker.objects.bulk_create(workers)
+        Worker.index_search(workers, created=True)
+        messages = []
+        for worker, account in zip(workers, accounts):
+            subject, body, from_email = manager_credentials_email(worker.name, account['username'], account['password'], request.user)
+            messages.append((subject, body, [worker.email], from_email))
+        outbox = enqueue_emails(messages, category='manager_credentials')
+        
+        log_audit(
+            user=request.user,
+            action='CREATE_WORKER_BULK',
+            details=f'Onboarded {len(workers)} managers with accounts: {", ".join(account["username"] for account in accounts)}'
+        )
+    
+    # Serialize the new workers from one annotated query
+    annotated = annotate_worker_totals(Worker.objects.filter(pk__in=[worker.pk for worker in workers])).in_bulk()
+    results = []
+    for worker, account, email in zip(workers, accounts, outbox):
+        data = WorkerSerializer(annotated[worker.pk]).data
+        data['username'] = account['username']
+        data['email_id'] = email.id
+        data['email_status'] = email.status
+        results.append(data)
+    return Response({'count': len(results), 'results': results}, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def worker_import(request):
+    """Import workers from an uploaded CSV or XLSX file with a row-level error report (Admin only)"""
+    
+    if request.user.role != 'admin':
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({'error': 'Upload the CSV or XLSX file as "file".'}, status=status.HTTP_400_BAD_REQUEST)
+    dry_run = request.query_params.get('dry_run') == 'true'
+    
+    try:
+        result = import_workers(upload, upload.name, dry_run=dry_run)
+    except WorkerImportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if result.created:
+        log_audit(
+            user=request.user,
+            action='CREATE_WORKER_BULK',
+            details=f'Imported {result.created} workers from {upload.name} '
+                    f'({result.managers_queued} managers queued for accounts, {len(result.errors)} rows rejected)',
+            request=request
+        )
+    
+    report = result.report()
+    if dry_run or not (result.errors or result.file_error):
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+    # Some rows were rejected, or the file stopped being readable part way
+    return Response(report, status=status.HTTP_207_MULTI_STATUS if result.created else status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def worker_search(request):
+    """Autocomplete active workers by name, phone number or ID number"""
+    query = request.query_params.get('q', '').strip()
+    try:
+        limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return Response({'error': 'limit must be a whole number'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= limit <= MAX_LIMIT:
+        return Response({'error': f'limit must be between 1 and {MAX_LIMIT}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not query:
+        return Response([])
+    return Response(search_workers(query, limit))
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def worker_detail(request, pk):
     """Retrieve, update or delete a worker"""
     
-    worker = get_object_or_404(Worker, pk=pk)
+    worker = get_object_or_404(Worker.objects.select_related('balance'), pk=pk)
     
     if request.method == 'GET':
         serializer = WorkerSerializer(worker)